@@ -0,0 +1,127 @@
+# Componentes de interfaz reutilizables entre páginas
+import os
+from functools import partial
+
+import streamlit as st
+
+from finanzas.medicion import detallar, seccion
+from finanzas.trabajos import FALLIDO, cola_trabajos
+
+
+# Sustituto de st.tabs con evaluación perezosa: st.tabs ejecuta el contenido de
+# todas las pestañas en cada rerun aunque sólo se vea una. Aquí devolvemos la
+# pestaña activa y cada página sólo calcula y pinta esa. La pestaña elegida se
+# añade al nombre de la sección medida en curso (la página).
+def pestanas(etiquetas, key):
+    seleccion = st.radio(
+        "Sección",
+        etiquetas,
+        key=key,
+        horizontal=True,
+        label_visibility="collapsed",
+    )
+    detallar(seleccion)
+    return seleccion
+
+
+# Gráfico de plotly medido aparte: separa lo que cuesta serializar y enviar la
+# figura de lo que cuesta calcular sus datos y construirla
+def grafico(fig):
+    with seccion("Gráfico"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# Texto y estilo de la variación frente al periodo anterior
+# (invertir=True cuando subir es desfavorable, como en los gastos)
+def delta_html(variacion, texto="vs. mes anterior", unidad="%", invertir=False):
+    favorable = (variacion >= 0) != invertir
+    clase = 'metric-delta-positive' if favorable else 'metric-delta-negative'
+    flecha = '↑' if variacion >= 0 else '↓'
+    return f"<p class='{clase}'>{flecha} {variacion:.1f}{unidad} {texto}</p>"
+
+
+# Tabla paginada por clave: sólo se materializa y formatea la página visible.
+# El cursor es la clave (fecha, id) de la última fila de la página anterior, así
+# que las altas nuevas no desplazan la página que se está viendo. `firma`
+# identifica los filtros: si cambian se vuelve a la primera página.
+def tabla_paginada(seleccion, formatear, key, firma=None, tamano=50, height=400):
+    estado = st.session_state.setdefault(key, {"firma": firma, "cursores": [None]})
+    if estado["firma"] != firma:
+        estado.update(firma=firma, cursores=[None])
+    cursores = estado["cursores"]
+
+    pagina, siguiente = seleccion.pagina(tamano, cursores[-1])
+    numero = seleccion.desplazamiento(cursores[-1]) // tamano + 1
+    total_paginas = max(1, -(-len(seleccion) // tamano))
+
+    with seccion("Tabla"):
+        st.dataframe(formatear(pagina), use_container_width=True, height=height)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ Anterior", key=f"{key}_anterior", disabled=len(cursores) == 1, use_container_width=True):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Página {numero} de {total_paginas} · {len(seleccion)} filas")
+    with col3:
+        if st.button("Siguiente ▶", key=f"{key}_siguiente", disabled=siguiente is None, use_container_width=True):
+            cursores.append(siguiente)
+            st.rerun()
+    return pagina
+
+
+def _descarga(ruta, nombre_fichero, mime, key):
+    # El fichero se lee sólo al pulsar, no en cada rerun
+    st.download_button(
+        f"⬇️ Descargar {nombre_fichero}",
+        data=partial(open, ruta, "rb"),
+        file_name=nombre_fichero,
+        mime=mime,
+        key=key,
+        on_click="ignore",
+        use_container_width=True,
+    )
+
+
+# Exportación en dos pasos: el botón genera el fichero (con barra de progreso)
+# y después se ofrece la descarga. `generar(ruta, progreso)` escribe el fichero;
+# si ya existe para la misma ruta (misma consulta y versión) se reutiliza.
+def boton_exportar(etiqueta, ruta, generar, nombre_fichero, mime, key):
+    if not os.path.exists(ruta):
+        if not st.button(etiqueta, key=key, use_container_width=True):
+            return None
+        barra = st.progress(0.0, text="Generando...")
+        generar(ruta, lambda fraccion: barra.progress(min(fraccion, 1.0), text=f"Generando... {fraccion:.0%}"))
+        barra.empty()
+    _descarga(ruta, nombre_fichero, mime, f"{key}_descargar")
+    return ruta
+
+
+# Progreso de un trabajo en segundo plano: sólo este fragmento se refresca cada
+# segundo; al terminar se relanza la página para mostrar la descarga
+@st.fragment(run_every=1.0)
+def _seguimiento_trabajo(ruta):
+    trabajo = cola_trabajos().trabajo(ruta)
+    if trabajo is None or not trabajo.activo:
+        st.rerun()
+    st.progress(trabajo.progreso, text=f"{trabajo.estado} · {trabajo.mensaje or trabajo.descripcion}")
+
+
+# Igual que boton_exportar pero el fichero se genera en la cola de procesos, sin
+# bloquear la sesión. `preparar()` devuelve los argumentos de `funcion` y sólo se
+# llama al encolar. Los ficheros terminados se sirven directamente.
+def boton_trabajo(etiqueta, ruta, funcion, preparar, nombre_fichero, mime, key, descripcion=""):
+    cola = cola_trabajos()
+    trabajo = cola.trabajo(ruta)
+    if trabajo is None or trabajo.estado == FALLIDO:
+        if trabajo is not None:
+            st.error(f"No se pudo generar {nombre_fichero}: {trabajo.mensaje}")
+        if not st.button(etiqueta if trabajo is None else "Reintentar", key=key, use_container_width=True):
+            return trabajo
+        trabajo = cola.enviar(ruta, funcion, *preparar(), descripcion=descripcion or nombre_fichero)
+    if trabajo.activo:
+        _seguimiento_trabajo(ruta)
+    else:
+        _descarga(ruta, nombre_fichero, mime, f"{key}_descargar")
+    return trabajo
@@ -0,0 +1 @@
+# Núcleo de datos y cálculo de Finanzas PYMEs
@@ -0,0 +1,153 @@
+# Vistas agregadas del libro a partir de los resúmenes materializados
+import numpy as np
+import pandas as pd
+
+from finanzas.almacen import version_libro
+from finanzas.cache import memoizar
+
+MESES_ABREV = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+
+
+def etiquetas_meses(periodos):
+    return [f"{MESES_ABREV[p.month - 1]} {p.year % 100:02d}" for p in periodos]
+
+
+def _mes_actual(hasta=None):
+    return pd.Timestamp(hasta if hasta is not None else pd.Timestamp.now()).to_period("M")
+
+
+def _variacion(actual, anterior):
+    return (actual - anterior) / abs(anterior) * 100 if anterior else 0.0
+
+
+# Ingresos y gastos de los últimos `meses` meses (incluido el actual), con ceros
+# en los meses sin movimientos
+@memoizar(ttl=300, version=version_libro)
+def flujo_mensual(almacen, meses=12, hasta=None):
+    periodos = pd.period_range(end=_mes_actual(hasta), periods=meses, freq="M")
+    totales = almacen.totales_mensuales(desde_mes=str(periodos[0]), hasta_mes=str(periodos[-1]))
+    tabla = (
+        totales.pivot_table(index="mes", columns="tipo", values="total", aggfunc="sum")
+        .reindex(index=[str(p) for p in periodos], columns=["Ingreso", "Gasto"])
+        .fillna(0.0)
+    )
+    return pd.DataFrame({
+        "mes": etiquetas_meses(periodos),
+        "ingresos": tabla["Ingreso"].to_numpy(),
+        "gastos": tabla["Gasto"].to_numpy(),
+    })
+
+
+# KPI del dashboard: saldo, ingresos y gastos del mes y su variación frente al mes anterior
+@memoizar(ttl=300, version=version_libro)
+def indicadores_mes(almacen, hasta=None):
+    mes = _mes_actual(hasta)
+    anterior = mes - 1
+    flujo = flujo_mensual(almacen, 2, hasta)
+    saldo = almacen.saldo_acumulado(str(mes))
+    saldo_anterior = almacen.saldo_acumulado(str(anterior))
+    ingresos_anterior, ingresos = flujo["ingresos"].tolist()
+    gastos_anterior, gastos = flujo["gastos"].tolist()
+    return {
+        "saldo": saldo,
+        "saldo_variacion": _variacion(saldo, saldo_anterior),
+        "ingresos": ingresos,
+        "ingresos_variacion": _variacion(ingresos, ingresos_anterior),
+        "gastos": gastos,
+        "gastos_variacion": _variacion(gastos, gastos_anterior),
+    }
+
+
+# Sumas prefijo diarias por (tipo, categoría): acumulado[i] = total de los días
+# anteriores a origen + i. Cualquier rango [inicio, fin] cuesta dos lecturas por
+# columna, sin volver a recorrer transacciones.
+class SumasPrefijo:
+    def __init__(self, origen, columnas, acumulado):
+        self.origen = origen
+        self.columnas = columnas
+        self.acumulado = acumulado
+
+    @classmethod
+    def desde_diario(cls, diario):
+        if diario.empty:
+            return cls(np.datetime64("today", "D"), pd.MultiIndex.from_tuples([], names=["tipo", "categoria"]), np.zeros((1, 0)))
+        tabla = diario.pivot_table(index="fecha", columns=["tipo", "categoria"], values="total", aggfunc="sum")
+        dias = pd.date_range(tabla.index.min(), tabla.index.max(), freq="D")
+        valores = tabla.reindex(dias).fillna(0.0).to_numpy()
+        acumulado = np.zeros((len(dias) + 1, valores.shape[1]))
+        np.cumsum(valores, axis=0, out=acumulado[1:])
+        return cls(dias[0].to_datetime64().astype("datetime64[D]"), tabla.columns, acumulado)
+
+    def _posicion(self, fechas):
+        dias = (np.asarray(fechas, dtype="datetime64[D]") - self.origen).astype(np.int64)
+        return np.clip(dias, 0, len(self.acumulado) - 1)
+
+    # Totales por columna en cada tramo [limites[i], limites[i+1]) (límites en días)
+    def totales_tramos(self, limites):
+        posiciones = self._posicion(limites)
+        return np.diff(self.acumulado[posiciones], axis=0)
+
+    def totales(self, inicio, fin):
+        fin_exclusivo = np.datetime64(pd.Timestamp(fin).date(), "D") + 1
+        return self.totales_tramos([np.datetime64(pd.Timestamp(inicio).date(), "D"), fin_exclusivo])[0]
+
+
+@memoizar(ttl=300, version=version_libro)
+def sumas_prefijo(almacen):
+    return SumasPrefijo.desde_diario(almacen.totales_diarios())
+
+
+# Rango de fechas [inicio, fin] de los selectores de periodo de Informes;
+# los periodos naturales van del inicio del mes/trimestre/año hasta hoy
+def rango_periodo(periodo, fecha_inicio=None, fecha_fin=None, hoy=None):
+    hoy = pd.Timestamp(hoy if hoy is not None else pd.Timestamp.now()).normalize()
+    if periodo == "Mensual":
+        return hoy.to_period("M").start_time, hoy
+    if periodo == "Trimestral":
+        return hoy.to_period("Q").start_time, hoy
+    if periodo == "Anual":
+        return hoy.to_period("Y").start_time, hoy
+    return pd.Timestamp(fecha_inicio).normalize(), pd.Timestamp(fecha_fin).normalize()
+
+
+def rango_anterior(inicio, fin):
+    duracion = fin - inicio
+    return inicio - duracion - pd.Timedelta(days=1), inicio - pd.Timedelta(days=1)
+
+
+# Totales por tipo y categoría en un rango arbitrario
+@memoizar(ttl=300, version=version_libro)
+def totales_rango(almacen, inicio, fin):
+    sumas = sumas_prefijo(almacen)
+    totales = pd.Series(sumas.totales(inicio, fin), index=sumas.columnas, name="total")
+    return totales.reset_index()
+
+
+@memoizar(ttl=300, version=version_libro)
+def resumen_rango(almacen, inicio, fin):
+    totales = totales_rango(almacen, inicio, fin)
+    ingresos = totales.loc[totales["tipo"] == "Ingreso", "total"].sum()
+    gastos = totales.loc[totales["tipo"] == "Gasto", "total"].sum()
+    beneficio = ingresos - gastos
+    return {
+        "ingresos": ingresos,
+        "gastos": gastos,
+        "beneficio": beneficio,
+        "margen": beneficio / ingresos * 100 if ingresos else 0.0,
+    }
+
+
+# Ingresos y gastos por mes natural dentro de un rango arbitrario (meses extremos parciales)
+@memoizar(ttl=300, version=version_libro)
+def flujo_rango(almacen, inicio, fin):
+    inicio, fin = pd.Timestamp(inicio).normalize(), pd.Timestamp(fin).normalize()
+    periodos = pd.period_range(inicio, fin, freq="M")
+    limites = [inicio] + [p.start_time for p in periodos[1:]] + [fin + pd.Timedelta(days=1)]
+    sumas = sumas_prefijo(almacen)
+    tramos = sumas.totales_tramos(np.array(limites, dtype="datetime64[D]"))
+    tipos = sumas.columnas.get_level_values("tipo") if len(sumas.columnas) else np.array([])
+    return pd.DataFrame({
+        "mes": etiquetas_meses(periodos),
+        "ingresos": tramos[:, tipos == "Ingreso"].sum(axis=1),
+        "gastos": tramos[:, tipos == "Gasto"].sum(axis=1),
+    })
@@ -0,0 +1,846 @@
+# Almacén persistente del libro contable (SQLite embebido)
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from finanzas.cache import memoizar
+
+RUTA_POR_DEFECTO = os.environ.get(
+    "FINANZAS_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datos", "finanzas.db"),
+)
+
+COLUMNAS_TRANSACCIONES = ["id", "fecha", "descripcion", "tipo", "categoria", "cuenta", "monto"]
+COLUMNAS_FACTURAS = ["id", "numero", "cliente", "fecha_emision", "vencimiento", "monto", "estado", "fecha_cobro"]
+COLUMNAS_CONCEPTOS = ["descripcion", "cantidad", "precio", "iva_porcentaje"]
+# Tipo de IVA que se supone a las facturas dadas de alta sin desglose (el importe lleva el IVA incluido)
+IVA_GENERAL = 21
+# Columnas y columnas de fecha de las tablas que se pueden leer en bloque
+TABLAS = {
+    "transacciones": (COLUMNAS_TRANSACCIONES, ("fecha",)),
+    "facturas": (COLUMNAS_FACTURAS, ("fecha_emision", "vencimiento", "fecha_cobro")),
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS transacciones (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    cuenta TEXT NOT NULL,
+    monto REAL NOT NULL,
+    huella INTEGER,
+    categoria_auto INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_transacciones_fecha ON transacciones (fecha, id);
+CREATE INDEX IF NOT EXISTS idx_transacciones_tipo ON transacciones (tipo, fecha);
+CREATE INDEX IF NOT EXISTS idx_transacciones_categoria ON transacciones (categoria, fecha);
+CREATE INDEX IF NOT EXISTS idx_transacciones_cuenta ON transacciones (cuenta, fecha);
+CREATE INDEX IF NOT EXISTS idx_transacciones_huella ON transacciones (huella);
+
+CREATE TABLE IF NOT EXISTS facturas (
+    id INTEGER PRIMARY KEY,
+    numero TEXT NOT NULL UNIQUE,
+    cliente TEXT NOT NULL,
+    fecha_emision TEXT NOT NULL,
+    vencimiento TEXT NOT NULL,
+    monto REAL NOT NULL,
+    estado TEXT NOT NULL,
+    fecha_cobro TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_facturas_emision ON facturas (fecha_emision, id);
+CREATE INDEX IF NOT EXISTS idx_facturas_estado ON facturas (estado, vencimiento);
+CREATE INDEX IF NOT EXISTS idx_facturas_cobro ON facturas (fecha_cobro);
+
+-- Líneas de cada factura: base = cantidad × precio y cuota de IVA
+CREATE TABLE IF NOT EXISTS conceptos_factura (
+    id INTEGER PRIMARY KEY,
+    factura INTEGER NOT NULL,
+    descripcion TEXT NOT NULL,
+    cantidad REAL NOT NULL,
+    precio REAL NOT NULL,
+    iva_porcentaje REAL NOT NULL,
+    base REAL NOT NULL,
+    cuota REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conceptos_factura ON conceptos_factura (factura);
+
+-- Agregados mensuales materializados, actualizados en la misma transacción que cada escritura
+CREATE TABLE IF NOT EXISTS resumen_mensual (
+    mes TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    cuenta TEXT NOT NULL,
+    total REAL NOT NULL,
+    movimientos INTEGER NOT NULL,
+    PRIMARY KEY (mes, tipo, categoria, cuenta)
+);
+
+CREATE TABLE IF NOT EXISTS resumen_diario (
+    fecha TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    total REAL NOT NULL,
+    movimientos INTEGER NOT NULL,
+    PRIMARY KEY (fecha, tipo, categoria)
+);
+
+-- Facturas cobradas por mes de cobro y cliente: importe e importe × días desde
+-- la emisión (periodo medio de cobro ponderado por importe)
+CREATE TABLE IF NOT EXISTS resumen_cobros (
+    mes TEXT NOT NULL,
+    cliente TEXT NOT NULL,
+    cobrado REAL NOT NULL,
+    cobrado_dias REAL NOT NULL,
+    facturas INTEGER NOT NULL,
+    PRIMARY KEY (mes, cliente)
+);
+
+-- Facturas pendientes de cobro por fecha de emisión y cliente (antigüedad de saldos)
+CREATE TABLE IF NOT EXISTS resumen_pendiente (
+    fecha_emision TEXT NOT NULL,
+    cliente TEXT NOT NULL,
+    pendiente REAL NOT NULL,
+    facturas INTEGER NOT NULL,
+    PRIMARY KEY (fecha_emision, cliente)
+);
+
+-- IVA repercutido por mes de emisión y tipo (base y cuota de los conceptos)
+CREATE TABLE IF NOT EXISTS resumen_iva (
+    mes TEXT NOT NULL,
+    iva_porcentaje REAL NOT NULL,
+    base REAL NOT NULL,
+    cuota REAL NOT NULL,
+    conceptos INTEGER NOT NULL,
+    PRIMARY KEY (mes, iva_porcentaje)
+);
+
+-- Saldos de cierre mensuales por cuenta (puntos de control del balance): clase
+-- 'tesoreria' (cuentas del libro) o 'clientes' (facturas pendientes por cliente).
+-- Sólo hay fila en los meses con movimientos: sin fila, el saldo no cambió.
+CREATE TABLE IF NOT EXISTS saldos_cierre (
+    clase TEXT NOT NULL,
+    cuenta TEXT NOT NULL,
+    mes TEXT NOT NULL,
+    saldo REAL NOT NULL,
+    PRIMARY KEY (clase, cuenta, mes)
+);
+
+-- Ficheros ya importados (por huella SHA-1 del contenido, cuenta de destino y
+-- formato) y su resultado
+CREATE TABLE IF NOT EXISTS importaciones (
+    huella TEXT NOT NULL,
+    cuenta TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    formato TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    leidas INTEGER NOT NULL,
+    insertadas INTEGER NOT NULL,
+    duplicadas INTEGER NOT NULL,
+    rechazadas INTEGER NOT NULL,
+    PRIMARY KEY (huella, cuenta, formato)
+);
+
+-- Registro de modificaciones de filas existentes: las vistas y los índices en
+-- memoria se sincronizan por id y con este registro vuelven a leer lo modificado
+CREATE TABLE IF NOT EXISTS cambios (
+    secuencia INTEGER PRIMARY KEY,
+    tabla TEXT NOT NULL,
+    fila INTEGER NOT NULL,
+    columnas TEXT NOT NULL
+);
+
+-- Preferencias de la aplicación (valores en JSON); no forman parte del libro
+CREATE TABLE IF NOT EXISTS preferencias (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+"""
+
+# Facturas dadas de alta ya pagadas sin fecha de cobro: se supone que se
+# cobraron al vencimiento, o hoy si aún no ha llegado
+FECHA_COBRO_SUPUESTA = (
+    "UPDATE facturas SET fecha_cobro = MIN(vencimiento, date('now')) "
+    "WHERE estado = 'Pagada' AND fecha_cobro IS NULL AND id > ?"
+)
+
+# Facturas dadas de alta sin conceptos: una línea por el importe total al tipo
+# general, con el IVA incluido
+DESGLOSE_SUPUESTO = (
+    "INSERT INTO conceptos_factura (factura, descripcion, cantidad, precio, iva_porcentaje, base, cuota) "
+    f"SELECT id, 'Importe facturado', 1, ROUND(monto / {1 + IVA_GENERAL / 100}, 2), {IVA_GENERAL}, "
+    f"ROUND(monto / {1 + IVA_GENERAL / 100}, 2), monto - ROUND(monto / {1 + IVA_GENERAL / 100}, 2) "
+    "FROM facturas f WHERE id > ? AND NOT EXISTS (SELECT 1 FROM conceptos_factura c WHERE c.factura = f.id)"
+)
+
+
+def _fecha_iso(valor):
+    # Las fechas se guardan como texto ISO para que el orden lexicográfico coincida con el cronológico
+    if isinstance(valor, str):
+        return valor[:10]
+    if isinstance(valor, (datetime, pd.Timestamp)):
+        return valor.strftime("%Y-%m-%d")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return pd.Timestamp(valor).strftime("%Y-%m-%d")
+
+
+def version_libro(almacen, *args, **kwargs):
+    return almacen.version()
+
+
+def _serie_fecha_iso(serie):
+    return pd.to_datetime(serie).to_numpy().astype("datetime64[D]").astype(str)
+
+
+# Huella de contenido de cada movimiento (fecha ISO, descripción, tipo, cuenta e
+# importe en céntimos) para reconocer duplicados al importar. La categoría no
+# forma parte de la huella: un movimiento reclasificado sigue siendo el mismo.
+def huellas_transacciones(datos):
+    claves = pd.DataFrame({
+        "fecha": datos["fecha"].astype(str).to_numpy(),
+        "descripcion": datos["descripcion"].astype(str).str.strip().to_numpy(),
+        "tipo": datos["tipo"].astype(str).to_numpy(),
+        "cuenta": datos["cuenta"].astype(str).to_numpy(),
+        "centimos": np.round(datos["monto"].to_numpy(dtype=np.float64) * 100).astype(np.int64),
+    })
+    # hash_pandas_object usa una clave fija: la huella es estable entre ejecuciones
+    return pd.util.hash_pandas_object(claves, index=False).to_numpy().view(np.int64)
+
+
+class AlmacenLibro:
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = ruta
+        if ruta != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._local = threading.local()
+        self._bloqueo_escritura = threading.Lock()
+        self._conexion().executescript(ESQUEMA)
+
+    # Cada hilo de Streamlit (una sesión por hilo) usa su propia conexión
+    def _conexion(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+        return conexion
+
+    def _consulta(self, sql, parametros=(), columnas_fecha=()):
+        df = pd.read_sql_query(sql, self._conexion(), params=list(parametros))
+        for columna in columnas_fecha:
+            df[columna] = pd.to_datetime(df[columna], format="%Y-%m-%d")
+        return df
+
+    def _incrementar_version(self, conexion):
+        conexion.execute(
+            "INSERT INTO meta (clave, valor) VALUES ('version', '1') "
+            "ON CONFLICT(clave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1"
+        )
+
+    # Agregados materializados: se alimentan con las filas recién insertadas
+    # (signo = -1 descuenta filas que dejan de contar, p. ej. al recategorizar)
+    def _materializar(self, conexion, datos, signo=1):
+        mensual = (
+            datos.assign(mes=datos["fecha"].str[:7])
+            .groupby(["mes", "tipo", "categoria", "cuenta"], observed=True)["monto"]
+            .agg(["sum", "count"])
+            .reset_index()
+        )
+        conexion.executemany(
+            "INSERT INTO resumen_mensual (mes, tipo, categoria, cuenta, total, movimientos) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(mes, tipo, categoria, cuenta) DO UPDATE SET "
+            "total = total + excluded.total, movimientos = movimientos + excluded.movimientos",
+            ((m, t, c, cu, signo * float(total), signo * int(n)) for m, t, c, cu, total, n in mensual.itertuples(index=False, name=None)),
+        )
+        diario = datos.groupby(["fecha", "tipo", "categoria"], observed=True)["monto"].agg(["sum", "count"]).reset_index()
+        conexion.executemany(
+            "INSERT INTO resumen_diario (fecha, tipo, categoria, total, movimientos) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(fecha, tipo, categoria) DO UPDATE SET "
+            "total = total + excluded.total, movimientos = movimientos + excluded.movimientos",
+            ((f, t, c, signo * float(total), signo * int(n)) for f, t, c, total, n in diario.itertuples(index=False, name=None)),
+        )
+        if signo < 0:
+            conexion.execute("DELETE FROM resumen_mensual WHERE movimientos <= 0")
+            conexion.execute("DELETE FROM resumen_diario WHERE movimientos <= 0")
+
+    # Agregados de cobro de facturas: las cobradas por mes de cobro y las
+    # pendientes por fecha de emisión (signo = -1 las descuenta, p. ej. al cobrar)
+    def _materializar_facturas(self, conexion, datos, signo=1):
+        cobradas = datos[datos["fecha_cobro"].notna()]
+        dias = (pd.to_datetime(cobradas["fecha_cobro"]) - pd.to_datetime(cobradas["fecha_emision"])).dt.days
+        cobros = (
+            cobradas.assign(mes=cobradas["fecha_cobro"].str[:7], monto_dias=cobradas["monto"] * dias)
+            .groupby(["mes", "cliente"], observed=True)
+            .agg(cobrado=("monto", "sum"), cobrado_dias=("monto_dias", "sum"), facturas=("monto", "count"))
+            .reset_index()
+        )
+        conexion.executemany(
+            "INSERT INTO resumen_cobros (mes, cliente, cobrado, cobrado_dias, facturas) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(mes, cliente) DO UPDATE SET cobrado = cobrado + excluded.cobrado, "
+            "cobrado_dias = cobrado_dias + excluded.cobrado_dias, facturas = facturas + excluded.facturas",
+            ((m, c, signo * float(t), signo * float(td), signo * int(n)) for m, c, t, td, n in cobros.itertuples(index=False, name=None)),
+        )
+        pendientes = (
+            datos[datos["fecha_cobro"].isna()]
+            .groupby(["fecha_emision", "cliente"], observed=True)["monto"]
+            .agg(["sum", "count"])
+            .reset_index()
+        )
+        conexion.executemany(
+            "INSERT INTO resumen_pendiente (fecha_emision, cliente, pendiente, facturas) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(fecha_emision, cliente) DO UPDATE SET "
+            "pendiente = pendiente + excluded.pendiente, facturas = facturas + excluded.facturas",
+            ((f, c, signo * float(t), signo * int(n)) for f, c, t, n in pendientes.itertuples(index=False, name=None)),
+        )
+        # Saldo de clientes: la emisión lo aumenta y el cobro lo reduce
+        self._acumular_saldos(conexion, "clientes", pd.DataFrame({
+            "cuenta": np.concatenate([datos["cliente"].to_numpy(), cobradas["cliente"].to_numpy()]),
+            "mes": np.concatenate([datos["fecha_emision"].str[:7].to_numpy(), cobradas["fecha_cobro"].str[:7].to_numpy()]),
+            "importe": signo * np.concatenate([datos["monto"].to_numpy(dtype=np.float64), -cobradas["monto"].to_numpy(dtype=np.float64)]),
+        }))
+        if signo < 0:
+            conexion.execute("DELETE FROM resumen_cobros WHERE facturas <= 0")
+            conexion.execute("DELETE FROM resumen_pendiente WHERE facturas <= 0")
+
+    # Puntos de control del balance: `movimientos` (cuenta, mes, importe con
+    # signo) se suma al saldo de cierre de su mes y de todos los posteriores de
+    # la misma cuenta. Un mes nuevo parte del cierre anterior más próximo.
+    def _acumular_saldos(self, conexion, clase, movimientos):
+        movimientos = movimientos.groupby(["cuenta", "mes"], observed=True)["importe"].sum().reset_index()
+        movimientos = movimientos[movimientos["importe"] != 0]
+        filas = [(clase, c, m, float(i)) for c, m, i in movimientos.itertuples(index=False, name=None)]
+        conexion.executemany(
+            "INSERT OR IGNORE INTO saldos_cierre (clase, cuenta, mes, saldo) VALUES (?1, ?2, ?3, COALESCE(("
+            "SELECT saldo FROM saldos_cierre WHERE clase = ?1 AND cuenta = ?2 AND mes < ?3 ORDER BY mes DESC LIMIT 1), 0))",
+            (f[:3] for f in filas),
+        )
+        conexion.executemany(
+            "UPDATE saldos_cierre SET saldo = saldo + ?4 WHERE clase = ?1 AND cuenta = ?2 AND mes >= ?3",
+            filas,
+        )
+
+    def _saldos_transacciones(self, conexion, datos):
+        self._acumular_saldos(conexion, "tesoreria", pd.DataFrame({
+            "cuenta": datos["cuenta"].to_numpy(),
+            "mes": datos["fecha"].str[:7].to_numpy(),
+            "importe": np.where(datos["tipo"] == "Ingreso", 1.0, -1.0) * datos["monto"].to_numpy(dtype=np.float64),
+        }))
+
+    def _registrar_cambios(self, conexion, tabla, ids, columnas):
+        conexion.executemany(
+            "INSERT INTO cambios (tabla, fila, columnas) VALUES (?, ?, ?)",
+            ((tabla, int(i), ",".join(columnas)) for i in ids),
+        )
+
+    # Número de versión del libro: cambia con cada escritura y sirve como clave de caché
+    def version(self):
+        fila = self._conexion().execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+        return int(fila[0]) if fila else 0
+
+    # Escritura
+    def registrar_transaccion(self, fecha, descripcion, tipo, categoria, cuenta, monto):
+        fila = (_fecha_iso(fecha), descripcion, tipo, categoria, cuenta, float(monto))
+        datos = pd.DataFrame([fila], columns=COLUMNAS_TRANSACCIONES[1:])
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                cursor = conexion.execute(
+                    "INSERT INTO transacciones (fecha, descripcion, tipo, categoria, cuenta, monto, huella) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    fila + (int(huellas_transacciones(datos)[0]),),
+                )
+                self._materializar(conexion, datos)
+                self._saldos_transacciones(conexion, datos)
+                self._incrementar_version(conexion)
+            return cursor.lastrowid
+
+    # `categoria_auto` (opcional) marca las filas categorizadas automáticamente
+    def insertar_transacciones(self, df, tamano_lote=50000):
+        columnas = ["fecha", "descripcion", "tipo", "categoria", "cuenta", "monto"]
+        # Insertar en orden cronológico mantiene la localidad de los índices por fecha
+        datos = df[columnas].sort_values("fecha", kind="stable")
+        datos["fecha"] = _serie_fecha_iso(datos["fecha"])
+        datos["monto"] = datos["monto"].astype(float)
+        # El importador ya trae las huellas calculadas
+        datos["huella"] = df["huella"] if "huella" in df else huellas_transacciones(datos)
+        datos["categoria_auto"] = df["categoria_auto"].astype(int) if "categoria_auto" in df else 0
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                for inicio in range(0, len(datos), tamano_lote):
+                    lote = datos.iloc[inicio:inicio + tamano_lote]
+                    conexion.executemany(
+                        "INSERT INTO transacciones (fecha, descripcion, tipo, categoria, cuenta, monto, huella, categoria_auto) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        lote.itertuples(index=False, name=None),
+                    )
+                self._materializar(conexion, datos)
+                self._saldos_transacciones(conexion, datos)
+                self._incrementar_version(conexion)
+        return len(datos)
+
+    # Cambia la categoría de filas existentes. Los agregados se corrigen restando
+    # las filas con la categoría anterior y sumándolas con la nueva; el cambio
+    # queda en el registro para las vistas en memoria.
+    def actualizar_categorias(self, ids, categorias, automatica=False):
+        nuevas = pd.DataFrame({"id": np.asarray(ids, dtype=np.int64), "nueva": list(categorias)})
+        if nuevas.empty:
+            return 0
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                self._cargar_ids(conexion, nuevas["id"])
+                anteriores = pd.read_sql_query(
+                    "SELECT id, fecha, tipo, categoria, cuenta, monto FROM transacciones WHERE id IN (SELECT id FROM ids_consulta)",
+                    conexion,
+                )
+                cambiadas = anteriores.merge(nuevas, on="id")
+                cambiadas = cambiadas[cambiadas["categoria"] != cambiadas["nueva"]]
+                conexion.executemany(
+                    "UPDATE transacciones SET categoria = ?, categoria_auto = ? WHERE id = ?",
+                    ((c, int(automatica), int(i)) for c, i in zip(nuevas["nueva"], nuevas["id"])),
+                )
+                if not cambiadas.empty:
+                    self._materializar(conexion, cambiadas, signo=-1)
+                    self._materializar(conexion, cambiadas.assign(categoria=cambiadas["nueva"]))
+                self._registrar_cambios(conexion, "transacciones", nuevas["id"], ("categoria",))
+                self._incrementar_version(conexion)
+        return len(cambiadas)
+
+    # IVA repercutido de los conceptos recién insertados (id > ultimo_id) por mes de emisión
+    def _materializar_iva(self, conexion, ultimo_id):
+        conexion.execute(
+            "INSERT INTO resumen_iva (mes, iva_porcentaje, base, cuota, conceptos) "
+            "SELECT substr(f.fecha_emision, 1, 7), c.iva_porcentaje, SUM(c.base), SUM(c.cuota), COUNT(*) "
+            "FROM conceptos_factura c JOIN facturas f ON f.id = c.factura WHERE c.id > ? GROUP BY 1, 2 "
+            "ON CONFLICT(mes, iva_porcentaje) DO UPDATE SET base = base + excluded.base, "
+            "cuota = cuota + excluded.cuota, conceptos = conceptos + excluded.conceptos",
+            (ultimo_id,),
+        )
+
+    # `fecha_cobro` (opcional) es la fecha de pago de las facturas pagadas.
+    # `conceptos` (opcional) son sus líneas, enlazadas por `numero` (descripcion,
+    # cantidad, precio, iva_porcentaje); las facturas sin líneas se desglosan al tipo general
+    def insertar_facturas(self, df, conceptos=None):
+        columnas = ["numero", "cliente", "fecha_emision", "vencimiento", "monto", "estado"]
+        datos = df[columnas].copy()
+        datos["fecha_emision"] = _serie_fecha_iso(datos["fecha_emision"])
+        datos["vencimiento"] = _serie_fecha_iso(datos["vencimiento"])
+        datos["monto"] = datos["monto"].astype(float)
+        cobro = pd.to_datetime(df["fecha_cobro"]) if "fecha_cobro" in df else pd.Series(pd.NaT, index=df.index)
+        datos["fecha_cobro"] = pd.Series(_serie_fecha_iso(cobro), index=df.index).where(cobro.notna(), None)
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                ultimo_id = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM facturas").fetchone()[0]
+                conexion.executemany(
+                    "INSERT OR IGNORE INTO facturas (numero, cliente, fecha_emision, vencimiento, monto, estado, fecha_cobro) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    datos.itertuples(index=False, name=None),
+                )
+                conexion.execute(FECHA_COBRO_SUPUESTA, (ultimo_id,))
+                # Los agregados se alimentan con lo que de verdad entró (los números repetidos se ignoran)
+                insertadas = pd.read_sql_query(
+                    "SELECT id, numero, cliente, fecha_emision, monto, fecha_cobro FROM facturas WHERE id > ?", conexion, params=[ultimo_id]
+                )
+                ultimo_concepto = conexion.execute("SELECT COALESCE(MAX(id), 0) FROM conceptos_factura").fetchone()[0]
+                if conceptos is not None and len(conceptos):
+                    lineas = conceptos[["numero", *COLUMNAS_CONCEPTOS]].merge(insertadas[["numero", "id"]], on="numero")
+                    base = lineas["cantidad"].astype(float) * lineas["precio"].astype(float)
+                    conexion.executemany(
+                        "INSERT INTO conceptos_factura (factura, descripcion, cantidad, precio, iva_porcentaje, base, cuota) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        zip(
+                            lineas["id"].tolist(), lineas["descripcion"].astype(str).tolist(),
+                            lineas["cantidad"].astype(float).tolist(), lineas["precio"].astype(float).tolist(),
+                            lineas["iva_porcentaje"].astype(float).tolist(), base.tolist(),
+                            (base * lineas["iva_porcentaje"].astype(float) / 100).tolist(),
+                        ),
+                    )
+                conexion.execute(DESGLOSE_SUPUESTO, (ultimo_id,))
+                self._materializar_iva(conexion, ultimo_concepto)
+                self._materializar_facturas(conexion, insertadas)
+                self._incrementar_version(conexion)
+        return len(insertadas)
+
+    # Marca facturas como pagadas en `fecha_cobro` (las ya pagadas no cambian):
+    # pasan de los pendientes a los cobros y el cambio queda en el registro
+    def marcar_pagadas(self, ids, fecha_cobro):
+        fecha_cobro = _fecha_iso(fecha_cobro)
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                self._cargar_ids(conexion, ids)
+                pagadas = pd.read_sql_query(
+                    "SELECT id, cliente, fecha_emision, monto, fecha_cobro FROM facturas "
+                    "WHERE id IN (SELECT id FROM ids_consulta) AND fecha_cobro IS NULL",
+                    conexion,
+                )
+                if pagadas.empty:
+                    return 0
+                conexion.executemany(
+                    "UPDATE facturas SET estado = 'Pagada', fecha_cobro = ? WHERE id = ?",
+                    ((fecha_cobro, int(i)) for i in pagadas["id"]),
+                )
+                self._materializar_facturas(conexion, pagadas, signo=-1)
+                self._materializar_facturas(conexion, pagadas.assign(fecha_cobro=fecha_cobro))
+                self._registrar_cambios(conexion, "facturas", pagadas["id"], ("estado", "fecha_cobro"))
+                self._incrementar_version(conexion)
+        return len(pagadas)
+
+    # Preferencias (no cambian la versión del libro)
+    def preferencias(self):
+        filas = self._conexion().execute("SELECT clave, valor FROM preferencias").fetchall()
+        return {clave: json.loads(valor) for clave, valor in filas}
+
+    def guardar_preferencias(self, valores):
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                conexion.executemany(
+                    "INSERT INTO preferencias (clave, valor) VALUES (?, ?) "
+                    "ON CONFLICT(clave) DO UPDATE SET valor = excluded.valor",
+                    [(clave, json.dumps(valor)) for clave, valor in valores.items()],
+                )
+
+    # Importaciones: cuántas veces aparece cada huella en el libro (Series huella -> filas)
+    def contar_huellas(self, huellas):
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("CREATE TEMP TABLE IF NOT EXISTS huellas_consulta (huella INTEGER PRIMARY KEY)")
+            conexion.execute("DELETE FROM huellas_consulta")
+            conexion.executemany("INSERT OR IGNORE INTO huellas_consulta (huella) VALUES (?)", ((h,) for h in np.unique(huellas).tolist()))
+            filas = conexion.execute(
+                "SELECT t.huella, COUNT(*) FROM huellas_consulta h JOIN transacciones t ON t.huella = h.huella GROUP BY t.huella"
+            ).fetchall()
+        return pd.Series(dict(filas), dtype=np.int64)
+
+    def importacion(self, huella, cuenta, formato):
+        conexion = self._conexion()
+        cursor = conexion.execute(
+            "SELECT * FROM importaciones WHERE huella = ? AND cuenta = ? AND formato = ?", (huella, cuenta, formato)
+        )
+        fila = cursor.fetchone()
+        return dict(zip([c[0] for c in cursor.description], fila)) if fila else None
+
+    def registrar_importacion(self, huella, cuenta, nombre, formato, leidas, insertadas, duplicadas, rechazadas):
+        with self._bloqueo_escritura:
+            conexion = self._conexion()
+            with conexion:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO importaciones (huella, cuenta, nombre, formato, fecha, leidas, insertadas, duplicadas, rechazadas) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (huella, cuenta, nombre, formato, datetime.now().isoformat(timespec="seconds"), leidas, insertadas, duplicadas, rechazadas),
+                )
+
+    # Registro de cambios: última secuencia y, desde una secuencia dada, los ids
+    # modificados de una tabla y las columnas afectadas
+    def ultimo_cambio(self):
+        return self._conexion().execute("SELECT COALESCE(MAX(secuencia), 0) FROM cambios").fetchone()[0]
+
+    def cambios_desde(self, tabla, desde=0):
+        filas = self._conexion().execute(
+            "SELECT secuencia, fila, columnas FROM cambios WHERE secuencia > ? AND tabla = ? ORDER BY secuencia",
+            (int(desde), tabla),
+        ).fetchall()
+        if not filas:
+            return int(desde), np.empty(0, dtype=np.int64), set()
+        ultimo = int(filas[-1][0])
+        ids = np.unique(np.fromiter((f[1] for f in filas), dtype=np.int64, count=len(filas)))
+        columnas = {c for f in filas for c in f[2].split(",")}
+        return ultimo, ids, columnas
+
+    # Lista de ids en una tabla temporal de la conexión, para consultas por id
+    # sin límite de parámetros
+    def _cargar_ids(self, conexion, ids):
+        conexion.execute("CREATE TEMP TABLE IF NOT EXISTS ids_consulta (id INTEGER PRIMARY KEY)")
+        conexion.execute("DELETE FROM ids_consulta")
+        conexion.executemany("INSERT OR IGNORE INTO ids_consulta (id) VALUES (?)", ((i,) for i in np.asarray(ids, dtype=np.int64).tolist()))
+
+    # Filas completas por id (las mismas columnas que filas_desde)
+    def filas_por_id(self, tabla, ids):
+        if tabla not in TABLAS:
+            raise ValueError(f"Tabla desconocida: {tabla}")
+        columnas, columnas_fecha = TABLAS[tabla]
+        conexion = self._conexion()
+        with conexion:
+            self._cargar_ids(conexion, ids)
+            return self._consulta(
+                f"SELECT {', '.join(columnas)} FROM {tabla} WHERE id IN (SELECT id FROM ids_consulta) ORDER BY id",
+                columnas_fecha=columnas_fecha,
+            )
+
+    def ultimo_id(self, tabla):
+        if tabla not in TABLAS:
+            raise ValueError(f"Tabla desconocida: {tabla}")
+        return self._conexion().execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}").fetchone()[0]
+
+    # Ejemplos para el categorizador: filas categorizadas a mano (no por el
+    # propio categorizador) con id en (desde_id, hasta_id] o, si se indican, con esos ids
+    def ejemplos_categorizacion(self, desde_id=0, hasta_id=None, ids=None):
+        consulta = "SELECT id, descripcion, tipo, categoria FROM transacciones WHERE categoria_auto = 0 AND "
+        if ids is None:
+            hasta_id = self.ultimo_id("transacciones") if hasta_id is None else hasta_id
+            return self._consulta(consulta + "id > ? AND id <= ? ORDER BY id", (int(desde_id), int(hasta_id)))
+        conexion = self._conexion()
+        with conexion:
+            self._cargar_ids(conexion, ids)
+            return self._consulta(consulta + "id IN (SELECT id FROM ids_consulta) ORDER BY id")
+
+    # Últimas filas categorizadas automáticamente (para revisarlas)
+    @memoizar(ttl=300, version=version_libro)
+    def categorizadas_automaticamente(self, n=100):
+        return self._consulta(
+            f"SELECT {', '.join(COLUMNAS_TRANSACCIONES)} FROM transacciones WHERE categoria_auto = 1 ORDER BY id DESC LIMIT ?",
+            (int(n),),
+            columnas_fecha=("fecha",),
+        )
+
+    # Lectura de transacciones
+    def contar_transacciones(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM transacciones").fetchone()[0]
+
+    @memoizar(ttl=300, version=version_libro)
+    def ultimas_transacciones(self, n=20):
+        return self._consulta(
+            f"SELECT {', '.join(COLUMNAS_TRANSACCIONES)} FROM transacciones ORDER BY fecha DESC, id DESC LIMIT ?",
+            (int(n),),
+            columnas_fecha=("fecha",),
+        )
+
+    def _filtros_transacciones(self, tipos=None, categorias=None, cuentas=None, fecha_inicio=None, fecha_fin=None, texto=None):
+        condiciones = []
+        parametros = []
+        if fecha_inicio is not None:
+            condiciones.append("fecha >= ?")
+            parametros.append(_fecha_iso(fecha_inicio))
+        if fecha_fin is not None:
+            condiciones.append("fecha <= ?")
+            parametros.append(_fecha_iso(fecha_fin))
+        for columna, valores in (("tipo", tipos), ("categoria", categorias), ("cuenta", cuentas)):
+            if valores:
+                condiciones.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+                parametros.extend(valores)
+        if texto:
+            condiciones.append("descripcion LIKE ?")
+            parametros.append(f"%{texto}%")
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return where, parametros
+
+    @memoizar(ttl=300, version=version_libro)
+    def buscar_transacciones(self, tipos=None, categorias=None, cuentas=None, fecha_inicio=None, fecha_fin=None, texto=None):
+        where, parametros = self._filtros_transacciones(tipos, categorias, cuentas, fecha_inicio, fecha_fin, texto)
+        return self._consulta(
+            f"SELECT {', '.join(COLUMNAS_TRANSACCIONES)} FROM transacciones {where} ORDER BY fecha DESC, id DESC",
+            parametros,
+            columnas_fecha=("fecha",),
+        )
+
+    # Filas nuevas (id > desde_id) de una columna de texto, para los índices incrementales
+    def textos_desde(self, tabla, columna, desde_id=0):
+        if (tabla, columna) not in (("transacciones", "descripcion"), ("facturas", "cliente")):
+            raise ValueError(f"Columna de texto no indexable: {tabla}.{columna}")
+        filas = self._conexion().execute(
+            f"SELECT id, {columna} FROM {tabla} WHERE id > ? ORDER BY id", (int(desde_id),)
+        ).fetchall()
+        if not filas:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+        ids, textos = zip(*filas)
+        return np.fromiter(ids, dtype=np.int64, count=len(ids)), np.array(textos, dtype=object)
+
+    # Filas completas con id > desde_id, para las vistas en memoria incrementales
+    def filas_desde(self, tabla, desde_id=0):
+        if tabla not in TABLAS:
+            raise ValueError(f"Tabla desconocida: {tabla}")
+        columnas, columnas_fecha = TABLAS[tabla]
+        return self._consulta(
+            f"SELECT {', '.join(columnas)} FROM {tabla} WHERE id > ? ORDER BY id",
+            (int(desde_id),),
+            columnas_fecha=columnas_fecha,
+        )
+
+    # Lectura de agregados mensuales (coste proporcional al número de meses, no de filas)
+    @memoizar(ttl=300, version=version_libro)
+    def totales_mensuales(self, desde_mes=None, hasta_mes=None, por=()):
+        columnas = ", ".join(["mes", "tipo", *por])
+        condiciones = []
+        parametros = []
+        if desde_mes is not None:
+            condiciones.append("mes >= ?")
+            parametros.append(desde_mes)
+        if hasta_mes is not None:
+            condiciones.append("mes <= ?")
+            parametros.append(hasta_mes)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return self._consulta(
+            f"SELECT {columnas}, SUM(total) AS total, SUM(movimientos) AS movimientos "
+            f"FROM resumen_mensual {where} GROUP BY {columnas} ORDER BY mes",
+            parametros,
+        )
+
+    @memoizar(ttl=300, version=version_libro)
+    def saldo_acumulado(self, hasta_mes=None):
+        sql = "SELECT COALESCE(SUM(CASE WHEN tipo = 'Ingreso' THEN total ELSE -total END), 0) FROM resumen_mensual"
+        parametros = ()
+        if hasta_mes is not None:
+            sql += " WHERE mes <= ?"
+            parametros = (hasta_mes,)
+        return self._conexion().execute(sql, parametros).fetchone()[0]
+
+    # Saldo de cada cuenta de tesorería y de cada cliente al cierre del día
+    # `fecha`: el último saldo de cierre mensual anterior a su mes más los
+    # movimientos del mes hasta ese día (por índice, sin recorrer el histórico)
+    @memoizar(ttl=300, version=version_libro)
+    def saldos_a_fecha(self, fecha):
+        fecha = _fecha_iso(fecha)
+        mes, inicio_mes = fecha[:7], fecha[:7] + "-01"
+        return self._consulta(
+            "SELECT clase, cuenta, SUM(saldo) AS saldo FROM ("
+            "  SELECT s.clase, s.cuenta, s.saldo FROM saldos_cierre s "
+            "  JOIN (SELECT clase, cuenta, MAX(mes) AS mes FROM saldos_cierre WHERE mes < ?1 GROUP BY clase, cuenta) u "
+            "  USING (clase, cuenta, mes) "
+            "  UNION ALL "
+            "  SELECT 'tesoreria', cuenta, SUM(CASE WHEN tipo = 'Ingreso' THEN monto ELSE -monto END) FROM transacciones "
+            "  WHERE fecha BETWEEN ?2 AND ?3 GROUP BY cuenta "
+            "  UNION ALL "
+            "  SELECT 'clientes', cliente, SUM(monto) FROM facturas WHERE fecha_emision BETWEEN ?2 AND ?3 GROUP BY cliente "
+            "  UNION ALL "
+            "  SELECT 'clientes', cliente, -SUM(monto) FROM facturas WHERE fecha_cobro BETWEEN ?2 AND ?3 GROUP BY cliente"
+            ") GROUP BY clase, cuenta ORDER BY clase, cuenta",
+            (mes, inicio_mes, fecha),
+        )
+
+    @memoizar(ttl=300, version=version_libro)
+    def totales_diarios(self):
+        return self._consulta(
+            "SELECT fecha, tipo, categoria, total FROM resumen_diario ORDER BY fecha",
+            columnas_fecha=("fecha",),
+        )
+
+    # Lectura de facturas
+    def contar_facturas(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM facturas").fetchone()[0]
+
+    @memoizar(ttl=300, version=version_libro)
+    def facturas_pendientes(self, n=5):
+        return self._consulta(
+            f"SELECT {', '.join(COLUMNAS_FACTURAS)} FROM facturas WHERE estado = 'Pendiente' ORDER BY vencimiento, id LIMIT ?",
+            (int(n),),
+            columnas_fecha=("fecha_emision", "vencimiento"),
+        )
+
+    @memoizar(ttl=300, version=version_libro)
+    def buscar_facturas(self, estados=None, cliente=None, fecha_inicio=None, fecha_fin=None):
+        condiciones = []
+        parametros = []
+        if estados:
+            condiciones.append(f"estado IN ({', '.join('?' * len(estados))})")
+            parametros.extend(estados)
+        if fecha_inicio is not None:
+            condiciones.append("fecha_emision >= ?")
+            parametros.append(_fecha_iso(fecha_inicio))
+        if fecha_fin is not None:
+            condiciones.append("fecha_emision <= ?")
+            parametros.append(_fecha_iso(fecha_fin))
+        if cliente:
+            condiciones.append("cliente LIKE ?")
+            parametros.append(f"%{cliente}%")
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return self._consulta(
+            f"SELECT {', '.join(COLUMNAS_FACTURAS)} FROM facturas {where} ORDER BY fecha_emision DESC, id DESC",
+            parametros,
+            columnas_fecha=("fecha_emision", "vencimiento"),
+        )
+
+    # Importe facturado por mes de emisión y cliente
+    @memoizar(ttl=300, version=version_libro)
+    def facturacion_mensual(self, desde_mes=None, hasta_mes=None):
+        condiciones = []
+        parametros = []
+        if desde_mes is not None:
+            condiciones.append("fecha_emision >= ?")
+            parametros.append(f"{desde_mes}-01")
+        if hasta_mes is not None:
+            condiciones.append("fecha_emision < date(?, '+1 month')")
+            parametros.append(f"{hasta_mes}-01")
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return self._consulta(
+            f"SELECT substr(fecha_emision, 1, 7) AS mes, cliente, SUM(monto) AS total, COUNT(*) AS movimientos "
+            f"FROM facturas {where} GROUP BY mes, cliente ORDER BY mes",
+            parametros,
+        )
+
+    # Siguiente número de factura de la serie del año (F-AAAA-NNN)
+    def siguiente_numero_factura(self, ano):
+        prefijo = f"F-{ano}-"
+        ultimo = self._conexion().execute(
+            "SELECT MAX(CAST(substr(numero, ?) AS INTEGER)) FROM facturas WHERE numero LIKE ?",
+            (len(prefijo) + 1, prefijo + "%"),
+        ).fetchone()[0]
+        return f"{prefijo}{(ultimo or 0) + 1:03d}"
+
+    @memoizar(ttl=300, version=version_libro)
+    def conceptos_factura(self, factura):
+        return self._consulta(
+            f"SELECT {', '.join(COLUMNAS_CONCEPTOS)}, base, cuota FROM conceptos_factura WHERE factura = ? ORDER BY id",
+            (int(factura),),
+        )
+
+    # IVA repercutido por mes de emisión y tipo
+    @memoizar(ttl=300, version=version_libro)
+    def iva_repercutido(self, desde_mes=None, hasta_mes=None):
+        condiciones = []
+        parametros = []
+        if desde_mes is not None:
+            condiciones.append("mes >= ?")
+            parametros.append(desde_mes)
+        if hasta_mes is not None:
+            condiciones.append("mes <= ?")
+            parametros.append(hasta_mes)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return self._consulta(
+            f"SELECT mes, iva_porcentaje, base, cuota, conceptos FROM resumen_iva {where} ORDER BY mes, iva_porcentaje",
+            parametros,
+        )
+
+    # Lectura de los agregados de cobro
+    @memoizar(ttl=300, version=version_libro)
+    def cobros_mensuales(self, desde_mes=None, hasta_mes=None):
+        condiciones = []
+        parametros = []
+        if desde_mes is not None:
+            condiciones.append("mes >= ?")
+            parametros.append(desde_mes)
+        if hasta_mes is not None:
+            condiciones.append("mes <= ?")
+            parametros.append(hasta_mes)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        return self._consulta(
+            f"SELECT mes, cliente, cobrado, cobrado_dias, facturas FROM resumen_cobros {where} ORDER BY mes",
+            parametros,
+        )
+
+    @memoizar(ttl=300, version=version_libro)
+    def pendiente_por_emision(self):
+        return self._consulta(
+            "SELECT fecha_emision, cliente, pendiente, facturas FROM resumen_pendiente ORDER BY fecha_emision",
+            columnas_fecha=("fecha_emision",),
+        )
+
+    @memoizar(ttl=300, version=version_libro)
+    def resumen_facturas_por_estado(self):
+        return self._consulta(
+            "SELECT estado, COUNT(*) AS numero, COALESCE(SUM(monto), 0) AS total FROM facturas GROUP BY estado"
+        ).set_index("estado")
@@ -0,0 +1,123 @@
+# Balance de situación (modelo de PYMES del PGC) a cualquier fecha
+#
+# El almacén mantiene puntos de control: el saldo de cierre de cada mes por
+# cuenta de tesorería y por cliente (facturas emitidas y no cobradas), en la
+# misma transacción que cada alta o cobro (ver _acumular_saldos). El saldo a
+# una fecha es el último cierre anterior a su mes más los movimientos del mes
+# hasta ese día, así que el coste no crece con los años de histórico.
+#
+# El libro sólo registra tesorería y facturas de clientes: las cuentas con
+# saldo positivo son efectivo y las que están en descubierto, deudas a corto
+# plazo; el saldo de clientes son los deudores comerciales (o anticipos si es
+# negativo). El patrimonio neto es la diferencia entre activo y pasivo, y se
+# separa en el resultado del ejercicio (del libro, desde el 1 de enero hasta la
+# fecha) y el resto de fondos propios.
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.agregados import resumen_rango
+from finanzas.almacen import version_libro
+from finanzas.cache import memoizar
+
+LINEAS_SUBTOTAL = ("A)", "B)", "C)", "TOTAL")
+
+
+def _cociente(numerador, denominador, escala=1.0):
+    return numerador / denominador * escala if denominador else float("nan")
+
+
+# Balance a la fecha: líneas de activo y de patrimonio neto y pasivo (concepto,
+# valor), saldos por cuenta de tesorería, composición y ratios
+@memoizar(ttl=300, version=version_libro)
+def balance_situacion(almacen, fecha):
+    fecha = pd.Timestamp(fecha).normalize()
+    saldos = almacen.saldos_a_fecha(fecha)
+    tesoreria = saldos[saldos["clase"] == "tesoreria"]
+    clientes = saldos.loc[saldos["clase"] == "clientes", "saldo"].to_numpy()
+
+    efectivo = float(np.clip(tesoreria["saldo"].to_numpy(), 0, None).sum())
+    descubiertos = float(np.clip(-tesoreria["saldo"].to_numpy(), 0, None).sum())
+    deudores = float(np.clip(clientes, 0, None).sum())
+    anticipos = float(np.clip(-clientes, 0, None).sum())
+
+    activo_no_corriente = 0.0
+    activo_corriente = deudores + efectivo
+    total_activo = activo_no_corriente + activo_corriente
+    pasivo_no_corriente = 0.0
+    pasivo_corriente = descubiertos + anticipos
+    patrimonio = total_activo - pasivo_no_corriente - pasivo_corriente
+    resultado = float(resumen_rango(almacen, fecha.to_period("Y").start_time, fecha)["beneficio"])
+
+    activo = pd.DataFrame([
+        ("A) ACTIVO NO CORRIENTE", activo_no_corriente),
+        ("B) ACTIVO CORRIENTE", activo_corriente),
+        ("III. Deudores comerciales y otras cuentas a cobrar", deudores),
+        ("VII. Efectivo y otros activos líquidos equivalentes", efectivo),
+        ("TOTAL ACTIVO (A+B)", total_activo),
+    ], columns=["concepto", "valor"])
+    pasivo = pd.DataFrame([
+        ("A) PATRIMONIO NETO", patrimonio),
+        ("I. Fondos propios y resultados anteriores", patrimonio - resultado),
+        ("VII. Resultado del ejercicio", resultado),
+        ("B) PASIVO NO CORRIENTE", pasivo_no_corriente),
+        ("C) PASIVO CORRIENTE", pasivo_corriente),
+        ("III. Deudas a corto plazo", descubiertos),
+        ("V. Acreedores comerciales y otras cuentas a pagar", anticipos),
+        ("TOTAL PATRIMONIO NETO Y PASIVO (A+B+C)", patrimonio + pasivo_no_corriente + pasivo_corriente),
+    ], columns=["concepto", "valor"])
+
+    return {
+        "fecha": fecha,
+        "activo": activo,
+        "pasivo": pasivo,
+        "cuentas": tesoreria[["cuenta", "saldo"]].reset_index(drop=True),
+        "composicion_activo": {"Activo No Corriente": activo_no_corriente, "Activo Corriente": activo_corriente},
+        "composicion_pasivo": {"Patrimonio Neto": patrimonio, "Pasivo No Corriente": pasivo_no_corriente, "Pasivo Corriente": pasivo_corriente},
+        "liquidez": _cociente(activo_corriente, pasivo_corriente),
+        "endeudamiento": _cociente(pasivo_no_corriente + pasivo_corriente, total_activo, 100),
+        "roe": _cociente(resultado, patrimonio, 100),
+        "roa": _cociente(resultado, total_activo, 100),
+    }
+
+
+# Uso: python -m finanzas.balance --transacciones 1000000 --anos 10
+if __name__ == "__main__":
+    from finanzas.almacen import AlmacenLibro
+    from finanzas.generadores import generar_facturas, generar_transacciones
+
+    parser = argparse.ArgumentParser(description="Mide el balance a fechas arbitrarias sobre un histórico largo")
+    parser.add_argument("--transacciones", type=int, default=1_000_000)
+    parser.add_argument("--facturas", type=int, default=100_000)
+    parser.add_argument("--anos", type=int, default=10)
+    parser.add_argument("--fechas", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenLibro(os.path.join(directorio, "balance.db"))
+        comienzo = time.perf_counter()
+        almacen.insertar_transacciones(generar_transacciones(args.transacciones, dias=args.anos * 365, semilla=19))
+        facturas = generar_facturas(args.facturas, dias=args.anos * 365, semilla=19)
+        facturas["numero"] = "F-" + pd.Series(np.arange(args.facturas)).astype(str).str.zfill(7)
+        almacen.insertar_facturas(facturas)
+        print(f"alta de {args.transacciones} transacciones y {args.facturas} facturas en {args.anos} años: "
+              f"{time.perf_counter() - comienzo:.1f} s")
+
+        generador = np.random.default_rng(19)
+        hoy = pd.Timestamp.now().normalize()
+        fechas = [hoy - pd.Timedelta(days=int(d)) for d in generador.integers(0, args.anos * 365, args.fechas)]
+
+        comienzo = time.perf_counter()
+        for fecha in fechas:
+            almacen.saldos_a_fecha.__wrapped__(almacen, fecha)
+        puntos = (time.perf_counter() - comienzo) / len(fechas)
+        print(f"saldos a fecha: {puntos * 1000:.2f} ms por fecha con puntos de control")
+
+        comienzo = time.perf_counter()
+        balance = balance_situacion.__wrapped__(almacen, hoy)
+        print(f"balance de situación: {(time.perf_counter() - comienzo) * 1000:.1f} ms")
+        print(pd.concat([balance["activo"], balance["pasivo"]]).round(2).to_string(index=False))
@@ -0,0 +1,254 @@
+# Índice de texto por trigramas para las búsquedas por descripción y cliente
+#
+# El índice trabaja sobre textos distintos normalizados (minúsculas y sin
+# acentos): cada fila sólo guarda el código de su texto. Cada carácter recibe un
+# identificador denso de 10 bits, así un trigrama cabe en 30 bits y el par
+# (trigrama, código de texto) en un único int64: las listas de apariciones son
+# un array ordenado y las consultas son búsquedas binarias y máscaras numpy.
+# Las altas se acumulan en un tramo delta pequeño que se fusiona con el índice
+# principal al superar un umbral.
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from finanzas.almacen import version_libro
+from finanzas.cache import memoizar
+from finanzas.vistas import vista_facturas, vista_transacciones
+
+# Marcas de inicio y fin de texto: permiten búsquedas por prefijo y que los
+# caracteres finales también inicien un trigrama
+_INICIO = "\x02"
+_FIN = "\x03\x03"
+_DIACRITICOS = re.compile("[\u0300-\u036f]")
+_BITS_CARACTER = 10
+_BITS_TEXTO = 32
+# Cubeta compartida para los caracteres que no quepan en el alfabeto denso
+_OTROS = (1 << _BITS_CARACTER) - 1
+_TAMANO_BLOQUE = 65536
+UMBRAL_FUSION = 20000
+
+_INDICES = {}
+_BLOQUEO_INDICES = threading.Lock()
+
+
+def normalizar(texto):
+    return _DIACRITICOS.sub("", unicodedata.normalize("NFKD", str(texto).lower()))
+
+
+# Normaliza muchos textos de una vez trabajando sobre una única cadena
+def normalizar_lote(textos):
+    textos = [str(t) for t in textos]
+    unido = "\n".join(textos)
+    if unido.count("\n") != max(len(textos) - 1, 0):
+        unido = "\n".join(t.replace("\n", " ") for t in textos)
+    unido = unido.lower()
+    if not unido.isascii():
+        unido = _DIACRITICOS.sub("", unicodedata.normalize("NFKD", unido))
+    return unido.split("\n") if textos else []
+
+
+def _codificar(a, b, c):
+    return (a.astype(np.int64) << (2 * _BITS_CARACTER)) | (b.astype(np.int64) << _BITS_CARACTER) | c.astype(np.int64)
+
+
+def _puntos(texto):
+    return np.frombuffer(texto.encode("utf-32-le"), dtype=np.uint32)
+
+
+class IndiceTexto:
+    def __init__(self):
+        self._codigos = {}                                   # texto normalizado -> código
+        self._rellenos = np.empty(0, dtype=str)              # texto con marcas por código (tramo principal)
+        self._rellenos_delta = []
+        self._claves = np.empty(0, dtype=np.int64)           # (trigrama << 32) | código, ordenado
+        self._delta = {}                                     # trigrama -> [códigos] pendientes de fusionar
+        self._alfabeto = np.zeros(0x110000, dtype=np.int16)  # punto de código -> carácter denso (0 = no visto)
+        self._numero_caracteres = 0
+        self._desbordado = False
+        self._ids = np.empty(0, dtype=np.int64)
+        self._codigo_fila = np.empty(0, dtype=np.int32)
+        self.ultimo_id = 0
+        self.ultimo_cambio = 0
+        self.bloqueo = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def numero_textos(self):
+        return len(self._codigos)
+
+    def _densos(self, puntos):
+        vistos = np.unique(puntos)
+        nuevos = vistos[self._alfabeto[vistos] == 0]
+        if len(nuevos):
+            densos = np.arange(self._numero_caracteres + 1, self._numero_caracteres + 1 + len(nuevos))
+            self._desbordado |= bool(densos[-1] >= _OTROS)
+            self._alfabeto[nuevos] = np.minimum(densos, _OTROS)
+            self._numero_caracteres += len(nuevos)
+        return self._alfabeto[puntos]
+
+    def _trigramas(self, relleno):
+        densos = self._densos(_puntos(relleno))
+        return np.unique(_codificar(densos[:-2], densos[1:-1], densos[2:]))
+
+    # Claves (trigrama, código) de un lote de textos con marcas, por bloques de
+    # longitud parecida para acotar la memoria de la matriz de caracteres
+    def _claves_lote(self, rellenos, primer_codigo):
+        longitudes = np.char.str_len(rellenos)
+        orden = np.argsort(longitudes)
+        claves = []
+        for inicio in range(0, len(orden), _TAMANO_BLOQUE):
+            seleccion = orden[inicio:inicio + _TAMANO_BLOQUE]
+            ancho = int(longitudes[seleccion].max())
+            bloque = rellenos[seleccion].astype(f"<U{ancho}")
+            densos = self._densos(bloque.view(np.uint32).reshape(len(bloque), ancho))
+            trigramas = _codificar(densos[:, :-2], densos[:, 1:-1], densos[:, 2:])
+            validos = np.arange(ancho - 2)[None, :] < (longitudes[seleccion] - 2)[:, None]
+            codigos = (seleccion + primer_codigo).astype(np.int64)[:, None]
+            claves.append(((trigramas << _BITS_TEXTO) | codigos)[validos])
+        return np.concatenate(claves)
+
+    def _fusionar(self):
+        nuevos = np.array(self._rellenos_delta, dtype=str)
+        claves = np.concatenate([self._claves, self._claves_lote(nuevos, len(self._rellenos))])
+        claves.sort()
+        self._claves = claves
+        self._rellenos = np.concatenate([self._rellenos, nuevos])
+        self._rellenos_delta = []
+        self._delta = {}
+
+    def agregar(self, ids, textos):
+        if not len(ids):
+            return
+        codigos_crudos, unicos = pd.factorize(pd.Series(textos, dtype=object))
+        codigos_normalizados, distintos = pd.factorize(pd.Series(normalizar_lote(unicos), dtype=object))
+        codigos = np.array([self._codigos.get(t, -1) for t in distintos], dtype=np.int32)
+
+        nuevos = np.flatnonzero(codigos < 0)
+        if len(nuevos):
+            codigos[nuevos] = np.arange(self.numero_textos, self.numero_textos + len(nuevos))
+            self._codigos.update(zip(distintos[nuevos], codigos[nuevos].tolist()))
+            rellenos = [_INICIO + t + _FIN for t in distintos[nuevos]]
+            self._rellenos_delta.extend(rellenos)
+            if len(self._rellenos_delta) > UMBRAL_FUSION:
+                self._fusionar()
+            else:
+                for codigo, relleno in zip(codigos[nuevos].tolist(), rellenos):
+                    for trigrama in self._trigramas(relleno).tolist():
+                        self._delta.setdefault(trigrama, []).append(codigo)
+
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        self._codigo_fila = np.concatenate([self._codigo_fila, codigos[codigos_normalizados][codigos_crudos]])
+        self.ultimo_id = max(self.ultimo_id, int(self._ids.max()))
+
+    def _apariciones(self, desde, hasta):
+        # Códigos de texto con algún trigrama en [desde, hasta]
+        inicio = np.searchsorted(self._claves, desde << _BITS_TEXTO, side="left")
+        fin = np.searchsorted(self._claves, (hasta + 1) << _BITS_TEXTO, side="left")
+        principales = (self._claves[inicio:fin] & ((1 << _BITS_TEXTO) - 1)).astype(np.int32)
+        if not self._delta:
+            return principales
+        if desde == hasta:
+            pendientes = self._delta.get(desde, [])
+        else:
+            pendientes = [c for t, codigos in self._delta.items() if desde <= t <= hasta for c in codigos]
+        return np.concatenate([principales, np.asarray(pendientes, dtype=np.int32)])
+
+    def _marcas(self, codigos):
+        marcas = np.zeros(self.numero_textos, dtype=bool)
+        marcas[codigos] = True
+        return marcas
+
+    def _textos_coincidentes(self, consulta):
+        densos = self._alfabeto[_puntos(consulta)].astype(np.int64)
+        if not densos.all():
+            # Algún carácter no aparece en ningún texto
+            return np.zeros(self.numero_textos, dtype=bool)
+
+        if len(densos) < 3:
+            # Consultas cortas: rango contiguo de trigramas que empiezan por la consulta
+            base = 0
+            for denso in densos.tolist():
+                base = (base << _BITS_CARACTER) | denso
+            libres = _BITS_CARACTER * (3 - len(densos))
+            desde = base << libres
+            marcas = self._marcas(self._apariciones(desde, desde | ((1 << libres) - 1)))
+            verificar = self._desbordado
+        else:
+            trigramas = np.unique(_codificar(densos[:-2], densos[1:-1], densos[2:])).tolist()
+            listas = sorted((self._apariciones(t, t) for t in trigramas), key=len)
+            marcas = self._marcas(listas[0])
+            for lista in listas[1:]:
+                marcas &= self._marcas(lista)
+            # Los trigramas no garantizan contigüidad
+            verificar = len(trigramas) > 1 or self._desbordado
+
+        if verificar:
+            candidatos = np.flatnonzero(marcas)
+            principales = candidatos[candidatos < len(self._rellenos)]
+            marcas[principales[np.char.find(self._rellenos[principales], consulta) < 0]] = False
+            for codigo in candidatos[candidatos >= len(self._rellenos)].tolist():
+                if consulta not in self._rellenos_delta[codigo - len(self._rellenos)]:
+                    marcas[codigo] = False
+        return marcas
+
+    # Ids de las filas cuyo texto contiene la consulta (sin distinguir mayúsculas
+    # ni acentos). Con prefijo=True sólo cuentan los textos que empiezan por ella.
+    def buscar(self, consulta, prefijo=False):
+        consulta = normalizar(consulta).strip()
+        with self.bloqueo:
+            if not consulta:
+                return self._ids.copy()
+            if prefijo:
+                consulta = _INICIO + consulta
+            marcas = self._textos_coincidentes(consulta)
+            return self._ids[marcas[self._codigo_fila]]
+
+
+def _indice(almacen, tabla, columna):
+    clave = (almacen.ruta, tabla, columna)
+    with _BLOQUEO_INDICES:
+        indice = _INDICES.get(clave)
+        if indice is None:
+            indice = _INDICES[clave] = IndiceTexto()
+            indice.ultimo_cambio = almacen.ultimo_cambio()
+        else:
+            # Si alguna fila ha cambiado el texto indexado, el índice se rehace
+            ultimo_cambio, _, columnas = almacen.cambios_desde(tabla, indice.ultimo_cambio)
+            if columna in columnas:
+                indice = _INDICES[clave] = IndiceTexto()
+            indice.ultimo_cambio = ultimo_cambio
+    # Sincronización incremental: sólo las filas nuevas desde la última consulta
+    with indice.bloqueo:
+        ids, textos = almacen.textos_desde(tabla, columna, indice.ultimo_id)
+        indice.agregar(ids, textos)
+    return indice
+
+
+def indice_descripciones(almacen):
+    return _indice(almacen, "transacciones", "descripcion")
+
+
+def indice_clientes(almacen):
+    return _indice(almacen, "facturas", "cliente")
+
+
+# Búsquedas sobre las vistas ordenadas por fecha: el rango de fechas es un corte
+# binario, los filtros categóricos una máscara sobre ese corte y el texto se
+# resuelve con el índice de trigramas en lugar de LIKE '%...%'
+@memoizar(ttl=300, version=version_libro)
+def filtrar_transacciones(almacen, tipos=None, categorias=None, cuentas=None, fecha_inicio=None, fecha_fin=None, texto=""):
+    ids = indice_descripciones(almacen).buscar(texto) if normalizar(texto).strip() else None
+    return vista_transacciones(almacen).seleccionar(
+        fecha_inicio, fecha_fin, ids, tipo=tipos, categoria=categorias, cuenta=cuentas
+    )
+
+
+@memoizar(ttl=300, version=version_libro)
+def filtrar_facturas(almacen, estados=None, cliente="", fecha_inicio=None, fecha_fin=None):
+    ids = indice_clientes(almacen).buscar(cliente) if normalizar(cliente).strip() else None
+    return vista_facturas(almacen).seleccionar(fecha_inicio, fecha_fin, ids, estado=estados)
@@ -0,0 +1,217 @@
+# Caché compartida en memoria con expulsión por tamaño y caducidad
+#
+# Vive a nivel de módulo, así que la comparten todas las sesiones del servidor.
+# Los valores devueltos se consideran de sólo lectura: quien necesite modificar
+# un DataFrame debe trabajar sobre una copia (p. ej. con .assign()).
+#
+# Además del límite de cada caché hay un presupuesto para todas juntas
+# (FINANZAS_CACHE_MB, 1 GB por defecto): al superarlo se expulsa la entrada
+# usada hace más tiempo de cualquier caché.
+import functools
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from finanzas.medicion import seccion
+
+MAX_MB_TOTAL = float(os.environ.get("FINANZAS_CACHE_MB", 1024))
+# Valores que se miden de cada columna de objetos (textos) para estimar su tamaño
+MUESTRA_OBJETOS = 1000
+
+_REGISTRO = {}
+_BLOQUEO_REGISTRO = threading.Lock()
+
+
+def _tamano_objetos(valores):
+    # Tamaño de los objetos de una columna (los punteros ya los cuenta memory_usage),
+    # estimado a partir de una muestra equiespaciada
+    n = len(valores)
+    if not n:
+        return 0
+    muestra = valores[::max(1, n // MUESTRA_OBJETOS)]
+    return int(sum(map(sys.getsizeof, muestra)) / len(muestra) * n)
+
+
+def _tamano_columnas(columnas):
+    return sum(_tamano_objetos(c.to_numpy()) for c in columnas if c.dtype == object)
+
+
+def _tamano(valor):
+    # Estimación barata del tamaño en bytes: los textos se estiman por muestreo
+    if isinstance(valor, pd.DataFrame):
+        columnas = [valor.iloc[:, i] for i, tipo in enumerate(valor.dtypes) if tipo == object] + [valor.index]
+        return int(valor.memory_usage(index=True, deep=False).sum()) + _tamano_columnas(columnas)
+    if isinstance(valor, pd.Series):
+        return int(valor.memory_usage(index=True, deep=False)) + _tamano_columnas([valor, valor.index])
+    if isinstance(valor, np.ndarray) or hasattr(valor, "nbytes"):
+        return int(valor.nbytes)
+    if isinstance(valor, (list, tuple)):
+        return sum(_tamano(v) for v in valor) + 8 * len(valor)
+    if isinstance(valor, (bytes, str)):
+        return len(valor)
+    return 64
+
+
+def _congelar(valor):
+    # Convierte argumentos mutables (listas de filtros, dicts) en claves hashables
+    if isinstance(valor, (list, tuple)):
+        return tuple(_congelar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_congelar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _congelar(v)) for k, v in valor.items()))
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+class CacheCompartido:
+    def __init__(self, nombre, max_entradas=128, max_mb=256, ttl=600):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # clave -> (caduca, tamaño, valor, último uso)
+        self._bytes = 0
+        self._bloqueo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def _retirar(self, clave):
+        self._bytes -= self._entradas.pop(clave)[1]
+
+    def obtener(self, clave, calcular):
+        ahora = time.monotonic()
+        with self._bloqueo:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if entrada[0] is None or entrada[0] > ahora:
+                    self._entradas.move_to_end(clave)
+                    self._entradas[clave] = entrada[:3] + (ahora,)
+                    self.aciertos += 1
+                    return entrada[2]
+                self._retirar(clave)
+                self.expulsiones += 1
+            self.fallos += 1
+
+        # El cálculo se hace fuera del bloqueo para no serializar las sesiones
+        with seccion(f"Cálculo {self.nombre.rsplit('.', 1)[-1]}"):
+            valor = calcular()
+        tamano = _tamano(valor)
+
+        with self._bloqueo:
+            if clave in self._entradas:
+                self._retirar(clave)
+            caduca = ahora + self.ttl if self.ttl else None
+            self._entradas[clave] = (caduca, tamano, valor, ahora)
+            self._bytes += tamano
+            # Expulsión LRU mientras se superen los límites (siempre queda la entrada nueva)
+            while len(self._entradas) > 1 and (
+                len(self._entradas) > self.max_entradas
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._retirar(next(iter(self._entradas)))
+                self.expulsiones += 1
+        _ajustar_presupuesto(self, clave)
+        return valor
+
+    # Último uso de la entrada más antigua (None si no hay ninguna que se pueda expulsar)
+    def _uso_mas_antiguo(self, proteger=None):
+        with self._bloqueo:
+            for clave, entrada in self._entradas.items():
+                return None if clave is proteger else entrada[3]
+        return None
+
+    def _expulsar_mas_antigua(self, proteger=None):
+        with self._bloqueo:
+            clave = next(iter(self._entradas), None)
+            if clave is None or clave is proteger:
+                return 0
+            tamano = self._entradas[clave][1]
+            self._retirar(clave)
+            self.expulsiones += 1
+            return tamano
+
+    def limpiar(self):
+        with self._bloqueo:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._bloqueo:
+            consultas = self.aciertos + self.fallos
+            return {
+                "cache": self.nombre,
+                "entradas": len(self._entradas),
+                "mb": self._bytes / (1024 * 1024),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsiones": self.expulsiones,
+                "ratio_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
+
+
+# Expulsa entradas de todas las cachés, de la usada hace más tiempo a la más
+# reciente, mientras el total supere MAX_MB_TOTAL (la entrada recién guardada se queda)
+def _ajustar_presupuesto(cache, clave):
+    if not MAX_MB_TOTAL:
+        return
+    with _BLOQUEO_REGISTRO:
+        caches = list(_REGISTRO.values())
+    maximo = MAX_MB_TOTAL * 1024 * 1024
+    while sum(c._bytes for c in caches) > maximo:
+        usos = [(c._uso_mas_antiguo(clave if c is cache else None), i) for i, c in enumerate(caches)]
+        usos = [(uso, i) for uso, i in usos if uso is not None]
+        if not usos:
+            return
+        victima = caches[min(usos)[1]]
+        victima._expulsar_mas_antigua(clave if victima is cache else None)
+
+
+def obtener_cache(nombre, max_entradas=128, max_mb=256, ttl=600):
+    with _BLOQUEO_REGISTRO:
+        if nombre not in _REGISTRO:
+            _REGISTRO[nombre] = CacheCompartido(nombre, max_entradas, max_mb, ttl)
+        return _REGISTRO[nombre]
+
+
+# Decorador de memoización. `version` recibe los mismos argumentos que la función
+# y devuelve la versión de los datos de origen (p. ej. la versión del libro), que
+# pasa a formar parte de la clave: una escritura invalida las entradas anteriores.
+def memoizar(nombre=None, max_entradas=128, max_mb=256, ttl=600, version=None):
+    def decorador(funcion):
+        cache = obtener_cache(nombre or f"{funcion.__module__}.{funcion.__qualname__}", max_entradas, max_mb, ttl)
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            clave = (_congelar(args), _congelar(kwargs))
+            if version is not None:
+                clave += (version(*args, **kwargs),)
+            return cache.obtener(clave, lambda: funcion(*args, **kwargs))
+
+        envoltura.cache = cache
+        return envoltura
+
+    return decorador
+
+
+def estadisticas_caches():
+    with _BLOQUEO_REGISTRO:
+        caches = list(_REGISTRO.values())
+    return pd.DataFrame([cache.estadisticas() for cache in caches])
+
+
+def limpiar_caches():
+    with _BLOQUEO_REGISTRO:
+        caches = list(_REGISTRO.values())
+    for cache in caches:
+        cache.limpiar()
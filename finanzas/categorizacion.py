@@ -0,0 +1,333 @@
+# Categorización automática de movimientos por su descripción
+#
+# Tres etapas, vectorizadas sobre el lote completo:
+#  1. Correcciones: una descripción corregida a mano (sin dígitos) conserva la
+#     categoría que le dio el usuario.
+#  2. Reglas: una única expresión regular con un grupo por regla recorre todas
+#     las descripciones normalizadas unidas en un texto; decide la primera
+#     coincidencia de cada fila cuya categoría es del mismo tipo (ingreso o
+#     gasto) que la fila.
+#  3. Modelo: regresión logística multinomial sobre n-gramas de caracteres (3 y
+#     4) con hashing, entrenada con el historial categorizado a mano. Aprende de
+#     forma incremental (SGD) de las filas nuevas y de las correcciones, que
+#     llegan por el registro de cambios del almacén. Por debajo del umbral de
+#     confianza se deja la categoría por defecto ("Otros").
+# Las descripciones que sólo difieren en los dígitos (recibos, referencias) se
+# puntúan una sola vez.
+import argparse
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.busqueda import normalizar_lote
+
+CATEGORIAS = {
+    "Ingreso": ["Ventas", "Prestación de servicios", "Subvenciones", "Intereses", "Otros ingresos"],
+    "Gasto": ["Suministros", "Alquiler", "Salarios", "Marketing", "Software", "Equipamiento", "Seguros", "Impuestos", "Otros"],
+}
+CATEGORIA_POR_DEFECTO = {"Ingreso": "Otros ingresos", "Gasto": "Otros"}
+CLASES = [categoria for categorias in CATEGORIAS.values() for categoria in categorias]
+_TIPO_CLASE = np.array([tipo for tipo, categorias in CATEGORIAS.items() for _ in categorias], dtype=object)
+_TIPOS = np.array(list(CATEGORIAS), dtype=object)
+_MASCARAS = np.stack([_TIPO_CLASE == tipo for tipo in _TIPOS])          # tipo × clase
+
+# (categoría, patrón sobre el texto en minúsculas, sin acentos y con cada número
+# sustituido por "0"), por prioridad: ante dos reglas que coinciden en la misma
+# posición gana la primera
+REGLAS = (
+    ("Salarios", r"nominas?|salarios?|seguros? sociales|seguridad social|tgss"),
+    ("Impuestos", r"aeat|hacienda|agencia tributaria|impuestos?|modelo \d+|iva|irpf|ibi|tasas? municipal\w*"),
+    ("Alquiler", r"alquiler\w*|arrendamiento\w*|renta local"),
+    ("Suministros", r"luz|electricidad|endesa|iberdrola|naturgy|agua|telefon\w*|movistar|vodafone|orange|fibra|internet"),
+    ("Seguros", r"seguros?|poliza|mapfre|axa|allianz|mutua\w*|generali"),
+    ("Marketing", r"publicidad|marketing|google ads|facebook|meta ads|linkedin|anuncios?"),
+    ("Software", r"software|licencias?|suscripcion\w*|microsoft|adobe|aws|github|slack|dropbox|saas"),
+    ("Equipamiento", r"ordenador\w*|portatil\w*|equipamiento|mobiliario|impresora\w*|pccomponentes|mediamarkt"),
+    ("Subvenciones", r"subvencion\w*|ayudas? publica\w*|enisa|feder"),
+    ("Intereses", r"intereses?|remuneracion cuenta|rendimientos?"),
+    ("Prestación de servicios", r"honorarios|servicios profesionales|consultoria|asesoria"),
+    ("Ventas", r"ventas?|tpv|datafono|cobro factura|transferencia cliente"),
+)
+_PATRON_REGLAS = re.compile(r"\b(?:" + "|".join(f"(?P<r{i}>{patron})" for i, (_, patron) in enumerate(REGLAS)) + r")\b")
+_CLASE_REGLA = {f"r{i}": CLASES.index(categoria) for i, (categoria, _) in enumerate(REGLAS)}
+
+BITS_HASH = 18
+NGRAMAS = (3, 4)
+UMBRAL_CONFIANZA = 0.5
+MAX_HISTORIAL = 200_000
+_TAMANO_BLOQUE = 20_000
+_PRIMO = np.uint64(0x100000001B3)
+_DIGITOS = re.compile(r"\d+")
+
+_CATEGORIZADORES = {}
+_BLOQUEO_CATEGORIZADORES = threading.Lock()
+
+
+# Texto para el modelo y las correcciones: normalizado y sin dígitos
+def _sin_digitos(normalizados):
+    return _DIGITOS.sub("0", "\n".join(normalizados)).split("\n") if normalizados else []
+
+
+# Clases admitidas por fila según su tipo (filas × clases)
+def _mascara(tipos):
+    return _MASCARAS[pd.Index(_TIPOS).get_indexer(np.asarray(tipos, dtype=object))]
+
+
+# N-gramas de caracteres con hashing de todos los textos a la vez: devuelve la
+# fila, la cubeta y el peso de cada característica (1/sqrt(n) por fila)
+def _caracteristicas(textos):
+    unido = "\n".join(" " + t + " " for t in textos)
+    puntos = np.frombuffer(unido.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    salto = puntos == 10
+    fila_posicion = np.cumsum(salto)
+    saltos_acumulados = np.concatenate([[0], fila_posicion])
+    filas, cubetas = [], []
+    for n in NGRAMAS:
+        posiciones = np.arange(max(len(puntos) - n + 1, 0))
+        validas = posiciones[saltos_acumulados[posiciones + n] == saltos_acumulados[posiciones]]
+        codigo = np.full(len(validas), np.uint64(n) * _PRIMO, dtype=np.uint64)
+        for k in range(n):
+            codigo = (codigo ^ puntos[validas + k]) * _PRIMO
+        filas.append(fila_posicion[validas])
+        cubetas.append((codigo >> np.uint64(64 - BITS_HASH)).astype(np.int64))
+    # Ordenadas por fila (dos tramos ya ordenados: la ordenación estable los fusiona)
+    filas = np.concatenate(filas)
+    orden = np.argsort(filas, kind="stable")
+    filas = filas[orden]
+    cubetas = np.concatenate(cubetas)[orden]
+    por_fila = np.bincount(filas, minlength=len(textos))
+    valores = (1 / np.sqrt(np.maximum(por_fila, 1)))[filas].astype(np.float32)
+    return filas, cubetas, valores
+
+
+class Categorizador:
+    def __init__(self):
+        self.pesos = np.zeros((1 << BITS_HASH, len(CLASES)), dtype=np.float32)
+        self.sesgo = np.zeros(len(CLASES), dtype=np.float32)
+        self.correcciones = {}                                # tipo -> {texto sin dígitos: clase}
+        self.ejemplos = 0
+        self.ultimo_id = 0
+        self.ultimo_cambio = 0
+        self.bloqueo = threading.Lock()
+
+    # Puntuación lineal de n textos; las características vienen ordenadas por fila
+    def _puntuaciones(self, filas, cubetas, valores, n):
+        puntuaciones = np.zeros((n, len(CLASES)), dtype=np.float32)
+        if len(filas):
+            con_datos, inicios = np.unique(filas, return_index=True)
+            puntuaciones[con_datos] = np.add.reduceat(self.pesos[cubetas] * valores[:, None], inicios, axis=0)
+        return puntuaciones + self.sesgo
+
+    @staticmethod
+    def _probabilidades(puntuaciones, mascara):
+        puntuaciones = np.where(mascara, puntuaciones, -np.inf)
+        exponencial = np.exp(puntuaciones - puntuaciones.max(axis=1, keepdims=True))
+        return exponencial / exponencial.sum(axis=1, keepdims=True)
+
+    # SGD por minilotes sobre ejemplos únicos (texto, tipo, categoría) ponderados
+    # por sus repeticiones. Con pocos ejemplos únicos, `pasos_minimos` asegura
+    # suficientes actualizaciones (p. ej. en el entrenamiento inicial).
+    def aprender(self, descripciones, tipos, categorias, epocas=1, pasos_minimos=0, tasa=2.0, lote=512, semilla=0):
+        ejemplos = pd.DataFrame({
+            "texto": _sin_digitos(normalizar_lote(descripciones)),
+            "tipo": np.asarray(tipos, dtype=object),
+            "clase": pd.Series(np.asarray(categorias, dtype=object)).map({c: i for i, c in enumerate(CLASES)}).to_numpy(),
+        }).dropna()
+        ejemplos = ejemplos[ejemplos["tipo"].isin(list(CATEGORIAS))]
+        ejemplos = ejemplos[_TIPO_CLASE[ejemplos["clase"].astype(int)] == ejemplos["tipo"].to_numpy()]
+        if ejemplos.empty:
+            return 0
+        unicos = ejemplos.groupby(["texto", "tipo", "clase"], sort=False).size().reset_index(name="peso")
+        clases = unicos["clase"].to_numpy(dtype=np.int64)
+        mascara = _mascara(unicos["tipo"])
+        pesos_ejemplo = unicos["peso"].to_numpy(dtype=np.float32)
+        filas, cubetas, valores = _caracteristicas(unicos["texto"].tolist())
+        inicio_fila = np.searchsorted(filas, np.arange(len(unicos) + 1))
+
+        rng = np.random.default_rng(semilla)
+        lotes = max(1, -(-len(unicos) // lote))
+        with self.bloqueo:
+            for _ in range(max(epocas, -(-pasos_minimos // lotes))):
+                for indices in np.array_split(rng.permutation(len(unicos)), lotes):
+                    # Características de las filas del minilote, renumeradas 0..n-1
+                    tramos = [np.arange(inicio_fila[i], inicio_fila[i + 1]) for i in indices]
+                    posiciones = np.concatenate(tramos)
+                    filas_lote = np.repeat(np.arange(len(indices)), [len(t) for t in tramos])
+                    cubetas_lote, valores_lote = cubetas[posiciones], valores[posiciones]
+                    probabilidades = self._probabilidades(
+                        self._puntuaciones(filas_lote, cubetas_lote, valores_lote, len(indices)), mascara[indices]
+                    )
+                    # Gradiente de la entropía cruzada: p - y, ponderado y promediado
+                    error = probabilidades
+                    error[np.arange(len(indices)), clases[indices]] -= 1
+                    error *= (pesos_ejemplo[indices] / pesos_ejemplo[indices].sum())[:, None]
+                    usadas, inversa = np.unique(cubetas_lote, return_inverse=True)
+                    gradiente = np.empty((len(usadas), len(CLASES)), dtype=np.float32)
+                    contribucion = error[filas_lote] * valores_lote[:, None]
+                    for clase in range(len(CLASES)):
+                        gradiente[:, clase] = np.bincount(inversa, weights=contribucion[:, clase], minlength=len(usadas))
+                    self.pesos[usadas] -= tasa * gradiente
+                    self.sesgo -= tasa * error.sum(axis=0)
+            self.ejemplos += len(ejemplos)
+        return len(ejemplos)
+
+    # Correcciones del usuario: se recuerdan tal cual y se aprenden con más peso
+    def corregir(self, descripciones, tipos, categorias):
+        textos = _sin_digitos(normalizar_lote(descripciones))
+        with self.bloqueo:
+            for texto, tipo, categoria in zip(textos, tipos, categorias):
+                if categoria in CLASES and _TIPO_CLASE[CLASES.index(categoria)] == tipo:
+                    self.correcciones.setdefault(tipo, {})[texto] = CLASES.index(categoria)
+        return self.aprender(descripciones, tipos, categorias, epocas=5)
+
+    # Clase por texto y tipo (textos × tipos, -1 = ninguna) según las reglas:
+    # todas las coincidencias salen de una pasada por los textos unidos
+    @staticmethod
+    def _reglas(textos):
+        clases = np.full((len(textos), len(_TIPOS)), -1, dtype=np.int64)
+        unido = "\n".join(textos)
+        coincidencias = [(m.start(), _CLASE_REGLA[m.lastgroup]) for m in _PATRON_REGLAS.finditer(unido)]
+        if not coincidencias:
+            return clases
+        inicios = np.concatenate([[0], np.flatnonzero(np.frombuffer(unido.encode("utf-32-le"), dtype=np.uint32) == 10) + 1])
+        posicion, clase = np.array(coincidencias, dtype=np.int64).T
+        fila = np.searchsorted(inicios, posicion, side="right") - 1
+        for k, tipo in enumerate(_TIPOS):
+            compatibles = _TIPO_CLASE[clase] == tipo
+            filas, primera = np.unique(fila[compatibles], return_index=True)
+            clases[filas, k] = clase[compatibles][primera]
+        return clases
+
+    # Categoría, origen ("corrección", "regla", "modelo" o "por defecto") y
+    # confianza de cada descripción según su tipo. Las descripciones se agrupan
+    # por su texto sin dígitos y cada etapa trabaja sobre los textos distintos.
+    def categorizar(self, descripciones, tipos):
+        textos = _sin_digitos(normalizar_lote(descripciones))
+        n = len(textos)
+        if not n:
+            return pd.DataFrame({"categoria": [], "origen": [], "confianza": []})
+        tipos = np.asarray(tipos, dtype=object)
+        codigos, unicos = pd.factorize(pd.Series(textos, dtype=object))
+        tipo_fila = pd.Index(_TIPOS).get_indexer(tipos)
+        conocido = tipo_fila >= 0
+        clase = np.full(n, -1, dtype=np.int64)
+        origen = np.full(n, "por defecto", dtype=object)
+        confianza = np.zeros(n, dtype=np.float32)
+
+        with self.bloqueo:
+            por_texto = np.full((len(unicos), len(_TIPOS)), -1, dtype=np.int64)
+            for k, tipo in enumerate(_TIPOS):
+                if self.correcciones.get(tipo):
+                    por_texto[:, k] = pd.Series(unicos).map(self.correcciones[tipo]).fillna(-1).to_numpy(dtype=np.int64)
+            clase[conocido] = por_texto[codigos[conocido], tipo_fila[conocido]]
+            origen[clase >= 0], confianza[clase >= 0] = "corrección", 1.0
+
+            reglas = self._reglas(list(unicos))
+            pendientes = conocido & (clase < 0)
+            clase[pendientes] = reglas[codigos[pendientes], tipo_fila[pendientes]]
+            por_regla = pendientes & (clase >= 0)
+            origen[por_regla], confianza[por_regla] = "regla", 1.0
+
+            # Modelo: sólo los textos con filas pendientes
+            pendientes = np.flatnonzero(conocido & (clase < 0))
+            if len(pendientes) and self.ejemplos:
+                textos_modelo, codigos_modelo = np.unique(codigos[pendientes], return_inverse=True)
+                puntuaciones = np.empty((len(textos_modelo), len(CLASES)), dtype=np.float32)
+                for inicio in range(0, len(textos_modelo), _TAMANO_BLOQUE):
+                    bloque = list(unicos[textos_modelo[inicio:inicio + _TAMANO_BLOQUE]])
+                    puntuaciones[inicio:inicio + len(bloque)] = self._puntuaciones(*_caracteristicas(bloque), len(bloque))
+                probabilidades = self._probabilidades(puntuaciones[codigos_modelo], _MASCARAS[tipo_fila[pendientes]])
+                mejor = probabilidades.argmax(axis=1)
+                confianza[pendientes] = probabilidades[np.arange(len(mejor)), mejor]
+                seguro = confianza[pendientes] >= UMBRAL_CONFIANZA
+                clase[pendientes[seguro]] = mejor[seguro]
+                origen[pendientes[seguro]] = "modelo"
+
+        categorias = np.array(CLASES, dtype=object)[np.maximum(clase, 0)]
+        sin_clase = clase < 0
+        categorias[sin_clase] = pd.Series(tipos[sin_clase], dtype=object).map(CATEGORIA_POR_DEFECTO).to_numpy()
+        return pd.DataFrame({"categoria": categorias, "origen": origen, "confianza": confianza})
+
+    def sugerir(self, descripcion, tipo):
+        return self.categorizar([descripcion], [tipo])["categoria"].iloc[0]
+
+
+# Un categorizador por libro, sincronizado como los índices: entrena con el
+# historial la primera vez y después con las filas nuevas y las correcciones
+def categorizador(almacen):
+    clave = almacen.ruta
+    with _BLOQUEO_CATEGORIZADORES:
+        modelo = _CATEGORIZADORES.get(clave)
+        if modelo is None:
+            modelo = _CATEGORIZADORES[clave] = Categorizador()
+            modelo.ultimo_cambio = almacen.ultimo_cambio()
+            ultimo_id = almacen.ultimo_id("transacciones")
+            historial = almacen.ejemplos_categorizacion(max(0, ultimo_id - MAX_HISTORIAL), ultimo_id)
+            modelo.aprender(historial["descripcion"], historial["tipo"], historial["categoria"], epocas=5, pasos_minimos=200)
+            modelo.ultimo_id = ultimo_id
+            return modelo
+
+        ultimo_id = almacen.ultimo_id("transacciones")
+        if ultimo_id > modelo.ultimo_id:
+            nuevas = almacen.ejemplos_categorizacion(modelo.ultimo_id, ultimo_id)
+            modelo.aprender(nuevas["descripcion"], nuevas["tipo"], nuevas["categoria"])
+            modelo.ultimo_id = ultimo_id
+        ultimo_cambio, ids, columnas = almacen.cambios_desde("transacciones", modelo.ultimo_cambio)
+        if "categoria" in columnas:
+            corregidas = almacen.ejemplos_categorizacion(ids=ids)
+            modelo.corregir(corregidas["descripcion"], corregidas["tipo"], corregidas["categoria"])
+        modelo.ultimo_cambio = ultimo_cambio
+    return modelo
+
+
+# Uso: python -m finanzas.categorizacion --historial 50000 --filas 100000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el entrenamiento y la categorización por lotes")
+    parser.add_argument("--historial", type=int, default=50_000)
+    parser.add_argument("--filas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Descripciones sintéticas: un comercio por categoría más referencias numéricas
+    rng = np.random.default_rng(16)
+    comercios = {
+        "Ventas": ["ABONO TPV COMERCIO", "TRANSF CLIENTE PEREZ SL"], "Prestación de servicios": ["HONORARIOS PROYECTO"],
+        "Subvenciones": ["AYUDA PUBLICA CCAA"], "Intereses": ["LIQUIDACION INTERESES"], "Otros ingresos": ["DEVOLUCION COMPRA"],
+        "Suministros": ["RECIBO IBERDROLA", "CARGO MOVISTAR FIBRA", "GAS NATURAL HOGAR"], "Alquiler": ["ALQUILER OFICINA"],
+        "Salarios": ["NOMINA EMPLEADO"], "Marketing": ["CAMPANA MAILCHIMP", "IMPRENTA FOLLETOS"], "Software": ["CARGO NOTION LABS", "ADOBE CC"],
+        "Equipamiento": ["COMPRA SILLAS IKEA"], "Seguros": ["RECIBO MAPFRE"], "Impuestos": ["PAGO MODELO 303"], "Otros": ["CAFETERIA CENTRO"],
+    }
+    pares = [(c, d) for c, ds in comercios.items() for d in ds]
+
+    def muestra(n):
+        elegidos = rng.integers(0, len(pares), n)
+        categorias = np.array([pares[i][0] for i in elegidos], dtype=object)
+        descripciones = [f"{pares[i][1]} REF {r}" for i, r in zip(elegidos, rng.integers(0, 10**7, n))]
+        tipos = np.where(np.isin(categorias, CATEGORIAS["Ingreso"]), "Ingreso", "Gasto")
+        return descripciones, tipos, categorias
+
+    modelo = Categorizador()
+    descripciones, tipos, categorias = muestra(args.historial)
+    inicio = time.perf_counter()
+    modelo.aprender(descripciones, tipos, categorias, epocas=5, pasos_minimos=200)
+    print(f"entrenamiento con {args.historial} filas: {time.perf_counter() - inicio:.2f} s")
+
+    descripciones, tipos, categorias = muestra(args.filas)
+    inicio = time.perf_counter()
+    resultado = modelo.categorizar(descripciones, tipos)
+    segundos = time.perf_counter() - inicio
+    print(f"categorización de {args.filas} filas: {segundos:.2f} s ({args.filas / segundos:,.0f} filas/s)")
+    print(f"  acierto: {(resultado['categoria'].to_numpy() == categorias).mean():.1%} · origen: {resultado['origen'].value_counts().to_dict()}")
+
+    # Descripciones distintas (sin repeticiones): coste del modelo en el peor caso
+    unicas = [f"{d} {i}" for i, d in enumerate(descripciones)]
+    unicas = [d.replace("REF", "REF" + chr(65 + i % 26) + chr(65 + i // 26 % 26) + chr(65 + i // 676 % 26)) for i, d in enumerate(unicas)]
+    inicio = time.perf_counter()
+    resultado = modelo.categorizar(unicas, tipos)
+    segundos = time.perf_counter() - inicio
+    print(f"  sin descripciones repetidas: {segundos:.2f} s ({args.filas / segundos:,.0f} filas/s), acierto {(resultado['categoria'].to_numpy() == categorias).mean():.1%}")
+
+    modelo.corregir(["CAFETERIA CENTRO REF 1"], ["Gasto"], ["Marketing"])
+    print(f"  tras corregir 'CAFETERIA CENTRO': {modelo.sugerir('CAFETERIA CENTRO REF 99', 'Gasto')}")
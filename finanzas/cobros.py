@@ -0,0 +1,133 @@
+# Periodo medio de cobro (DSO) y antigüedad de saldos de clientes
+#
+# Se calcula sobre dos agregados que el almacén mantiene en la misma
+# transacción que cada alta o cobro de facturas (ver _materializar_facturas):
+# las cobradas por mes de cobro y cliente (importe e importe × días desde la
+# emisión) y las pendientes por fecha de emisión y cliente. El periodo medio de
+# cobro de un mes o de un cliente es la media de días ponderada por importe,
+# Σ importe·días / Σ importe; el DSO contable relaciona el saldo pendiente con
+# lo facturado en los últimos meses. La antigüedad de lo pendiente se reparte en
+# tramos por días desde la emisión. Nada de esto recorre la tabla de facturas:
+# el coste depende del número de meses, días y clientes, no de facturas.
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.agregados import etiquetas_meses
+from finanzas.almacen import version_libro
+from finanzas.cache import memoizar
+
+# (etiqueta, días máximos desde la emisión); el último tramo no tiene límite
+TRAMOS_ANTIGUEDAD = (("0-30 días", 30), ("31-60 días", 60), ("61-90 días", 90), ("Más de 90 días", None))
+OBJETIVO_DIAS = 30
+MESES_COBRO = 12
+# Meses de facturación con los que se compara el saldo pendiente en el DSO contable
+MESES_DSO = 3
+
+
+# Tramo de antigüedad (índice en TRAMOS_ANTIGUEDAD) de cada número de días
+def tramos_antiguedad(dias):
+    limites = np.array([limite for _, limite in TRAMOS_ANTIGUEDAD[:-1]])
+    return np.searchsorted(limites, np.asarray(dias), side="left")
+
+
+def _media_ponderada(importe_dias, importe):
+    return np.divide(importe_dias, importe, out=np.full(np.shape(importe), np.nan), where=np.asarray(importe) > 0)
+
+
+# Periodo medio de cobro por mes de cobro (últimos `meses` meses, incluido el
+# actual) y por cliente, DSO contable y antigüedad de lo pendiente a fecha `hasta`
+@memoizar(ttl=300, version=version_libro)
+def periodo_medio_cobro(almacen, meses=MESES_COBRO, hasta=None):
+    hoy = pd.Timestamp(hasta if hasta is not None else pd.Timestamp.now()).normalize()
+    periodos = pd.period_range(end=hoy.to_period("M"), periods=meses, freq="M")
+
+    # Cobros: por mes y por cliente dentro de la ventana
+    cobros = almacen.cobros_mensuales(desde_mes=str(periodos[0]), hasta_mes=str(periodos[-1]))
+    por_mes = cobros.groupby("mes")[["cobrado", "cobrado_dias", "facturas"]].sum().reindex([str(p) for p in periodos], fill_value=0)
+    mensual = pd.DataFrame({
+        "mes": por_mes.index,
+        "etiqueta": etiquetas_meses(periodos),
+        "dias": _media_ponderada(por_mes["cobrado_dias"].to_numpy(), por_mes["cobrado"].to_numpy()),
+        "cobrado": por_mes["cobrado"].to_numpy(),
+        "facturas": por_mes["facturas"].to_numpy(),
+    })
+    por_cliente = cobros.groupby("cliente")[["cobrado", "cobrado_dias"]].sum()
+
+    # Pendiente: días desde la emisión y tramo de cada (fecha, cliente)
+    pendiente = almacen.pendiente_por_emision()
+    dias = (hoy - pendiente["fecha_emision"]).dt.days.clip(lower=0).to_numpy()
+    tramo = tramos_antiguedad(dias)
+    etiquetas = [etiqueta for etiqueta, _ in TRAMOS_ANTIGUEDAD]
+    antiguedad = pd.DataFrame({
+        "tramo": etiquetas,
+        "pendiente": np.bincount(tramo, weights=pendiente["pendiente"], minlength=len(etiquetas)),
+        "facturas": np.bincount(tramo, weights=pendiente["facturas"], minlength=len(etiquetas)).astype(np.int64),
+    })
+    pendiente = pendiente.assign(tramo=pd.Categorical.from_codes(tramo, etiquetas), pendiente_dias=pendiente["pendiente"] * dias)
+    tramos_cliente = pendiente.pivot_table(index="cliente", columns="tramo", values="pendiente", aggfunc="sum", observed=False).reindex(columns=etiquetas)
+    pendiente_cliente = pendiente.groupby("cliente")[["pendiente", "pendiente_dias"]].sum()
+
+    clientes = por_cliente.join(pendiente_cliente, how="outer").fillna(0.0)
+    clientes = pd.DataFrame({
+        "cliente": clientes.index,
+        "dias": _media_ponderada(clientes["cobrado_dias"].to_numpy(), clientes["cobrado"].to_numpy()),
+        "cobrado": clientes["cobrado"].to_numpy(),
+        "pendiente": clientes["pendiente"].to_numpy(),
+        "antiguedad_pendiente": _media_ponderada(clientes["pendiente_dias"].to_numpy(), clientes["pendiente"].to_numpy()),
+    })
+    clientes = clientes.join(tramos_cliente.fillna(0.0), on="cliente").fillna({e: 0.0 for e in etiquetas})
+    clientes = clientes.sort_values(["pendiente", "cobrado"], ascending=False, kind="stable").reset_index(drop=True)
+
+    # DSO contable: saldo pendiente / facturado en los últimos meses × días de esos meses
+    desde = hoy.to_period("M") - (MESES_DSO - 1)
+    facturado = almacen.facturacion_mensual(desde_mes=str(desde), hasta_mes=str(hoy.to_period("M")))["total"].sum()
+    dias_ventana = (hoy - desde.start_time).days + 1
+    total_pendiente = float(antiguedad["pendiente"].sum())
+
+    return {
+        "mensual": mensual,
+        "clientes": clientes,
+        "antiguedad": antiguedad,
+        "dias": float(_media_ponderada(por_mes["cobrado_dias"].sum(), por_mes["cobrado"].sum())),
+        "dso": total_pendiente / facturado * dias_ventana if facturado > 0 else float("nan"),
+        "pendiente": total_pendiente,
+        "cobrado": float(por_mes["cobrado"].sum()),
+    }
+
+
+# Uso: python -m finanzas.cobros --facturas 200000 --cobros 1000
+if __name__ == "__main__":
+    from finanzas.almacen import AlmacenLibro
+    from finanzas.generadores import generar_facturas
+
+    parser = argparse.ArgumentParser(description="Mide el periodo medio de cobro con muchas facturas")
+    parser.add_argument("--facturas", type=int, default=200_000)
+    parser.add_argument("--cobros", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenLibro(os.path.join(directorio, "cobros.db"))
+        facturas = generar_facturas(args.facturas, dias=3 * 365, semilla=17)
+        facturas["numero"] = "F-" + pd.Series(np.arange(args.facturas)).astype(str).str.zfill(7)
+        inicio = time.perf_counter()
+        almacen.insertar_facturas(facturas)
+        print(f"alta de {args.facturas} facturas: {time.perf_counter() - inicio:.2f} s")
+
+        inicio = time.perf_counter()
+        resultado = periodo_medio_cobro.__wrapped__(almacen)
+        print(f"periodo medio de cobro y antigüedad: {(time.perf_counter() - inicio) * 1000:.1f} ms "
+              f"({resultado['dias']:.1f} días, DSO {resultado['dso']:.1f} días)")
+
+        ids = pd.read_sql_query("SELECT id FROM facturas WHERE fecha_cobro IS NULL LIMIT ?", almacen._conexion(), params=[args.cobros])["id"]
+        inicio = time.perf_counter()
+        almacen.marcar_pagadas(ids, pd.Timestamp.now())
+        cobro = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        despues = periodo_medio_cobro(almacen)
+        print(f"cobro de {len(ids)} facturas: {cobro * 1000:.1f} ms · recálculo: {(time.perf_counter() - inicio) * 1000:.1f} ms "
+              f"(pendiente {resultado['pendiente']:,.0f} -> {despues['pendiente']:,.0f})")
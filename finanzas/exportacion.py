@@ -0,0 +1,298 @@
+# Exportación a Excel en streaming (xlsxwriter en modo constant_memory)
+#
+# Las filas se escriben por bloques directamente desde una selección y en orden,
+# así que el libro nunca está entero en memoria: xlsxwriter vuelca cada fila a
+# un temporal en cuanto empieza la siguiente. Importes y fechas se escriben como
+# números con formato de columna (no como texto) según las preferencias de
+# moneda, decimales y formato de fecha. Los ficheros generados se reutilizan
+# mientras no cambien la consulta, la versión del libro ni las opciones.
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+OPCIONES_EXCEL_POR_DEFECTO = {"excel_graficos": True, "excel_formato_condicional": True, "excel_formulas": True}
+FORMATOS_FECHA_EXCEL = {"DD/MM/AAAA": "dd/mm/yyyy", "MM/DD/AAAA": "mm/dd/yyyy", "AAAA-MM-DD": "yyyy-mm-dd"}
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Límite de filas de una hoja de Excel, descontando cabecera y fila de totales
+FILAS_POR_HOJA = 1_048_576 - 2
+# Días entre el origen de fechas de Excel (1899-12-30) y 1970-01-01
+_EPOCA_EXCEL = 25569
+DIRECTORIO_EXPORTACIONES = os.path.join(tempfile.gettempdir(), "finanzas-exportaciones")
+
+# Columnas (columna, cabecera, tipo), columna del resumen y colores condicionales de cada tabla
+TABLAS_EXCEL = {
+    "transacciones": {
+        "columnas": [
+            ("fecha", "Fecha", "fecha"),
+            ("descripcion", "Descripción", "texto"),
+            ("tipo", "Tipo", "texto"),
+            ("categoria", "Categoría", "texto"),
+            ("cuenta", "Cuenta", "texto"),
+            ("monto", "Importe", "importe"),
+        ],
+        "agrupar": "categoria",
+        "colores": ("tipo", {"Ingreso": "#C8E6C9", "Gasto": "#FFCDD2"}),
+    },
+    "facturas": {
+        "columnas": [
+            ("numero", "Número", "texto"),
+            ("cliente", "Cliente", "texto"),
+            ("fecha_emision", "Emisión", "fecha"),
+            ("vencimiento", "Vencimiento", "fecha"),
+            ("monto", "Importe", "importe"),
+            ("estado", "Estado", "texto"),
+            ("fecha_cobro", "Cobro", "fecha"),
+        ],
+        "agrupar": "estado",
+        "colores": ("estado", {"Pendiente": "#FFF9C4", "Pagada": "#C8E6C9", "Vencida": "#FFCDD2"}),
+    },
+}
+
+
+# Ruta estable para una exportación: misma clave, mismo fichero
+def ruta_exportacion(nombre, clave, extension="xlsx"):
+    resumen = hashlib.sha1(repr(clave).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(DIRECTORIO_EXPORTACIONES, f"{nombre}-{resumen}.{extension}")
+
+
+def _formatos(libro, formato):
+    decimales = "." + "0" * formato.decimales if formato.decimales else ""
+    importe = f'#,##0{decimales} "{formato.simbolo}";-#,##0{decimales} "{formato.simbolo}"'
+    return {
+        "cabecera": libro.add_format({"bold": True, "font_color": "#FFFFFF", "bg_color": "#1E88E5", "border": 1}),
+        "fecha": libro.add_format({"num_format": FORMATOS_FECHA_EXCEL[formato.formato_fecha]}),
+        "importe": libro.add_format({"num_format": importe}),
+        "porcentaje": libro.add_format({"num_format": "0.0%"}),
+        "entero": libro.add_format({"num_format": "#,##0"}),
+        "texto": None,
+        "total": libro.add_format({"bold": True, "top": 1}),
+        "total_importe": libro.add_format({"bold": True, "top": 1, "num_format": importe}),
+        "negativo": libro.add_format({"font_color": "#C62828"}),
+    }
+
+
+def _valores_excel(serie, tipo):
+    if tipo == "fecha":
+        dias = serie.to_numpy().astype("datetime64[D]")
+        valores = (dias.astype(np.int64) + _EPOCA_EXCEL).tolist()
+        # Fechas vacías (p. ej. el cobro de una factura pendiente): celda en blanco
+        if np.isnat(dias).any():
+            valores = [None if vacia else v for v, vacia in zip(valores, np.isnat(dias))]
+        return valores
+    if tipo == "texto":
+        return serie.astype(str).tolist()
+    return serie.to_numpy(dtype=np.float64).tolist()
+
+
+# Escritor de celdas de una columna; las fechas pueden venir vacías (None)
+def _escritor(hoja, tipo):
+    if tipo == "texto":
+        return hoja.write_string
+    if tipo != "fecha":
+        return hoja.write_number
+
+    def escribir_fecha(fila, col, valor, formato=None):
+        if valor is None:
+            hoja.write_blank(fila, col, None, formato)
+        else:
+            hoja.write_number(fila, col, valor, formato)
+
+    return escribir_fecha
+
+
+def _anchos(tipos):
+    return [{"fecha": 12, "importe": 16, "porcentaje": 10, "entero": 12}.get(t, 24) for t in tipos]
+
+
+def _preparar_hoja(hoja, cabeceras, tipos, formatos):
+    for col, (ancho, tipo) in enumerate(zip(_anchos(tipos), tipos)):
+        hoja.set_column(col, col, ancho, formatos[tipo])
+    hoja.write_row(0, 0, cabeceras, formatos["cabecera"])
+    hoja.freeze_panes(1, 0)
+
+
+def _cerrar_hoja_datos(hoja, filas, tipos, formatos, opciones, colores, total):
+    ultima = len(tipos) - 1
+    hoja.autofilter(0, 0, max(filas, 1), ultima)
+    fila_total = filas + 1
+    hoja.write_string(fila_total, 0, "Total", formatos["total"])
+    for col, tipo in enumerate(tipos):
+        if tipo != "importe":
+            continue
+        letra = xl_col_to_name(col)
+        if opciones["excel_formulas"] and filas:
+            # SUBTOTAL ignora las filas ocultas por el autofiltro
+            hoja.write_formula(fila_total, col, f"=SUBTOTAL(9,{letra}2:{letra}{filas + 1})", formatos["total_importe"], total)
+        else:
+            hoja.write_number(fila_total, col, total, formatos["total_importe"])
+        if opciones["excel_formato_condicional"] and filas:
+            hoja.conditional_format(1, col, filas, col, {"type": "cell", "criteria": "<", "value": 0, "format": formatos["negativo"]})
+    if opciones["excel_formato_condicional"] and colores and filas:
+        col, formatos_color = colores
+        for valor, formato_color in formatos_color.items():
+            hoja.conditional_format(1, col, filas, col, {"type": "cell", "criteria": "==", "value": f'"{valor}"', "format": formato_color})
+
+
+def _escribir_resumen(libro, hoja, titulo, grupos, hojas_datos, columna_grupo, columna_importe, formatos, opciones):
+    _preparar_hoja(hoja, [titulo, "Cantidad", "Total"], ["texto", "entero", "importe"], formatos)
+    letra_grupo = xl_col_to_name(columna_grupo)
+    letra_importe = xl_col_to_name(columna_importe)
+    for fila, (valor, movimientos, total) in enumerate(grupos, start=1):
+        hoja.write_string(fila, 0, str(valor))
+        if opciones["excel_formulas"]:
+            # Fórmulas sobre las hojas de datos (con su valor ya calculado)
+            rangos = [(f"'{nombre}'!{letra_grupo}2:{letra_grupo}{filas + 1}", f"'{nombre}'!{letra_importe}2:{letra_importe}{filas + 1}") for nombre, filas in hojas_datos]
+            cuenta = "+".join(f"COUNTIF({g},A{fila + 1})" for g, _ in rangos)
+            suma = "+".join(f"SUMIF({g},A{fila + 1},{i})" for g, i in rangos)
+            hoja.write_formula(fila, 1, f"={cuenta}", None, movimientos)
+            hoja.write_formula(fila, 2, f"={suma}", None, total)
+        else:
+            hoja.write_number(fila, 1, movimientos)
+            hoja.write_number(fila, 2, total)
+    fila_total = len(grupos) + 1
+    hoja.write_string(fila_total, 0, "Total", formatos["total"])
+    movimientos_total = float(sum(g[1] for g in grupos))
+    importe_total = float(sum(g[2] for g in grupos))
+    if opciones["excel_formulas"] and grupos:
+        hoja.write_formula(fila_total, 1, f"=SUM(B2:B{fila_total})", formatos["total"], movimientos_total)
+        hoja.write_formula(fila_total, 2, f"=SUM(C2:C{fila_total})", formatos["total_importe"], importe_total)
+    else:
+        hoja.write_number(fila_total, 1, movimientos_total, formatos["total"])
+        hoja.write_number(fila_total, 2, importe_total, formatos["total_importe"])
+    if opciones["excel_graficos"] and grupos:
+        grafico = libro.add_chart({"type": "column"})
+        grafico.add_series({
+            "name": "Total",
+            "categories": [hoja.name, 1, 0, len(grupos), 0],
+            "values": [hoja.name, 1, 2, len(grupos), 2],
+            "fill": {"color": "#1E88E5"},
+        })
+        grafico.set_title({"name": f"Total por {titulo.lower()}"})
+        grafico.set_legend({"none": True})
+        hoja.insert_chart(1, 4, grafico, {"x_scale": 1.5, "y_scale": 1.3})
+
+
+def _escribir(ruta, escribir):
+    # Se escribe en un temporal y se renombra: otra sesión nunca ve un fichero a medias
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    parcial = f"{ruta}.{os.getpid()}.{id(escribir)}.parcial"
+    try:
+        escribir(parcial)
+        os.replace(parcial, ruta)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    return ruta
+
+
+# Exporta una Seleccion de las vistas (transacciones o facturas) por bloques.
+# `progreso` recibe la fracción de filas escritas (0..1).
+def exportar_seleccion(seleccion, tabla, ruta, formato, opciones=None, progreso=None, tamano_bloque=50000):
+    opciones = {**OPCIONES_EXCEL_POR_DEFECTO, **(opciones or {})}
+    especificacion = TABLAS_EXCEL[tabla]
+    columnas = [c for c, _, _ in especificacion["columnas"]]
+    cabeceras = [c for _, c, _ in especificacion["columnas"]]
+    tipos = [t for _, _, t in especificacion["columnas"]]
+    columna_importe = tipos.index("importe")
+
+    def escribir(destino):
+        libro = xlsxwriter.Workbook(destino, {"constant_memory": True})
+        formatos = _formatos(libro, formato)
+        columna_color, colores = especificacion["colores"]
+        colores = (columnas.index(columna_color), {v: libro.add_format({"bg_color": c}) for v, c in colores.items()})
+        resumen = libro.add_worksheet("Resumen") if opciones["excel_graficos"] or opciones["excel_formulas"] else None
+
+        hojas_datos = []
+        hoja, filas, total = None, 0, 0.0
+        escritas = 0
+        for bloque in seleccion.bloques(tamano_bloque):
+            valores = [_valores_excel(bloque[c], t) for c, t in zip(columnas, tipos)]
+            for registro in zip(*valores):
+                if hoja is None or filas == FILAS_POR_HOJA:
+                    if hoja is not None:
+                        _cerrar_hoja_datos(hoja, filas, tipos, formatos, opciones, colores, total)
+                        hojas_datos.append((hoja.name, filas))
+                    hoja = libro.add_worksheet(f"Datos {len(hojas_datos) + 1}" if hojas_datos or len(seleccion) > FILAS_POR_HOJA else "Datos")
+                    _preparar_hoja(hoja, cabeceras, tipos, formatos)
+                    escritores = [_escritor(hoja, t) for t in tipos]
+                    filas, total = 0, 0.0
+                filas += 1
+                for col, valor in enumerate(registro):
+                    escritores[col](filas, col, valor)
+                total += registro[columna_importe]
+            escritas += len(bloque)
+            if progreso is not None:
+                progreso(escritas / max(len(seleccion), 1))
+
+        if hoja is None:
+            hoja = libro.add_worksheet("Datos")
+            _preparar_hoja(hoja, cabeceras, tipos, formatos)
+        _cerrar_hoja_datos(hoja, filas, tipos, formatos, opciones, colores, total)
+        hojas_datos.append((hoja.name, filas))
+
+        if resumen is not None:
+            agrupar = especificacion["agrupar"]
+            sumas = seleccion.suma(columnas[columna_importe], por=agrupar)
+            recuento = seleccion.recuento(agrupar)
+            grupos = [(valor, int(n), float(sumas[valor])) for valor, n in recuento.items()]
+            titulo = cabeceras[columnas.index(agrupar)]
+            _escribir_resumen(libro, resumen, titulo, grupos, hojas_datos, columnas.index(agrupar), columna_importe, formatos, opciones)
+        libro.close()
+
+    return _escribir(ruta, escribir)
+
+
+# Exporta tablas pequeñas ya calculadas (informes). Cada hoja es un dict con
+# "nombre", "datos" (DataFrame), "tipos" (columna -> tipo) y opcionalmente
+# "variacion" (columna actual, columna anterior) y "grafico" ("pie" o "column").
+def exportar_tablas(hojas, ruta, formato, opciones=None):
+    opciones = {**OPCIONES_EXCEL_POR_DEFECTO, **(opciones or {})}
+
+    def escribir(destino):
+        libro = xlsxwriter.Workbook(destino, {"constant_memory": True})
+        formatos = _formatos(libro, formato)
+        for especificacion in hojas:
+            datos = especificacion["datos"]
+            tipos = [especificacion["tipos"].get(c, "texto") for c in datos.columns]
+            cabeceras = list(datos.columns)
+            variacion = especificacion.get("variacion")
+            if variacion:
+                cabeceras.append("Variación")
+                tipos.append("porcentaje")
+            hoja = libro.add_worksheet(especificacion["nombre"])
+            _preparar_hoja(hoja, cabeceras, tipos, formatos)
+            valores = [_valores_excel(datos[c], t) for c, t in zip(datos.columns, tipos)]
+            escritores = [_escritor(hoja, t) for t in tipos]
+            for fila, registro in enumerate(zip(*valores), start=1):
+                for col, valor in enumerate(registro):
+                    escritores[col](fila, col, valor)
+                if variacion:
+                    actual, anterior = (float(datos[c].iloc[fila - 1]) for c in variacion)
+                    cambio = (actual - anterior) / abs(anterior) if anterior else 0.0
+                    if opciones["excel_formulas"]:
+                        a, b = (xl_col_to_name(list(datos.columns).index(c)) for c in variacion)
+                        hoja.write_formula(fila, len(datos.columns), f"=IF({b}{fila + 1}=0,0,({a}{fila + 1}-{b}{fila + 1})/ABS({b}{fila + 1}))", None, cambio)
+                    else:
+                        hoja.write_number(fila, len(datos.columns), cambio)
+            if opciones["excel_formato_condicional"] and variacion and len(datos):
+                columna = len(datos.columns)
+                hoja.conditional_format(1, columna, len(datos), columna, {"type": "cell", "criteria": "<", "value": 0, "format": formatos["negativo"]})
+            grafico = especificacion.get("grafico")
+            if opciones["excel_graficos"] and grafico and len(datos):
+                columna_valores = tipos.index("importe")
+                figura = libro.add_chart({"type": grafico})
+                figura.add_series({
+                    "name": especificacion["nombre"],
+                    "categories": [hoja.name, 1, 0, len(datos), 0],
+                    "values": [hoja.name, 1, columna_valores, len(datos), columna_valores],
+                })
+                figura.set_title({"name": especificacion["nombre"]})
+                hoja.insert_chart(1, len(cabeceras) + 1, figura)
+        libro.close()
+
+    return _escribir(ruta, escribir)
@@ -0,0 +1,169 @@
+# Formato vectorizado de importes, porcentajes y fechas según las preferencias
+#
+# En lugar de formatear celda a celda con f-strings, cada columna se compone como
+# una matriz de puntos de código (una fila por valor, una columna por carácter)
+# con operaciones numpy sobre todas las filas a la vez, y se reinterpreta como un
+# array de cadenas. Separadores españoles: punto de miles y coma decimal.
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+MONEDAS = {"EUR (€)": "€", "USD ($)": "$", "GBP (£)": "£"}
+FORMATOS_FECHA = {
+    "DD/MM/AAAA": ("d", "/", "m", "/", "Y"),
+    "MM/DD/AAAA": ("m", "/", "d", "/", "Y"),
+    "AAAA-MM-DD": ("Y", "-", "m", "-", "d"),
+}
+PREFERENCIAS_POR_DEFECTO = {"moneda": "EUR (€)", "decimales": 2, "formato_fecha": "DD/MM/AAAA"}
+
+SEPARADOR_MILES = "."
+SEPARADOR_DECIMAL = ","
+_ESPACIO = ord(" ")
+_CERO = ord("0")
+_TAMANO_BLOQUE = 1 << 18
+
+
+def _cadenas(matriz):
+    ancho = matriz.shape[1]
+    return np.ascontiguousarray(matriz).view(f"<U{ancho}")[:, 0]
+
+
+def _cifras(matriz, columna_final, valores, numero_cifras):
+    # Escribe las cifras de `valores` (con ceros a la izquierda) terminando en columna_final
+    for j in range(numero_cifras):
+        matriz[:, columna_final - j] = (valores // 10 ** j) % 10 + _CERO
+
+
+def _numeros_bloque(valores, decimales, sufijo):
+    validos = np.isfinite(valores)
+    escala = 10 ** decimales
+    unidades = np.rint(np.abs(np.where(validos, valores, 0.0)) * escala).astype(np.int64)
+    enteros, fracciones = np.divmod(unidades, escala)
+
+    numero_cifras = len(str(int(enteros.max()))) if len(enteros) else 1
+    longitudes = np.ones(len(enteros), dtype=np.int64)
+    for j in range(1, numero_cifras):
+        longitudes += enteros >= 10 ** j
+
+    # Columnas: parte entera con separadores de miles, decimales y sufijo
+    ancho_entero = numero_cifras + (numero_cifras - 1) // 3
+    ancho = ancho_entero + (decimales + 1 if decimales else 0) + len(sufijo)
+    matriz = np.full((len(valores), ancho), _ESPACIO, dtype=np.uint32)
+    for j in range(numero_cifras):
+        columna = ancho_entero - 1 - j - j // 3
+        matriz[:, columna] = np.where(j < longitudes, (enteros // 10 ** j) % 10 + _CERO, _ESPACIO)
+        if j and j % 3 == 0:
+            matriz[:, columna + 1] = np.where(j < longitudes, ord(SEPARADOR_MILES), _ESPACIO)
+    if decimales:
+        matriz[:, ancho_entero] = ord(SEPARADOR_DECIMAL)
+        _cifras(matriz, ancho_entero + decimales, fracciones, decimales)
+    for i, caracter in enumerate(sufijo):
+        matriz[:, ancho - len(sufijo) + i] = ord(caracter)
+
+    textos = np.char.lstrip(_cadenas(matriz), " ")
+    textos = np.char.add(np.where((valores < 0) & (unidades > 0), "-", ""), textos)
+    return np.where(validos, textos, "")
+
+
+def formatear_numeros(valores, decimales=2, sufijo=""):
+    valores = np.asarray(valores, dtype=np.float64).ravel()
+    if len(valores) <= _TAMANO_BLOQUE:
+        return _numeros_bloque(valores, decimales, sufijo)
+    # Por bloques para acotar la memoria de la matriz de caracteres
+    bloques = [
+        _numeros_bloque(valores[i:i + _TAMANO_BLOQUE], decimales, sufijo)
+        for i in range(0, len(valores), _TAMANO_BLOQUE)
+    ]
+    ancho = max(b.dtype.itemsize // 4 for b in bloques)
+    return np.concatenate([b.astype(f"<U{ancho}") for b in bloques])
+
+
+def formatear_fechas(fechas, formato="DD/MM/AAAA"):
+    dias = np.asarray(pd.to_datetime(fechas)).astype("datetime64[D]").ravel()
+    validas = ~np.isnat(dias)
+    dias = np.where(validas, dias, np.datetime64(0, "D"))
+    meses = dias.astype("datetime64[M]")
+    partes = {
+        "Y": (dias.astype("datetime64[Y]").astype(np.int64) + 1970, 4),
+        "m": (meses.astype(np.int64) % 12 + 1, 2),
+        "d": ((dias - meses.astype("datetime64[D]")).astype(np.int64) + 1, 2),
+    }
+    piezas = FORMATOS_FECHA[formato]
+    ancho = sum(partes[p][1] if p in partes else len(p) for p in piezas)
+    matriz = np.empty((len(dias), ancho), dtype=np.uint32)
+    columna = 0
+    for pieza in piezas:
+        if pieza in partes:
+            valores, cifras = partes[pieza]
+            _cifras(matriz, columna + cifras - 1, valores, cifras)
+            columna += cifras
+        else:
+            matriz[:, columna:columna + len(pieza)] = [ord(c) for c in pieza]
+            columna += len(pieza)
+    return np.where(validas, _cadenas(matriz), "")
+
+
+# Formateador ligado a las preferencias de Configuración
+class Formato:
+    def __init__(self, moneda="EUR (€)", decimales=2, formato_fecha="DD/MM/AAAA"):
+        self.moneda = moneda
+        self.decimales = int(decimales)
+        self.formato_fecha = formato_fecha
+        self.simbolo = MONEDAS.get(moneda, "€")
+
+    @classmethod
+    def desde_preferencias(cls, preferencias):
+        valores = {**PREFERENCIAS_POR_DEFECTO, **preferencias}
+        return cls(valores["moneda"], valores["decimales"], valores["formato_fecha"])
+
+    def importes(self, valores):
+        return formatear_numeros(valores, self.decimales, f" {self.simbolo}")
+
+    def importe(self, valor):
+        return str(self.importes([valor])[0])
+
+    def porcentajes(self, valores, decimales=1):
+        return formatear_numeros(valores, decimales, " %")
+
+    def porcentaje(self, valor, decimales=1):
+        return str(self.porcentajes([valor], decimales)[0])
+
+    def numero(self, valor, decimales=1):
+        return str(formatear_numeros([valor], decimales)[0])
+
+    def fechas(self, fechas):
+        return formatear_fechas(fechas, self.formato_fecha)
+
+    def fecha(self, valor):
+        return str(self.fechas([valor])[0])
+
+
+# Uso: python -m finanzas.formato --n 1000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara el formato vectorizado con el apply fila a fila")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(2023)
+    importes = pd.Series(rng.normal(0, 50_000, args.n))
+    fechas = pd.Series(pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2000, args.n), unit="D"))
+    formato = Formato()
+
+    def medir(nombre, funcion):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        print(f"{nombre:<38} {time.perf_counter() - inicio:8.3f} s")
+        return resultado
+
+    fila_a_fila = medir(
+        "importes: apply fila a fila",
+        lambda: importes.apply(lambda x: f"{x:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")),
+    )
+    vectorizado = medir("importes: Formato.importes", lambda: formato.importes(importes))
+    print(f"  resultados idénticos: {bool((fila_a_fila.to_numpy() == vectorizado).all())}")
+
+    fila_a_fila = medir("fechas: dt.strftime", lambda: fechas.dt.strftime("%d/%m/%Y"))
+    vectorizado = medir("fechas: Formato.fechas", lambda: formato.fechas(fechas))
+    print(f"  resultados idénticos: {bool((fila_a_fila.to_numpy() == vectorizado).all())}")
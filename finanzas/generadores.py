@@ -0,0 +1,140 @@
+# Generadores vectorizados de datos de ejemplo y de carga
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.cache import memoizar
+
+# Semilla estable: mismos datos (y mismas claves de caché) en cada rerun
+SEMILLA = 2023
+
+TIPOS = ["Ingreso", "Gasto"]
+CATEGORIAS_INGRESO = ["Ventas", "Otros ingresos"]
+CATEGORIAS_GASTO = ["Suministros", "Alquiler", "Salarios", "Marketing", "Software", "Equipamiento", "Seguros", "Impuestos", "Otros"]
+CUENTAS = ["Cuenta Principal", "Cuenta Secundaria", "Efectivo", "Tarjeta de Crédito"]
+CLIENTES = ["Empresa A", "Empresa B", "Empresa C", "Cliente Particular", "Negocio Local", "Corporación XYZ"]
+ESTADOS_FACTURA = ["Pendiente", "Pagada", "Vencida"]
+
+# Factor estacional por mes (enero..diciembre): caída en agosto y campaña de fin de año
+ESTACIONALIDAD = np.array([0.92, 0.95, 1.00, 1.00, 1.03, 1.05, 0.97, 0.82, 1.00, 1.05, 1.08, 1.13])
+
+
+def _generador(semilla):
+    return np.random.default_rng(SEMILLA if semilla is None else semilla)
+
+
+def _hoy(hasta):
+    return pd.Timestamp(hasta).normalize() if hasta is not None else pd.Timestamp.now().normalize()
+
+
+def estacionalidad(meses, intensidad=1.0):
+    # meses: array con el número de mes (1..12)
+    return 1 + intensidad * (ESTACIONALIDAD[np.asarray(meses) - 1] - 1)
+
+
+@memoizar(ttl=3600)
+def generar_transacciones(n=100, dias=365, semilla=None, hasta=None):
+    rng = _generador(semilla)
+    hoy = _hoy(hasta)
+
+    # Días hacia atrás ponderados por la estacionalidad del mes correspondiente
+    fechas_posibles = hoy - pd.to_timedelta(np.arange(dias + 1), unit="D")
+    pesos = estacionalidad(fechas_posibles.month.to_numpy())
+    dias_atras = rng.choice(dias + 1, size=n, p=pesos / pesos.sum())
+    fechas = fechas_posibles[dias_atras]
+    factor = pesos[dias_atras]
+
+    es_ingreso = rng.random(n) < 0.5
+    # Códigos sobre el vocabulario conjunto: ingresos primero, gastos después
+    categoria_ingreso = np.where(rng.random(n) < 0.8, 0, 1)
+    categoria_gasto = len(CATEGORIAS_INGRESO) + rng.integers(0, len(CATEGORIAS_GASTO), n)
+    codigos_categoria = np.where(es_ingreso, categoria_ingreso, categoria_gasto)
+
+    monto = np.where(
+        es_ingreso,
+        rng.uniform(500, 5000, n) * factor,
+        rng.uniform(100, 2000, n) * estacionalidad(fechas.month.to_numpy(), 0.4),
+    )
+
+    categorias = CATEGORIAS_INGRESO + CATEGORIAS_GASTO
+    tipo_por_categoria = ["Ingreso"] * len(CATEGORIAS_INGRESO) + ["Gasto"] * len(CATEGORIAS_GASTO)
+    descripciones = [f"{tipo} - {categoria}" for tipo, categoria in zip(tipo_por_categoria, categorias)]
+
+    return pd.DataFrame({
+        "fecha": fechas,
+        "descripcion": pd.Categorical.from_codes(codigos_categoria, descripciones),
+        "tipo": pd.Categorical.from_codes(np.where(es_ingreso, 0, 1), TIPOS),
+        "categoria": pd.Categorical.from_codes(codigos_categoria, categorias),
+        "cuenta": pd.Categorical.from_codes(rng.integers(0, len(CUENTAS), n), CUENTAS),
+        "monto": monto,
+    })
+
+
+@memoizar(ttl=3600)
+def generar_facturas(n=20, dias=90, semilla=None, hasta=None):
+    rng = _generador(semilla)
+    hoy = _hoy(hasta)
+
+    fecha_emision = hoy - pd.to_timedelta(rng.integers(0, dias + 1, n), unit="D")
+    numeros = pd.Series(np.arange(1, n + 1)).astype(str).str.zfill(3)
+
+    facturas = pd.DataFrame({
+        "numero": "F-2023-" + numeros,
+        "cliente": pd.Categorical.from_codes(rng.integers(0, len(CLIENTES), n), CLIENTES),
+        "fecha_emision": fecha_emision,
+        "vencimiento": fecha_emision + pd.Timedelta(days=30),
+        "monto": rng.uniform(500, 8000, n),
+        "estado": pd.Categorical.from_codes(rng.integers(0, len(ESTADOS_FACTURA), n), ESTADOS_FACTURA),
+    })
+    # Las pagadas se cobran entre 5 y 75 días después de la emisión (nunca después de hoy)
+    cobro = fecha_emision + pd.to_timedelta(rng.integers(5, 76, n), unit="D")
+    facturas["fecha_cobro"] = pd.Series(cobro.where(cobro <= hoy, hoy)).where(facturas["estado"] == "Pagada")
+    return facturas
+
+
+@memoizar(ttl=3600)
+def generar_datos_mensuales(meses=12, tendencia=0.05, semilla=None, hasta=None):
+    rng = _generador(semilla)
+    periodos = pd.period_range(end=_hoy(hasta), periods=meses, freq="M")
+
+    # El ruido se sortea del mes actual hacia atrás, así una ventana de 3 meses
+    # coincide con los 3 últimos valores de la ventana de 12
+    hace = np.arange(meses)[::-1]
+    ruido_ingresos = rng.uniform(-0.15, 0.15, meses)[hace]
+    ruido_gastos = rng.uniform(-0.1, 0.1, meses)[hace]
+
+    # Base referida a hace 11 meses, como en la ventana anual original
+    factor_crecimiento = (1 + tendencia) ** (11 - hace)
+    meses_del_anio = periodos.month.to_numpy()
+
+    ingresos = 15000 * factor_crecimiento * estacionalidad(meses_del_anio) * (1 + ruido_ingresos)
+    gastos = 12000 * factor_crecimiento * estacionalidad(meses_del_anio, 0.4) * (1 + ruido_gastos)
+
+    return list(periodos.strftime("%b")), ingresos.tolist(), gastos.tolist()
+
+
+# Uso: python -m finanzas.generadores --transacciones 1000000 --db /tmp/carga.db
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un libro de prueba para tests de carga")
+    parser.add_argument("--transacciones", type=int, default=1_000_000)
+    parser.add_argument("--facturas", type=int, default=10_000)
+    parser.add_argument("--dias", type=int, default=5 * 365)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--db", help="Ruta del almacén SQLite a poblar (opcional)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    transacciones = generar_transacciones(args.transacciones, dias=args.dias, semilla=args.semilla)
+    facturas = generar_facturas(args.facturas, dias=args.dias, semilla=args.semilla)
+    print(f"Generadas {len(transacciones):,} transacciones y {len(facturas):,} facturas en {time.perf_counter() - inicio:.2f} s")
+
+    if args.db:
+        from finanzas.almacen import AlmacenLibro
+
+        inicio = time.perf_counter()
+        almacen = AlmacenLibro(args.db)
+        almacen.insertar_transacciones(transacciones)
+        almacen.insertar_facturas(facturas)
+        print(f"Insertadas en {args.db} en {time.perf_counter() - inicio:.2f} s")
@@ -0,0 +1,131 @@
+# Figuras de plotly ligeras para el navegador
+#
+# Las series largas se reducen en el servidor al ancho en píxeles del gráfico
+# con LTTB (Largest-Triangle-Three-Buckets). Se elige un punto por cubo, el que
+# forma el triángulo de mayor área con sus vecinos, así que se conservan picos y
+# valles enviando una fracción de los puntos. Por encima de UMBRAL_WEBGL puntos
+# por traza se dibuja con scattergl. Las etiquetas de importe las formatea el
+# navegador (texttemplate) en lugar de enviarse como un texto por punto.
+#
+# Las figuras se guardan en una caché compartida por (gráfico, versión de los
+# datos, parámetros): un rerun que no cambia nada no vuelve a construirla.
+# Streamlit serializa la figura en cada rerun; lo que se ahorra es construirla
+# y el tamaño de lo que se serializa. Las figuras de la caché no se modifican.
+import argparse
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from finanzas.cache import obtener_cache
+from finanzas.formato import SEPARADOR_DECIMAL, SEPARADOR_MILES
+
+# Puntos por traza de un gráfico a todo el ancho y de uno en media columna
+ANCHO_COMPLETO = 1400
+ANCHO_MEDIO = 700
+UMBRAL_WEBGL = 1000
+# Separadores de plotly (decimal y miles) para que coincidan con Formato
+SEPARADORES = SEPARADOR_DECIMAL + SEPARADOR_MILES
+
+_FIGURAS = obtener_cache("finanzas.graficos.figuras", max_entradas=64, ttl=600)
+
+
+# Índices de los `puntos` puntos de `y` (equiespaciados) que elige LTTB
+def indices_lttb(y, puntos):
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+    # El primer y el último punto se conservan; el resto se reparte en puntos - 2 cubos
+    limites = np.linspace(1, n - 1, puntos - 1).astype(np.int64)
+    limites[-1] = n - 1
+    indices = np.empty(puntos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        # Vértice del triángulo en el cubo siguiente: su punto medio (el último punto en el último cubo)
+        siguiente_fin = limites[i + 2] if i + 2 < len(limites) else n
+        xm = (fin + siguiente_fin - 1) / 2
+        ym = y[fin:siguiente_fin].mean()
+        xa, ya = anterior, y[anterior]
+        areas = np.abs((xa - xm) * (y[inicio:fin] - ya) - (xa - np.arange(inicio, fin)) * (ym - ya))
+        anterior = indices[i + 1] = inicio + int(np.argmax(areas))
+    return indices
+
+
+# Reduce varias series que comparten el eje x a unos `puntos` en total; los
+# índices elegidos en cada serie se unen para que todas sigan alineadas
+def reducir(x, series, puntos):
+    if len(x) <= puntos:
+        return x, series
+    por_serie = max(3, puntos // len(series))
+    indices = np.unique(np.concatenate([indices_lttb(serie, por_serie) for serie in series]))
+    return np.asarray(x)[indices], [np.asarray(serie)[indices] for serie in series]
+
+
+# Trazas de línea sobre el mismo eje x: cada serie es (y, propiedades de go.Scatter)
+def trazas(x, series, puntos=ANCHO_COMPLETO):
+    x, valores = reducir(x, [y for y, _ in series], puntos)
+    clase = go.Scattergl if len(x) > UMBRAL_WEBGL else go.Scatter
+    return [clase(x=x, y=y, **propiedades) for y, (_, propiedades) in zip(valores, series)]
+
+
+# Plantilla de etiqueta con el importe de cada punto (con layout.separators = SEPARADORES)
+def plantilla_importe(formato, eje="y"):
+    return f"%{{{eje}:,.{formato.decimales}f}} {formato.simbolo}"
+
+
+# Figura de la caché compartida o, si no está, la que devuelve construir()
+def figura(clave, construir):
+    return _FIGURAS.obtener(clave, construir)
+
+
+# Uso: python -m finanzas.graficos --dias 1095
+if __name__ == "__main__":
+    import pandas as pd
+
+    from finanzas.formato import Formato
+
+    parser = argparse.ArgumentParser(description="Compara el tamaño y el coste de una figura con y sin reducir")
+    parser.add_argument("--dias", type=int, default=3 * 365)
+    parser.add_argument("--puntos", type=int, default=ANCHO_MEDIO)
+    args = parser.parse_args()
+
+    fechas = pd.date_range("2022-01-01", periods=args.dias, freq="D").strftime("%d-%m-%Y").to_numpy()
+    rng = np.random.default_rng(0)
+    ingresos, gastos = rng.gamma(2, 600, args.dias), rng.gamma(2, 550, args.dias)
+    saldo = np.cumsum(ingresos - gastos)
+    formato = Formato()
+
+    def completa():
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=fechas, y=ingresos, text=list(formato.importes(ingresos)), textposition="auto"))
+        fig.add_trace(go.Bar(x=fechas, y=gastos, text=list(formato.importes(gastos)), textposition="auto"))
+        fig.add_trace(go.Scatter(x=fechas, y=saldo, mode="lines+markers", fill="tozeroy"))
+        return fig
+
+    def reducida():
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=fechas, y=ingresos, texttemplate=plantilla_importe(formato), textposition="auto"))
+        fig.add_trace(go.Bar(x=fechas, y=gastos, texttemplate=plantilla_importe(formato), textposition="auto"))
+        fig.add_traces(trazas(fechas, [(saldo, dict(mode="lines+markers", fill="tozeroy"))], args.puntos))
+        fig.update_layout(separators=SEPARADORES)
+        return fig
+
+    for nombre, construir in (("completa", completa), ("reducida", reducida)):
+        inicio = time.perf_counter()
+        fig = construir()
+        construccion = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        texto = fig.to_json()
+        serializacion = time.perf_counter() - inicio
+        print(f"{nombre}: {len(texto) / 1024:.0f} KB · construir {construccion * 1000:.1f} ms · serializar {serializacion * 1000:.1f} ms")
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        figura(("benchmark", args.dias, args.puntos), reducida)
+    print(f"desde la caché: {(time.perf_counter() - inicio) * 10:.3f} ms por figura")
+    inicio = time.perf_counter()
+    indices = indices_lttb(saldo, args.puntos)
+    print(f"LTTB {args.dias} -> {len(indices)} puntos: {(time.perf_counter() - inicio) * 1000:.1f} ms")
@@ -0,0 +1,506 @@
+# Importación de extractos bancarios y libros contables antiguos
+#
+# Formatos: CSV (libros con tipo/categoría/cuenta o extractos con importe con
+# signo o columnas de cargo y abono), Norma 43 de la AEB (registros de ancho
+# fijo 11/22/23/33/88) y OFX. El fichero se lee por bloques de líneas o de
+# movimientos y cada bloque se valida con operaciones vectorizadas de pandas,
+# así que la memoria no depende del tamaño del fichero. Los duplicados se
+# reconocen por la huella de contenido de cada movimiento (ver
+# huellas_transacciones) comparando multiconjuntos: si una huella aparece k
+# veces en el fichero y m en el libro, sólo se insertan las k - m restantes.
+# Además se guarda la huella SHA-1 del fichero completo con la cuenta de destino
+# y el formato, de modo que volver a importar el mismo fichero con las mismas
+# opciones no vuelve a leerlo. Si la importación se corta a
+# medias, los bloques ya insertados se reconocen como duplicados al repetirla.
+import argparse
+import codecs
+import hashlib
+import io
+import itertools
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from finanzas.almacen import huellas_transacciones
+from finanzas.categorizacion import CATEGORIA_POR_DEFECTO, CATEGORIAS
+
+FORMATOS_IMPORTACION = {"csv": "CSV (libro o extracto)", "n43": "Norma 43 (AEB)", "ofx": "OFX"}
+EXTENSIONES_IMPORTACION = ["csv", "txt", "n43", "aeb", "q43", "ofx", "qfx"]
+TAMANO_BLOQUE = 50_000
+MAX_MUESTRA_RECHAZOS = 1000
+TIPOS_VALIDOS = ("Ingreso", "Gasto")
+_TIPO_CATEGORIA = {categoria: tipo for tipo, categorias in CATEGORIAS.items() for categoria in categorias}
+
+# Cabeceras CSV reconocidas (en minúsculas y sin acentos ni signos)
+ALIAS_CSV = {
+    "fecha": ("fecha", "fecha operacion", "f operacion", "fecha contable", "fecha movimiento", "date"),
+    "descripcion": ("descripcion", "concepto", "detalle", "movimiento", "description", "memo"),
+    "monto": ("monto", "importe", "cantidad", "importe eur", "amount"),
+    "cargo": ("cargo", "cargos", "debe"),
+    "abono": ("abono", "abonos", "haber"),
+    "tipo": ("tipo",),
+    "categoria": ("categoria",),
+    "cuenta": ("cuenta",),
+}
+FORMATOS_FECHA_CSV = ("%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y", "%d.%m.%Y")
+
+# Conceptos comunes de la Norma 43, para movimientos sin registro 23
+CONCEPTOS_NORMA43 = {
+    "01": "Talones - reintegros", "02": "Abonarés - entregas - ingresos", "03": "Domiciliados - recibos - letras",
+    "04": "Giros - transferencias - traspasos", "05": "Amortización préstamos", "06": "Remesas efectos",
+    "07": "Suscripciones - dividendos", "08": "Dividendos - cupones", "09": "Operaciones de bolsa",
+    "10": "Cheques gasolina", "11": "Cajeros automáticos", "12": "Tarjetas de crédito - débito",
+    "13": "Operaciones con el extranjero", "14": "Devoluciones e impagados", "15": "Nóminas - seguros sociales",
+    "16": "Timbres - corretaje - póliza", "17": "Intereses - comisiones - gastos", "98": "Anulaciones",
+    "99": "Varios",
+}
+
+_MOVIMIENTO_OFX = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+_BLOQUEO_IMPORTACION = threading.Lock()
+
+
+def _normalizar_cabecera(texto):
+    texto = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", texto.lower()).strip()
+
+
+# Fichero abierto en binario desde una ruta o un objeto (st.file_uploader)
+class _Fuente:
+    def __init__(self, fuente):
+        self._propio = isinstance(fuente, (str, os.PathLike))
+        self.binario = open(fuente, "rb") if self._propio else fuente
+
+    def __enter__(self):
+        self.binario.seek(0)
+        return self.binario
+
+    def __exit__(self, *excepcion):
+        if self._propio:
+            self.binario.close()
+
+
+# Huella SHA-1, tamaño y codificación (UTF-8 o, si no lo es, Windows-1252) en una sola pasada
+def _huella_fichero(binario, bloque=1 << 20):
+    sha1 = hashlib.sha1()
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    codificacion = "utf-8-sig"
+    tamano = 0
+    while True:
+        datos = binario.read(bloque)
+        if not datos:
+            break
+        sha1.update(datos)
+        tamano += len(datos)
+        if codificacion == "utf-8-sig":
+            try:
+                decodificador.decode(datos)
+            except UnicodeDecodeError:
+                codificacion = "cp1252"
+    binario.seek(0)
+    return sha1.hexdigest(), tamano, codificacion
+
+
+def _inicio_texto(binario, codificacion, bytes_=1 << 16):
+    inicio = binario.read(bytes_)
+    binario.seek(0)
+    return inicio.decode(codificacion, errors="ignore")
+
+
+def detectar_formato(inicio, nombre=""):
+    extension = os.path.splitext(nombre)[1].lower().lstrip(".")
+    cabecera = inicio.lstrip()[:4096].upper()
+    if extension in ("ofx", "qfx") or cabecera.startswith("OFXHEADER") or "<OFX>" in cabecera:
+        return "ofx"
+    primera = inicio.lstrip("﻿").split("\n", 1)[0].rstrip("\r")
+    if extension in ("n43", "aeb", "q43") or (len(primera) == 80 and primera[:2] == "11" and primera[2:20].strip().isdigit()):
+        return "n43"
+    return "csv"
+
+
+# Importes en texto con coma o punto decimal ("1.234,56", "-1,234.56", "12,5 €")
+def _importes(serie):
+    texto = serie.astype(str).str.replace(r"[^\d,.\-+]", "", regex=True)
+    coma_decimal = texto.str.rfind(",") > texto.str.rfind(".")
+    europeo = texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    anglosajon = texto.str.replace(",", "", regex=False)
+    return pd.to_numeric(europeo.where(coma_decimal, anglosajon), errors="coerce")
+
+
+# Fechas en los formatos habituales: cada formato sólo se prueba con las que siguen sin leer
+def _fechas(serie, formatos=FORMATOS_FECHA_CSV):
+    texto = serie.astype(str).str.strip().str[:10]
+    fechas = pd.Series(pd.NaT, index=serie.index, dtype="datetime64[ns]")
+    for formato in formatos:
+        pendientes = fechas.isna()
+        if not pendientes.any():
+            break
+        fechas[pendientes] = pd.to_datetime(texto[pendientes], format=formato, errors="coerce")
+    return fechas
+
+
+# Columna de texto opcional: celdas vacías (o columna ausente) como nulos
+def _opcional(bloque, columna):
+    if columna not in bloque:
+        return pd.Series(None, index=bloque.index, dtype=object)
+    valores = bloque[columna].str.strip()
+    return valores.mask(valores == "")
+
+
+# Lectores: cada uno produce bloques con las columnas linea, fecha (datetime),
+# descripcion, monto (con signo si no hay tipo), tipo, categoria y cuenta (o None)
+def _leer_csv(texto, inicio, tamano_bloque):
+    lineas = inicio.lstrip("﻿").splitlines()[:50]
+    if not lineas:
+        return
+    # Los extractos suelen traer unas líneas de cabecera antes de la tabla
+    fila_cabecera, separador, columnas = None, ",", {}
+    for numero, linea in enumerate(lineas):
+        separador = max([";", ",", "\t", "|"], key=linea.count)
+        campos = [_normalizar_cabecera(c) for c in linea.split(separador)]
+        if any(c in ALIAS_CSV["fecha"] for c in campos):
+            fila_cabecera = numero
+            for campo, original in zip(campos, linea.split(separador)):
+                for destino, alias in ALIAS_CSV.items():
+                    if campo in alias and destino not in columnas:
+                        columnas[destino] = original.strip().strip('"').lstrip("﻿")
+            break
+    if fila_cabecera is None or not ("monto" in columnas or "cargo" in columnas or "abono" in columnas):
+        raise ValueError("No se reconocen las columnas del CSV: se necesitan al menos una fecha y un importe (o cargo y abono)")
+
+    lector = pd.read_csv(
+        texto, sep=separador, skiprows=fila_cabecera, dtype=str, keep_default_na=False,
+        skipinitialspace=True, chunksize=tamano_bloque, usecols=list(columnas.values()),
+    )
+    for bloque in lector:
+        bloque = bloque.rename(columns={v: k for k, v in columnas.items()})
+        if "monto" in bloque:
+            monto = _importes(bloque["monto"])
+        else:
+            vacio = pd.Series(np.nan, index=bloque.index)
+            cargo = _importes(bloque["cargo"]).abs() if "cargo" in bloque else vacio
+            abono = _importes(bloque["abono"]).abs() if "abono" in bloque else vacio
+            # Ni cargo ni abono legibles: importe no válido
+            monto = (abono.fillna(0) - cargo.fillna(0)).mask(cargo.isna() & abono.isna())
+        yield pd.DataFrame({
+            "linea": bloque.index.to_numpy() + fila_cabecera + 2,
+            "fecha": _fechas(bloque["fecha"]),
+            "descripcion": bloque["descripcion"] if "descripcion" in bloque else "",
+            "monto": monto,
+            "tipo": _opcional(bloque, "tipo").str.capitalize(),
+            "categoria": _opcional(bloque, "categoria"),
+            "cuenta": _opcional(bloque, "cuenta"),
+        })
+
+
+# Registros de ancho fijo como matriz de caracteres (líneas × 80): los campos
+# se cortan por columnas sin recorrer las líneas en Python
+def _matriz_registros(lineas):
+    matriz = np.array(lineas, dtype="U80").view("U1").reshape(len(lineas), 80)
+    matriz[(matriz == "\r") | (matriz == "\n")] = ""
+    return matriz
+
+
+def _campo(matriz, inicio, fin):
+    return np.ascontiguousarray(matriz[:, inicio:fin]).view(f"U{fin - inicio}").ravel()
+
+
+# Campo numérico: entero por fila (sólo dígitos) y máscara de filas válidas
+def _digitos(matriz, inicio, fin):
+    digitos = np.ascontiguousarray(matriz[:, inicio:fin]).view(np.uint32) - ord("0")
+    validos = (digitos <= 9).all(axis=1)
+    return digitos.astype(np.int64) @ 10 ** np.arange(fin - inicio - 1, -1, -1, dtype=np.int64), validos
+
+
+def _movimientos_norma43(matriz, primera_linea):
+    codigo = _campo(matriz, 0, 2)
+    es_movimiento = codigo == "22"
+    grupo = np.cumsum(es_movimiento)
+    movimientos = matriz[es_movimiento]
+    grupos = grupo[es_movimiento]
+
+    # Registros 23: hasta cinco conceptos complementarios (2 × 38 caracteres) del
+    # movimiento anterior; se concatenan por orden de aparición
+    es_complemento = (codigo == "23") & (grupo > 0)
+    complementos = matriz[es_complemento]
+    textos = (pd.Series(_campo(complementos, 4, 42)).str.strip() + " " + pd.Series(_campo(complementos, 42, 80)).str.strip()).str.strip()
+    grupo_complemento = grupo[es_complemento]
+    orden = pd.Series(grupo_complemento).groupby(grupo_complemento).cumcount().to_numpy()
+    descripcion = pd.Series(None, index=grupos, dtype=object)
+    for posicion in range(orden.max() + 1 if len(orden) else 0):
+        parte = pd.Series(textos.to_numpy()[orden == posicion], index=grupo_complemento[orden == posicion]).reindex(grupos)
+        descripcion = descripcion.where(parte.isna(), (descripcion + " " + parte).fillna(parte))
+    descripcion = pd.Series(descripcion.to_numpy(), dtype=object)
+
+    referencia = pd.Series(_campo(movimientos, 52, 80)).str.strip()
+    comun = pd.Series(_campo(movimientos, 22, 24)).map(CONCEPTOS_NORMA43)
+    descripcion = descripcion.fillna(referencia.where(referencia != "", comun)).fillna("")
+    centimos, importe_valido = _digitos(movimientos, 28, 42)
+    fecha, fecha_valida = _digitos(movimientos, 10, 16)
+    fechas = pd.to_datetime(
+        {"year": 2000 + fecha // 10000, "month": fecha // 100 % 100, "day": fecha % 100}, errors="coerce"
+    ).where(fecha_valida)
+    return pd.DataFrame({
+        "linea": np.flatnonzero(es_movimiento) + primera_linea + 1,
+        "fecha": fechas,
+        "descripcion": descripcion,
+        "monto": np.where(importe_valido, centimos / 100, np.nan),
+        # Clave 1 = debe (cargo), 2 = haber (abono)
+        "tipo": pd.Series(_campo(movimientos, 27, 28)).map({"1": "Gasto", "2": "Ingreso"}),
+        "categoria": None,
+        "cuenta": None,
+    })
+
+
+def _leer_norma43(texto, tamano_bloque):
+    pendientes = []
+    primera_linea = 0
+    while True:
+        nuevas = list(itertools.islice(texto, tamano_bloque))
+        lineas = pendientes + nuevas
+        if not lineas:
+            return
+        matriz = _matriz_registros(lineas)
+        corte = len(lineas)
+        if nuevas:
+            # El último movimiento del bloque puede tener registros 23 en el siguiente
+            ultimos = np.flatnonzero(_campo(matriz, 0, 2) == "22")
+            corte = int(ultimos[-1]) if len(ultimos) else corte
+        if corte:
+            yield _movimientos_norma43(matriz[:corte], primera_linea)
+        pendientes = lineas[corte:]
+        primera_linea += corte
+        if not nuevas:
+            return
+
+
+def _movimientos_ofx(bloques, primer_numero):
+    bloques = pd.Series(bloques, dtype=object)
+
+    def campo(etiqueta):
+        valores = bloques.str.extract(rf"<{etiqueta}>([^<\r\n]*)", flags=re.I, expand=False).str.strip()
+        return valores.str.replace("&amp;", "&", regex=False).str.replace("&lt;", "<", regex=False).str.replace("&gt;", ">", regex=False)
+
+    nombre = campo("NAME").fillna("")
+    memo = campo("MEMO").fillna("")
+    return pd.DataFrame({
+        # En OFX no hay líneas: se numeran los movimientos
+        "linea": np.arange(primer_numero, primer_numero + len(bloques)),
+        "fecha": pd.to_datetime(campo("DTPOSTED").str[:8], format="%Y%m%d", errors="coerce"),
+        "descripcion": (nombre + " " + memo.where(memo != nombre, "")).str.strip(),
+        "monto": pd.to_numeric(campo("TRNAMT").str.replace(",", ".", regex=False), errors="coerce"),
+        "tipo": None,
+        "categoria": None,
+        "cuenta": None,
+    })
+
+
+def _leer_ofx(texto, tamano_bloque, caracteres=1 << 20):
+    resto = ""
+    bloques = []
+    numero = 1
+    while True:
+        leido = texto.read(caracteres)
+        resto += leido
+        final = 0
+        for coincidencia in _MOVIMIENTO_OFX.finditer(resto):
+            bloques.append(coincidencia.group(1))
+            final = coincidencia.end()
+        resto = resto[final:]
+        if len(bloques) >= tamano_bloque or (not leido and bloques):
+            yield _movimientos_ofx(bloques, numero)
+            numero += len(bloques)
+            bloques = []
+        if not leido:
+            return
+
+
+# Validación vectorizada: tipo e importe positivo a partir del signo cuando el
+# fichero no trae tipo, valores por defecto y motivo de rechazo de cada fila
+def _validar(crudo, cuenta):
+    firmado = crudo["tipo"].isna()
+    tipo = crudo["tipo"].where(~firmado, np.where(crudo["monto"] < 0, "Gasto", "Ingreso"))
+    monto = crudo["monto"].abs()
+    # Los extractos no traen categoría: la por defecto, o la del categorizador al
+    # importar. Una categoría que no es del tipo del movimiento (p. ej. de otro
+    # programa) se trata igual que una que falta.
+    automatica = crudo["categoria"].map(_TIPO_CATEGORIA) != tipo
+    categoria = crudo["categoria"].mask(automatica, tipo.map(CATEGORIA_POR_DEFECTO))
+    descripcion = crudo["descripcion"].astype(str).str.strip()
+    descripcion = descripcion.where(descripcion != "", tipo.astype(str) + " - " + categoria.astype(str))
+
+    motivo = pd.Series(None, index=crudo.index, dtype=object)
+    motivo = motivo.mask(crudo["monto"] == 0, "Importe cero")
+    motivo = motivo.mask(~tipo.isin(TIPOS_VALIDOS), "Tipo desconocido")
+    motivo = motivo.mask(crudo["monto"].isna(), "Importe no válido")
+    motivo = motivo.mask(crudo["fecha"].isna(), "Fecha no válida")
+    validas = motivo.isna().to_numpy()
+
+    datos = pd.DataFrame({
+        "fecha": crudo["fecha"].to_numpy().astype("datetime64[D]").astype(str),
+        "descripcion": descripcion,
+        "tipo": tipo,
+        "categoria": categoria,
+        "cuenta": crudo["cuenta"].fillna(cuenta),
+        "monto": monto.round(2),
+        "categoria_auto": automatica,
+    })[validas]
+    rechazos = pd.DataFrame({"linea": crudo["linea"], "motivo": motivo})[~validas]
+    return datos.reset_index(drop=True), rechazos
+
+
+# Importa `fuente` (ruta o fichero abierto en binario) en el libro. `cuenta` es la
+# cuenta de destino de los movimientos que no traen una. Devuelve un resumen con
+# las filas leídas, insertadas, duplicadas y rechazadas (y una muestra de los
+# rechazos); `repetida` indica que el mismo fichero ya se había importado. Con
+# `categorizador`, las filas sin categoría propia que entran en el libro reciben
+# la que sugiere (ver finanzas.categorizacion).
+def importar(almacen, fuente, nombre="", formato=None, cuenta="Cuenta Principal", progreso=None, tamano_bloque=TAMANO_BLOQUE,
+             categorizador=None):
+    inicio_reloj = time.perf_counter()
+    with _BLOQUEO_IMPORTACION, _Fuente(fuente) as binario:
+        huella, tamano, codificacion = _huella_fichero(binario)
+        inicio = _inicio_texto(binario, codificacion)
+        formato = formato or detectar_formato(inicio, nombre)
+        anterior = almacen.importacion(huella, cuenta, formato)
+        if anterior is not None:
+            return {**anterior, "repetida": True, "rechazos": pd.DataFrame(columns=["linea", "motivo"]),
+                    "segundos": time.perf_counter() - inicio_reloj}
+
+        texto = io.TextIOWrapper(binario, encoding=codificacion, errors="replace", newline="")
+        try:
+            if formato == "csv":
+                lector = _leer_csv(texto, inicio, tamano_bloque)
+            elif formato == "n43":
+                lector = _leer_norma43(texto, tamano_bloque)
+            elif formato == "ofx":
+                lector = _leer_ofx(texto, tamano_bloque)
+            else:
+                raise ValueError(f"Formato de importación desconocido: {formato}")
+
+            leidas = insertadas = duplicadas = rechazadas = categorizadas = 0
+            muestra = []
+            # Apariciones de cada huella en el libro antes de importar y en lo leído del fichero
+            en_libro = pd.Series(dtype=np.int64)
+            en_fichero = pd.Series(dtype=np.int64)
+            for crudo in lector:
+                datos, rechazos = _validar(crudo, cuenta)
+                leidas += len(crudo)
+                rechazadas += len(rechazos)
+                if len(muestra) < MAX_MUESTRA_RECHAZOS and len(rechazos):
+                    muestra.append(rechazos.head(MAX_MUESTRA_RECHAZOS - len(muestra)))
+
+                huellas = huellas_transacciones(datos)
+                nuevas = np.setdiff1d(huellas, en_libro.index.to_numpy())
+                if len(nuevas):
+                    en_libro = pd.concat([en_libro, almacen.contar_huellas(nuevas).reindex(nuevas, fill_value=0)])
+                # Ocurrencia k-ésima de cada huella en el fichero: entra si el libro tiene menos de k
+                ocurrencia = pd.Series(huellas).groupby(huellas).cumcount().to_numpy() + en_fichero.reindex(huellas, fill_value=0).to_numpy()
+                entran = ocurrencia >= en_libro.reindex(huellas).to_numpy()
+                en_fichero = en_fichero.add(pd.Series(huellas).value_counts(), fill_value=0).astype(np.int64)
+
+                if entran.any():
+                    datos = datos.assign(huella=huellas)[entran]
+                    automaticas = datos["categoria_auto"].to_numpy()
+                    if categorizador is not None and automaticas.any():
+                        sugeridas = categorizador.categorizar(datos["descripcion"][automaticas], datos["tipo"][automaticas])
+                        datos.loc[automaticas, "categoria"] = sugeridas["categoria"].to_numpy()
+                        categorizadas += int((sugeridas["origen"] != "por defecto").sum())
+                    insertadas += almacen.insertar_transacciones(datos, tamano_lote=tamano_bloque)
+                duplicadas += int((~entran).sum())
+                if progreso is not None and tamano:
+                    progreso(min(binario.tell() / tamano, 1.0), f"{leidas:,} filas leídas".replace(",", "."))
+        finally:
+            texto.detach()
+
+        almacen.registrar_importacion(huella, cuenta, nombre, formato, leidas, insertadas, duplicadas, rechazadas)
+    return {
+        "huella": huella,
+        "cuenta": cuenta,
+        "nombre": nombre,
+        "formato": formato,
+        "leidas": leidas,
+        "insertadas": insertadas,
+        "duplicadas": duplicadas,
+        "rechazadas": rechazadas,
+        "categorizadas": categorizadas,
+        "rechazos": pd.concat(muestra, ignore_index=True) if muestra else pd.DataFrame(columns=["linea", "motivo"]),
+        "repetida": False,
+        "segundos": time.perf_counter() - inicio_reloj,
+    }
+
+
+# Ficheros de ejemplo para el banco de pruebas
+def escribir_ejemplo(ruta, formato, movimientos, semilla=43):
+    rng = np.random.default_rng(semilla)
+    fechas = pd.Timestamp("2020-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 1460, movimientos)), unit="D")
+    importes = np.round(rng.uniform(-2000, 3000, movimientos), 2)
+    importes[importes == 0] = 1.0
+    conceptos = np.array(["RECIBO LUZ", "TRANSFERENCIA CLIENTE", "PAGO TARJETA", "NOMINA", "ALQUILER LOCAL", "CUOTA SOFTWARE"])
+    descripcion = pd.Series(conceptos[rng.integers(0, len(conceptos), movimientos)]) + " " + pd.Series(rng.integers(0, 10**6, movimientos)).astype(str)
+    with open(ruta, "w", encoding="utf-8", newline="") as fichero:
+        for inicio in range(0, movimientos, TAMANO_BLOQUE):
+            tramo = slice(inicio, inicio + TAMANO_BLOQUE)
+            f, i, d = fechas[tramo], importes[tramo], descripcion[tramo]
+            if formato == "csv":
+                if inicio == 0:
+                    fichero.write("Fecha;Concepto;Importe\n")
+                importe = pd.Series(i).map("{:.2f}".format).str.replace(".", ",", regex=False)
+                fichero.write("\n".join(f.strftime("%d/%m/%Y") + ";" + d.to_numpy() + ";" + importe.to_numpy()) + "\n")
+            elif formato == "n43":
+                if inicio == 0:
+                    fichero.write("11" + "0049" + "1500" + "0123456789" + "200101" + "231231" + "2" + "0" * 14 + "978" + "3" + "EMPRESA EJEMPLO".ljust(26) + "   \n")
+                centimos = pd.Series(np.abs(np.round(i * 100)).astype(np.int64)).astype(str).str.zfill(14)
+                clave = np.where(i < 0, "1", "2")
+                r22 = ("22" + "    " + "1500" + f.strftime("%y%m%d") + f.strftime("%y%m%d") + "99" + "000" + clave
+                       + centimos.to_numpy() + "0" * 10 + " " * 12 + " " * 16)
+                r23 = "23" + "01" + d.str.ljust(38).str[:38].to_numpy() + " " * 38
+                fichero.write("\n".join(np.ravel(np.column_stack([r22, r23]))) + "\n")
+            else:
+                if inicio == 0:
+                    fichero.write("OFXHEADER:100\nDATA:OFXSGML\nVERSION:102\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n")
+                importe = pd.Series(i).map("{:.2f}".format)
+                fichero.write("\n".join(
+                    "<STMTTRN><TRNTYPE>OTHER<DTPOSTED>" + f.strftime("%Y%m%d") + "<TRNAMT>" + importe.to_numpy()
+                    + "<NAME>" + d.to_numpy() + "</STMTTRN>"
+                ) + "\n")
+        if formato == "n43":
+            fichero.write("33" + " " * 78 + "\n88" + "9" * 18 + " " * 60 + "\n")
+        elif formato == "ofx":
+            fichero.write("</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n")
+
+
+# Uso: python -m finanzas.importacion --formato n43 --movimientos 250000
+if __name__ == "__main__":
+    import resource
+
+    from finanzas.almacen import AlmacenLibro
+
+    parser = argparse.ArgumentParser(description="Mide la importación de un extracto y su reimportación")
+    parser.add_argument("--formato", choices=list(FORMATOS_IMPORTACION), default="csv")
+    parser.add_argument("--movimientos", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, f"extracto.{args.formato}")
+        escribir_ejemplo(ruta, args.formato, args.movimientos)
+        with open(ruta, "rb") as fichero:
+            lineas = sum(bloque.count(b"\n") for bloque in iter(lambda: fichero.read(1 << 20), b""))
+        print(f"{lineas:,} líneas, {os.path.getsize(ruta) / 2**20:.0f} MB")
+        almacen = AlmacenLibro(os.path.join(directorio, "libro.db"))
+        for intento in ("primera", "repetida"):
+            resultado = importar(almacen, ruta, nombre=os.path.basename(ruta))
+            print(f"  importación {intento}: {resultado['segundos']:.2f} s · {resultado['insertadas']:,} insertadas, "
+                  f"{resultado['duplicadas']:,} duplicadas, {resultado['rechazadas']:,} rechazadas")
+        # Fichero distinto con el mismo contenido: no se reconoce el fichero pero sí cada movimiento
+        with open(ruta, "a", encoding="utf-8") as fichero:
+            fichero.write("\n")
+        resultado = importar(almacen, ruta, nombre=os.path.basename(ruta))
+        print(f"  mismo contenido, otro fichero: {resultado['segundos']:.2f} s · {resultado['insertadas']:,} insertadas, "
+              f"{resultado['duplicadas']:,} duplicadas")
+        print(f"  memoria máxima del proceso: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
@@ -0,0 +1,209 @@
+# Liquidaciones trimestrales de IVA (modelo 303) y retenciones de IRPF
+# (modelos 111 y 115) a partir de las facturas y los gastos del libro
+#
+# Ninguna liquidación recorre facturas ni transacciones: el IVA repercutido sale
+# del agregado por mes de emisión y tipo que el almacén mantiene con cada alta
+# de facturas (a partir de sus conceptos), y el soportado y las retenciones de
+# los totales mensuales de gasto por categoría, que se actualizan con cada
+# transacción. Cada categoría de gasto tiene un tipo de IVA deducible y, si
+# procede, una retención (nóminas, alquileres); el importe del libro es lo
+# pagado, base + IVA - retención, y de ahí se despeja la base.
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.agregados import resumen_rango
+from finanzas.almacen import IVA_GENERAL, version_libro
+from finanzas.cache import memoizar
+
+TIPOS_IVA = (0, 4, 10, 21)
+# Tipo de IVA deducible de cada categoría de gasto (las que no están, al tipo general)
+IVA_GASTOS_POR_DEFECTO = {
+    "Suministros": 21,
+    "Alquiler": 21,
+    "Salarios": 0,
+    "Marketing": 21,
+    "Software": 21,
+    "Equipamiento": 21,
+    "Seguros": 0,
+    "Impuestos": 0,
+    "Otros": 21,
+}
+# Retención de IRPF que se practica en cada categoría de gasto (las que no están, ninguna)
+RETENCIONES_POR_DEFECTO = {"Salarios": 15, "Alquiler": 19}
+TIPO_SOCIEDADES = 25
+TRIMESTRES = ("Primer trimestre", "Segundo trimestre", "Tercer trimestre", "Cuarto trimestre")
+# Plazo de presentación de cada trimestre: (mes, día) del año siguiente al cierre en el cuarto
+PLAZOS_IVA = ((4, 20), (7, 20), (10, 20), (1, 30))
+PLAZOS_RETENCIONES = ((4, 20), (7, 20), (10, 20), (1, 20))
+PLAZO_SOCIEDADES = (7, 25)
+
+
+# Tipos por categoría de gasto: los guardados en preferencias sobre los de por defecto
+def tipos_categorias(preferencias=None):
+    preferencias = preferencias or {}
+    return (
+        {**IVA_GASTOS_POR_DEFECTO, **(preferencias.get("iva_gastos") or {})},
+        {**RETENCIONES_POR_DEFECTO, **(preferencias.get("retenciones_irpf") or {})},
+    )
+
+
+def _fecha_limite(ano, trimestre, plazos):
+    mes, dia = plazos[trimestre - 1]
+    return pd.Timestamp(ano + (trimestre == 4), mes, dia)
+
+
+# Bases y cuotas del año por trimestre: repercutido por tipo de IVA, soportado
+# por tipo de IVA y retenciones (en `cuota`, con su base)
+@memoizar(ttl=300, version=version_libro)
+def desglose_impuestos(almacen, ano, iva_gastos=None, retenciones=None):
+    iva_gastos = {**IVA_GASTOS_POR_DEFECTO, **(iva_gastos or {})}
+    retenciones = {**RETENCIONES_POR_DEFECTO, **(retenciones or {})}
+    desde, hasta = f"{ano}-01", f"{ano}-12"
+
+    repercutido = almacen.iva_repercutido(desde_mes=desde, hasta_mes=hasta)
+    repercutido = pd.DataFrame({
+        "trimestre": (repercutido["mes"].str[5:7].astype(int) - 1) // 3 + 1,
+        "clase": "repercutido",
+        "iva_porcentaje": repercutido["iva_porcentaje"].to_numpy(),
+        "base": repercutido["base"].to_numpy(),
+        "cuota": repercutido["cuota"].to_numpy(),
+    })
+
+    gastos = almacen.totales_mensuales(desde_mes=desde, hasta_mes=hasta, por=("categoria",))
+    gastos = gastos[gastos["tipo"] == "Gasto"]
+    iva = gastos["categoria"].map(iva_gastos).fillna(IVA_GENERAL).to_numpy(dtype=np.float64)
+    retencion = gastos["categoria"].map(retenciones).fillna(0).to_numpy(dtype=np.float64)
+    base = gastos["total"].to_numpy() / (1 + (iva - retencion) / 100)
+    trimestre = (gastos["mes"].str[5:7].astype(int).to_numpy() - 1) // 3 + 1
+    soportado = pd.DataFrame({"trimestre": trimestre, "clase": "soportado", "iva_porcentaje": iva, "base": base, "cuota": base * iva / 100})
+    retenido = pd.DataFrame({"trimestre": trimestre, "clase": "retenciones", "iva_porcentaje": 0.0, "base": base, "cuota": base * retencion / 100})
+    retenido = retenido[retencion > 0]
+
+    return (
+        pd.concat([repercutido, soportado, retenido], ignore_index=True)
+        .groupby(["trimestre", "clase", "iva_porcentaje"], as_index=False)[["base", "cuota"]].sum()
+    )
+
+
+# Liquidación de cada trimestre del año: IVA repercutido, soportado y a
+# ingresar (negativo: a compensar) y retenciones a ingresar
+@memoizar(ttl=300, version=version_libro)
+def liquidaciones_trimestrales(almacen, ano, iva_gastos=None, retenciones=None):
+    desglose = desglose_impuestos(almacen, ano, iva_gastos, retenciones)
+    totales = desglose.pivot_table(index="trimestre", columns="clase", values=["base", "cuota"], aggfunc="sum")
+    totales = totales.reindex(index=range(1, 5), columns=pd.MultiIndex.from_product(
+        [["base", "cuota"], ["repercutido", "soportado", "retenciones"]]
+    )).fillna(0.0)
+    liquidaciones = pd.DataFrame({
+        "trimestre": range(1, 5),
+        "periodo": TRIMESTRES,
+        "base_repercutido": totales["base", "repercutido"].to_numpy(),
+        "repercutido": totales["cuota", "repercutido"].to_numpy(),
+        "base_soportado": totales["base", "soportado"].to_numpy(),
+        "soportado": totales["cuota", "soportado"].to_numpy(),
+        "base_retenciones": totales["base", "retenciones"].to_numpy(),
+        "retenciones": totales["cuota", "retenciones"].to_numpy(),
+    })
+    liquidaciones["iva"] = liquidaciones["repercutido"] - liquidaciones["soportado"]
+    return liquidaciones
+
+
+# Modelo 303 de un trimestre: base y cuota repercutida y soportada por tipo de IVA
+def detalle_iva(almacen, ano, trimestre, iva_gastos=None, retenciones=None):
+    desglose = desglose_impuestos(almacen, ano, iva_gastos, retenciones)
+    desglose = desglose[(desglose["trimestre"] == trimestre) & (desglose["clase"] != "retenciones")]
+    tabla = desglose.pivot_table(index="iva_porcentaje", columns="clase", values=["base", "cuota"], aggfunc="sum")
+    tipos = sorted(set(TIPOS_IVA) | set(desglose["iva_porcentaje"]))
+    tabla = tabla.reindex(index=tipos, columns=pd.MultiIndex.from_product([["base", "cuota"], ["repercutido", "soportado"]])).fillna(0.0)
+    return pd.DataFrame({
+        "iva_porcentaje": tipos,
+        "base_repercutido": tabla["base", "repercutido"].to_numpy(),
+        "repercutido": tabla["cuota", "repercutido"].to_numpy(),
+        "base_soportado": tabla["base", "soportado"].to_numpy(),
+        "soportado": tabla["cuota", "soportado"].to_numpy(),
+    })
+
+
+# Calendario fiscal del año: IVA y retenciones por trimestre e Impuesto de
+# Sociedades del ejercicio anterior, con su plazo y estado a fecha `hoy`
+@memoizar(ttl=300, version=version_libro)
+def calendario_fiscal(almacen, ano, hoy=None, iva_gastos=None, retenciones=None):
+    hoy = pd.Timestamp(hoy if hoy is not None else pd.Timestamp.now()).normalize()
+    liquidaciones = liquidaciones_trimestrales(almacen, ano, iva_gastos, retenciones)
+    cierres = [pd.Timestamp(ano, 3 * t, 1) + pd.offsets.MonthEnd(0) for t in range(1, 5)]
+
+    filas = []
+    for impuesto, columna, plazos in (("IVA", "iva", PLAZOS_IVA), ("Retenciones IRPF", "retenciones", PLAZOS_RETENCIONES)):
+        for t, periodo, importe, cierre in zip(liquidaciones["trimestre"], liquidaciones["periodo"], liquidaciones[columna], cierres):
+            filas.append((impuesto, periodo, _fecha_limite(ano, t, plazos), cierre, importe))
+    resultado = resumen_rango(almacen, pd.Timestamp(ano - 1, 1, 1), pd.Timestamp(ano - 1, 12, 31))["beneficio"]
+    filas.append((
+        "Impuesto de Sociedades", f"Ejercicio {ano - 1}", pd.Timestamp(ano, *PLAZO_SOCIEDADES),
+        pd.Timestamp(ano - 1, 12, 31), max(resultado, 0.0) * TIPO_SOCIEDADES / 100,
+    ))
+
+    calendario = pd.DataFrame(filas, columns=["impuesto", "periodo", "fecha_limite", "cierre", "importe"])
+    calendario["estado"] = np.select(
+        [calendario["cierre"] >= hoy, calendario["fecha_limite"] >= hoy], ["En curso", "Pendiente"], "Presentado"
+    )
+    return calendario.sort_values(["impuesto", "fecha_limite"], kind="stable").reset_index(drop=True)
+
+
+# Próximo plazo fiscal desde `hoy` (incluido el cuarto trimestre del año
+# anterior, que vence en enero): fecha límite, importe e impuestos, o None
+def proximo_impuesto(almacen, hoy=None, iva_gastos=None, retenciones=None):
+    hoy = pd.Timestamp(hoy if hoy is not None else pd.Timestamp.now()).normalize()
+    calendario = pd.concat([
+        calendario_fiscal(almacen, ano, hoy, iva_gastos, retenciones) for ano in (hoy.year - 1, hoy.year)
+    ])
+    proximos = calendario[calendario["fecha_limite"] >= hoy]
+    if proximos.empty:
+        return None
+    fecha = proximos["fecha_limite"].min()
+    plazo = proximos[proximos["fecha_limite"] == fecha]
+    return {"fecha_limite": fecha, "importe": float(plazo["importe"].sum()), "impuestos": plazo["impuesto"].tolist()}
+
+
+# Uso: python -m finanzas.impuestos --transacciones 1000000 --facturas 200000
+if __name__ == "__main__":
+    from finanzas.almacen import AlmacenLibro
+    from finanzas.generadores import generar_facturas, generar_transacciones
+
+    parser = argparse.ArgumentParser(description="Mide las liquidaciones de IVA y retenciones")
+    parser.add_argument("--transacciones", type=int, default=1_000_000)
+    parser.add_argument("--facturas", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenLibro(os.path.join(directorio, "impuestos.db"))
+        almacen.insertar_transacciones(generar_transacciones(args.transacciones, dias=3 * 365, semilla=20))
+        facturas = generar_facturas(args.facturas, dias=3 * 365, semilla=20)
+        facturas["numero"] = "F-" + pd.Series(np.arange(args.facturas)).astype(str).str.zfill(7)
+        # La mitad de las facturas con dos conceptos a tipos reducidos
+        generador = np.random.default_rng(20)
+        desglosadas = facturas.iloc[: args.facturas // 2]
+        precio = (desglosadas["monto"] / 2).round(2).to_numpy()
+        conceptos = pd.DataFrame({
+            "numero": np.repeat(desglosadas["numero"].to_numpy(), 2),
+            "descripcion": "Concepto",
+            "cantidad": 1,
+            "precio": np.repeat(precio, 2),
+            "iva_porcentaje": generador.choice(TIPOS_IVA, 2 * len(desglosadas)),
+        })
+        comienzo = time.perf_counter()
+        almacen.insertar_facturas(facturas, conceptos)
+        print(f"alta de {args.facturas} facturas con {len(conceptos)} conceptos: {time.perf_counter() - comienzo:.2f} s")
+
+        ano = pd.Timestamp.now().year
+        comienzo = time.perf_counter()
+        calendario = calendario_fiscal.__wrapped__(almacen, ano)
+        proximo = proximo_impuesto(almacen)
+        print(f"calendario fiscal y próximo plazo: {(time.perf_counter() - comienzo) * 1000:.1f} ms")
+
+        print(calendario[["impuesto", "periodo", "fecha_limite", "estado", "importe"]].round(2).to_string(index=False))
+        print(f"próximo: {proximo['impuestos']} el {proximo['fecha_limite']:%d/%m/%Y} por {proximo['importe']:,.2f}")
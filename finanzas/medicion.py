@@ -0,0 +1,249 @@
+# Medición de tiempos de render por página, pestaña y sección
+#
+# Las secciones se miden con el gestor de contexto seccion("nombre") o con el
+# decorador @medido(); se anidan (página › pestaña › sección) y cada rerun
+# acumula su desglose en el hilo que lo ejecuta (uno por sesión de Streamlit).
+# Al terminar el rerun, el tiempo de cada ruta se suma y pasa a una ventana
+# deslizante compartida de la que salen los percentiles p50/p95/p99.
+#
+# Desactivada (por defecto) no se mide nada: seccion() devuelve un gestor nulo
+# y @medido llama directamente a la función. La memoria se mide aparte con
+# tracemalloc, que ralentiza todo el proceso, y es global: con varias sesiones
+# a la vez las reservas de una pueden aparecer en otra. El perfilador de
+# muestreo fuerza la medición mientras captura para atribuir cada muestra a la
+# sección en curso de su hilo.
+import argparse
+import contextlib
+import functools
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+SEPARADOR = " › "
+VENTANA = 500
+RUTA_RERUN = "Rerun completo"
+
+_ACTIVA = False
+_CONFIGURADA = False
+_FORZADA = False
+_MEMORIA = False
+_NULA = contextlib.nullcontext()
+_LOCAL = threading.local()
+_ESTADOS = weakref.WeakValueDictionary()  # id de hilo -> estado (desaparece con el hilo)
+_VENTANAS = {}  # ruta -> deque de (ms, kb)
+_BLOQUEO = threading.Lock()
+
+
+def activa():
+    return _ACTIVA
+
+
+# Activa o desactiva la medición (y la de memoria) para todo el proceso
+def configurar(activa=False, memoria=False):
+    global _ACTIVA, _CONFIGURADA, _MEMORIA
+    _CONFIGURADA = bool(activa)
+    _ACTIVA = _CONFIGURADA or _FORZADA
+    _MEMORIA = _CONFIGURADA and bool(memoria)
+    if _MEMORIA and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not _MEMORIA and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+# Mide aunque la medición esté desactivada en Configuración (sin memoria)
+def forzar(forzada):
+    global _ACTIVA, _FORZADA
+    _FORZADA = bool(forzada)
+    _ACTIVA = _CONFIGURADA or _FORZADA
+
+
+class _Estado:
+    __slots__ = ("pila", "filas", "inicio", "__weakref__")
+
+    def __init__(self):
+        self.pila, self.filas, self.inicio = [], [], None
+
+
+def _estado():
+    estado = getattr(_LOCAL, "estado", None)
+    if estado is None:
+        estado = _LOCAL.estado = _ESTADOS[threading.get_ident()] = _Estado()
+    return estado
+
+
+# Ruta de la sección abierta en otro hilo, o None (la lee el perfilador de muestreo)
+def seccion_en_curso(hilo):
+    estado = _ESTADOS.get(hilo)
+    pila = list(estado.pila) if estado is not None else []
+    return pila[-1].ruta if pila else None
+
+
+class _Seccion:
+    __slots__ = ("nombre", "ruta", "fila", "inicio", "memoria", "pico")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __enter__(self):
+        estado = _estado()
+        pila = estado.pila
+        self.ruta = pila[-1].ruta + SEPARADOR + self.nombre if pila else self.nombre
+        # La fila se reserva al entrar para que el desglose salga en orden de apertura
+        self.fila = {"seccion": self.ruta, "nivel": len(pila), "ms": None, "kb": None}
+        estado.filas.append(self.fila)
+        self.memoria = None
+        if _MEMORIA and tracemalloc.is_tracing():
+            # El pico de la sección padre se guarda antes de reiniciarlo para esta
+            actual, pico = tracemalloc.get_traced_memory()
+            if pila and pila[-1].memoria is not None:
+                pila[-1].pico = max(pila[-1].pico, pico)
+            tracemalloc.reset_peak()
+            self.memoria, self.pico = actual, actual
+        pila.append(self)
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        ms = (time.perf_counter() - self.inicio) * 1000
+        pila = _estado().pila
+        if pila and pila[-1] is self:
+            pila.pop()
+        kb = None
+        if self.memoria is not None and tracemalloc.is_tracing():
+            pico = max(self.pico, tracemalloc.get_traced_memory()[1])
+            kb = (pico - self.memoria) / 1024
+            if pila and pila[-1].memoria is not None:
+                pila[-1].pico = max(pila[-1].pico, pico)
+        self.fila.update(seccion=self.ruta, ms=ms, kb=kb)
+        return False
+
+
+# Gestor de contexto que mide el bloque como sección `nombre` dentro de la sección en curso
+def seccion(nombre):
+    return _Seccion(nombre) if _ACTIVA else _NULA
+
+
+# Decorador: mide cada llamada como sección (por defecto, el nombre de la función)
+def medido(nombre=None):
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _ACTIVA:
+                return funcion(*args, **kwargs)
+            with _Seccion(etiqueta):
+                return funcion(*args, **kwargs)
+
+        return envoltura
+
+    return decorador
+
+
+# Completa el nombre de la sección en curso (p. ej. la página con la pestaña elegida);
+# las secciones que se abran después quedan bajo la ruta nueva
+def detallar(nombre):
+    if not _ACTIVA:
+        return
+    pila = _estado().pila
+    if pila:
+        pila[-1].ruta += SEPARADOR + nombre
+
+
+# Empieza el desglose de un rerun en este hilo (descarta lo que quedase de uno interrumpido)
+def iniciar_rerun():
+    estado = _estado()
+    estado.pila.clear()
+    estado.filas = []
+    estado.inicio = time.perf_counter() if _ACTIVA else None
+
+
+# Cierra el rerun: suma el tiempo de cada ruta, lo añade a las ventanas de
+# percentiles y devuelve el desglose (DataFrame seccion, nivel, ms, kb, llamadas)
+def terminar_rerun():
+    estado = _estado()
+    inicio, filas = estado.inicio, estado.filas
+    estado.inicio, estado.filas = None, []
+    if inicio is None:
+        return pd.DataFrame(columns=["seccion", "nivel", "ms", "kb", "llamadas"])
+    filas.insert(0, {"seccion": RUTA_RERUN, "nivel": 0, "ms": (time.perf_counter() - inicio) * 1000, "kb": None})
+    filas = pd.DataFrame(filas).dropna(subset=["ms"]).astype({"kb": np.float64})
+    grupos = filas.groupby(["seccion", "nivel"], sort=False)
+    desglose = grupos["ms"].agg(["sum", "size"]).set_axis(["ms", "llamadas"], axis=1)
+    desglose["kb"] = grupos["kb"].sum(min_count=1)
+    desglose = desglose.reset_index()[["seccion", "nivel", "ms", "kb", "llamadas"]]
+    with _BLOQUEO:
+        for ruta, ms, kb in zip(desglose["seccion"], desglose["ms"], desglose["kb"]):
+            _VENTANAS.setdefault(ruta, deque(maxlen=VENTANA)).append((ms, kb))
+    return desglose
+
+
+# Percentiles por sección sobre los últimos VENTANA reruns en que apareció
+def percentiles():
+    with _BLOQUEO:
+        ventanas = {ruta: np.array(valores, dtype=np.float64) for ruta, valores in _VENTANAS.items()}
+    filas = []
+    for ruta, valores in ventanas.items():
+        p50, p95, p99 = np.percentile(valores[:, 0], [50, 95, 99])
+        memoria = valores[:, 1][~np.isnan(valores[:, 1])]
+        filas.append({
+            "seccion": ruta, "reruns": len(valores), "p50": p50, "p95": p95, "p99": p99,
+            "maximo": valores[:, 0].max(), "kb_medio": memoria.mean() if len(memoria) else np.nan,
+        })
+    columnas = ["seccion", "reruns", "p50", "p95", "p99", "maximo", "kb_medio"]
+    return pd.DataFrame(filas, columns=columnas).sort_values("p95", ascending=False, ignore_index=True)
+
+
+def limpiar():
+    with _BLOQUEO:
+        _VENTANAS.clear()
+
+
+# Uso: python -m finanzas.medicion --llamadas 1000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el coste de las secciones medidas")
+    parser.add_argument("--llamadas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    @medido()
+    def funcion_medida():
+        pass
+
+    def funcion():
+        pass
+
+    def por_llamada(bucle):
+        inicio = time.perf_counter()
+        bucle()
+        return (time.perf_counter() - inicio) / args.llamadas * 1e9
+
+    def con_seccion():
+        for _ in range(args.llamadas):
+            with seccion("bloque"):
+                pass
+
+    def con_decorador():
+        for _ in range(args.llamadas):
+            funcion_medida()
+
+    def sin_medir():
+        for _ in range(args.llamadas):
+            funcion()
+
+    base = por_llamada(sin_medir)
+    print(f"llamada sin medir: {base:.0f} ns")
+    for activa_, memoria in ((False, False), (True, False), (True, True)):
+        configurar(activa_, memoria)
+        iniciar_rerun()
+        with seccion("página"):
+            tiempos = por_llamada(con_seccion), por_llamada(con_decorador)
+        terminar_rerun()
+        estado = "desactivada" if not activa_ else "activa con memoria" if memoria else "activa"
+        print(f"medición {estado}: seccion() {tiempos[0]:.0f} ns · @medido +{tiempos[1] - base:.0f} ns por llamada")
+    configurar(False)
+    print(percentiles().round(3).to_string(index=False))
@@ -0,0 +1,210 @@
+# Métricas de producción en formato de texto de Prometheus
+#
+# Latencia de los reruns por página (histograma), aciertos de las cachés,
+# sesiones activas, filas del libro y trabajos en cola. Se exportan a un fichero
+# (FINANZAS_METRICAS=ruta, reescrito cada INTERVALO segundos) o desde un
+# endpoint local (FINANZAS_METRICAS_PUERTO=9108 -> http://127.0.0.1:9108/metrics).
+# Sin ninguna de las dos variables no se exporta ni se registra nada.
+#
+# El hilo del script sólo añade la medida a un deque y anota la sesión en un
+# dict, operaciones atómicas sin bloqueo. El histograma y el resto de valores
+# se calculan en el hilo del exportador, en cada escritura o consulta.
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from finanzas.cache import estadisticas_caches
+from finanzas.trabajos import trabajos_pendientes
+
+RUTA_METRICAS = os.environ.get("FINANZAS_METRICAS")
+PUERTO_METRICAS = os.environ.get("FINANZAS_METRICAS_PUERTO")
+INTERVALO = 15
+# Límites (en segundos) de los cubos del histograma de latencia de los reruns
+CUBOS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Una sesión cuenta como activa si ha tenido un rerun en los últimos 5 minutos
+ACTIVIDAD = 300
+# Sesiones sin actividad en un día se olvidan
+OLVIDO = 86400
+# Si el exportador se queda atrás se descartan las medidas más antiguas
+MAX_PENDIENTES = 100_000
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+_PENDIENTES = None  # deque de (página, segundos) que vacía el exportador
+_SESIONES = {}  # sesión -> último rerun (time.monotonic)
+_HISTOGRAMAS = {}  # página -> [cuentas por cubo..., +Inf], suma
+_BLOQUEO = threading.Lock()  # sólo entre los hilos del exportador
+_REGISTRO = logging.getLogger(__name__)
+
+
+# Registra un rerun terminado; sin exportador activo no hace nada
+def observar_rerun(pagina, segundos, sesion):
+    pendientes = _PENDIENTES
+    if pendientes is None:
+        return
+    pendientes.append((pagina, segundos))
+    _SESIONES[sesion] = time.monotonic()
+
+
+def _acumular():
+    while True:
+        try:
+            pagina, segundos = _PENDIENTES.popleft()
+        except IndexError:
+            break
+        cuentas, suma = _HISTOGRAMAS.get(pagina) or ([0] * (len(CUBOS) + 1), 0.0)
+        for i, limite in enumerate(CUBOS):
+            if segundos <= limite:
+                cuentas[i] += 1
+        cuentas[-1] += 1
+        _HISTOGRAMAS[pagina] = (cuentas, suma + segundos)
+
+
+def _etiqueta(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor):
+    return str(valor) if isinstance(valor, int) else repr(float(valor))
+
+
+def _bloque(nombre, tipo, ayuda, muestras):
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+    for sufijo, etiquetas, valor in muestras:
+        etiquetas = ",".join(f'{clave}="{_etiqueta(v)}"' for clave, v in etiquetas.items())
+        lineas.append(f"{nombre}{sufijo}{{{etiquetas}}} {_numero(valor)}" if etiquetas else f"{nombre}{sufijo} {_numero(valor)}")
+    return lineas
+
+
+def _sesiones_activas():
+    ahora = time.monotonic()
+    sesiones = _SESIONES.copy()
+    for sesion, visto in sesiones.items():
+        if ahora - visto > OLVIDO:
+            _SESIONES.pop(sesion, None)
+    return sum(ahora - visto <= ACTIVIDAD for visto in sesiones.values())
+
+
+# Texto de todas las métricas (se llama desde el hilo del exportador)
+def texto_metricas(almacen):
+    with _BLOQUEO:
+        _acumular()
+        histogramas = {pagina: (list(cuentas), suma) for pagina, (cuentas, suma) in _HISTOGRAMAS.items()}
+
+    muestras = []
+    for pagina, (cuentas, suma) in sorted(histogramas.items()):
+        for limite, cuenta in zip(CUBOS + ("+Inf",), cuentas):
+            muestras.append(("_bucket", {"pagina": pagina, "le": limite}, cuenta))
+        muestras.append(("_sum", {"pagina": pagina}, suma))
+        muestras.append(("_count", {"pagina": pagina}, cuentas[-1]))
+    lineas = _bloque("finanzas_rerun_segundos", "histogram", "Duración de los reruns completos por página.", muestras)
+
+    caches = estadisticas_caches().to_dict("records")
+    for campo, nombre, tipo, ayuda in (
+        ("aciertos", "finanzas_cache_aciertos_total", "counter", "Consultas servidas desde la caché."),
+        ("fallos", "finanzas_cache_fallos_total", "counter", "Consultas que tuvieron que calcularse."),
+        ("expulsiones", "finanzas_cache_expulsiones_total", "counter", "Entradas expulsadas por tamaño o número."),
+        ("ratio_aciertos", "finanzas_cache_ratio_aciertos", "gauge", "Aciertos sobre el total de consultas."),
+        ("entradas", "finanzas_cache_entradas", "gauge", "Entradas guardadas."),
+        ("mb", "finanzas_cache_megabytes", "gauge", "Tamaño estimado de las entradas en MB."),
+    ):
+        lineas += _bloque(nombre, tipo, ayuda, [("", {"cache": c["cache"]}, c[campo]) for c in caches])
+
+    lineas += _bloque("finanzas_sesiones_activas", "gauge", f"Sesiones con algún rerun en los últimos {ACTIVIDAD} s.", [("", {}, _sesiones_activas())])
+    lineas += _bloque("finanzas_libro_filas", "gauge", "Filas de las tablas del libro contable.", [
+        ("", {"tabla": "transacciones"}, almacen.contar_transacciones()),
+        ("", {"tabla": "facturas"}, almacen.contar_facturas()),
+    ])
+    lineas += _bloque("finanzas_trabajos_pendientes", "gauge", "Trabajos de exportación en cola o en curso.", [("", {}, trabajos_pendientes())])
+    return "\n".join(lineas) + "\n"
+
+
+# Reescribe el fichero cada INTERVALO segundos; el renombrado es atómico, así
+# que quien lo lea nunca ve un fichero a medias. Un fallo puntual (disco lleno,
+# base de datos bloqueada) deja el fichero anterior y se reintenta en la siguiente vuelta.
+def _escribir_periodicamente(almacen, ruta):
+    parcial = f"{ruta}.parcial"
+    while True:
+        try:
+            with open(parcial, "w", encoding="utf-8") as fichero:
+                fichero.write(texto_metricas(almacen))
+            os.replace(parcial, ruta)
+        except (OSError, sqlite3.Error):
+            pass
+        time.sleep(INTERVALO)
+
+
+def _servir(almacen, puerto):
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            cuerpo = texto_metricas(almacen).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", TIPO_CONTENIDO)
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    # Las métricas son opcionales: con el puerto ocupado (p. ej. otro proceso de
+    # la aplicación con el mismo entorno) se sigue sin endpoint
+    try:
+        servidor = HTTPServer(("127.0.0.1", puerto), Manejador)
+    except OSError as error:
+        _REGISTRO.warning("No se pudo abrir el endpoint de métricas en el puerto %s: %s", puerto, error)
+        return None
+    threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+    return servidor
+
+
+# Arranca la exportación configurada por las variables de entorno (una vez por proceso)
+def iniciar(almacen, ruta=RUTA_METRICAS, puerto=PUERTO_METRICAS):
+    global _PENDIENTES
+    if _PENDIENTES is not None or not (ruta or puerto):
+        return
+    _PENDIENTES = deque(maxlen=MAX_PENDIENTES)
+    if ruta:
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        threading.Thread(target=_escribir_periodicamente, args=(almacen, ruta), name="metricas-fichero", daemon=True).start()
+    if puerto and _servir(almacen, int(puerto)) is None and not ruta:
+        # Sin ningún exportador no se registra nada
+        _PENDIENTES = None
+
+
+# Uso: python -m finanzas.metricas --reruns 100000
+if __name__ == "__main__":
+    import random
+
+    from finanzas.almacen import AlmacenLibro
+
+    parser = argparse.ArgumentParser(description="Mide el coste de registrar un rerun y de generar las métricas")
+    parser.add_argument("--reruns", type=int, default=MAX_PENDIENTES)
+    parser.add_argument("--sesiones", type=int, default=50)
+    args = parser.parse_args()
+
+    # Sin hilos de exportación: las medidas se acumulan hasta llamar a texto_metricas
+    almacen = AlmacenLibro()
+    _PENDIENTES = deque(maxlen=MAX_PENDIENTES)
+    paginas = ["Dashboard", "Transacciones", "Facturas", "Informes", "Configuración"]
+    observaciones = [(random.choice(paginas), random.lognormvariate(-2, 1), f"s{random.randrange(args.sesiones)}") for _ in range(args.reruns)]
+
+    inicio = time.perf_counter()
+    for pagina, segundos, sesion in observaciones:
+        observar_rerun(pagina, segundos, sesion)
+    registro = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    texto = texto_metricas(almacen)
+    generacion = time.perf_counter() - inicio
+
+    print(f"observar_rerun: {registro / args.reruns * 1e9:.0f} ns por rerun en el hilo del script")
+    print(f"texto_metricas: {generacion * 1000:.0f} ms acumulando {min(args.reruns, MAX_PENDIENTES)} reruns ({len(texto)} bytes)")
+    print("\n".join(linea for linea in texto.splitlines() if linea.startswith(("finanzas_rerun_segundos_count", "finanzas_sesiones", "finanzas_libro"))))
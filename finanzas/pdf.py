@@ -0,0 +1,188 @@
+# Informes PDF con matplotlib (PdfPages)
+#
+# Un informe se describe con datos ya calculados y formateados, de modo que sea
+# pequeño de enviar al proceso que lo dibuja:
+#   {"titulo": ..., "subtitulo": ..., "secciones": [...]}
+# con secciones de tipo "indicadores" (pares etiqueta, valor), "tabla"
+# (DataFrame de textos, filas a destacar y columnas alineadas a la derecha) y
+# "grafico" (tarta, barras o líneas). Las tablas largas continúan en las páginas
+# siguientes. Se usa matplotlib.figure.Figure directamente, sin pyplot, y se
+# importa al dibujar (en el proceso de la cola), no al importar el módulo desde
+# la interfaz.
+MIME_PDF = "application/pdf"
+A4 = (8.27, 11.69)
+AZUL = "#1E88E5"
+AZUL_CLARO = "#E3F2FD"
+COLORES = ["#1E88E5", "#4CAF50", "#FF5252", "#FFC107", "#9C27B0", "#00ACC1", "#FF7043", "#8D6E63", "#90CAF9", "#A5D6A7"]
+
+# Alturas en fracción de la página
+_ARRIBA = 0.89
+_ABAJO = 0.06
+_SEPARACION = 0.02
+_ALTO_TITULO = 0.03
+_ALTO_INDICADORES = 0.09
+_ALTO_GRAFICO = 0.34
+_ALTO_FILA = 0.021
+_FILAS_MINIMAS = 5
+
+
+def _alto_tabla(filas):
+    return _ALTO_TITULO + (filas + 1) * _ALTO_FILA
+
+
+# Reparte las secciones en páginas; las tablas se parten por filas
+def _paginar(secciones):
+    paginas = [[]]
+    libre = _ARRIBA - _ABAJO
+    for seccion in secciones:
+        if seccion["tipo"] == "tabla":
+            total = len(seccion["datos"])
+            inicio = 0
+            while True:
+                caben = int((libre - _ALTO_TITULO) / _ALTO_FILA) - 1
+                if caben < min(_FILAS_MINIMAS, max(total - inicio, 1)):
+                    paginas.append([])
+                    libre = _ARRIBA - _ABAJO
+                    continue
+                fin = min(total, inicio + caben)
+                paginas[-1].append((seccion, _alto_tabla(fin - inicio), (inicio, fin)))
+                libre -= _alto_tabla(fin - inicio) + _SEPARACION
+                inicio = fin
+                if inicio >= total:
+                    break
+        else:
+            alto = _ALTO_INDICADORES if seccion["tipo"] == "indicadores" else _ALTO_GRAFICO
+            if alto > libre:
+                paginas.append([])
+                libre = _ARRIBA - _ABAJO
+            paginas[-1].append((seccion, alto, None))
+            libre -= alto + _SEPARACION
+    return paginas
+
+
+def _cabecera(figura, informe, numero, total):
+    from matplotlib.lines import Line2D
+
+    figura.text(0.06, 0.955, informe["titulo"], fontsize=16, fontweight="bold", color=AZUL)
+    figura.text(0.06, 0.932, informe.get("subtitulo", ""), fontsize=9, color="#555555")
+    figura.add_artist(Line2D([0.06, 0.94], [0.92, 0.92], transform=figura.transFigure, color=AZUL, linewidth=1))
+    figura.text(0.06, 0.03, informe.get("pie", ""), fontsize=7, color="#888888")
+    figura.text(0.94, 0.03, f"Página {numero} de {total}", fontsize=7, color="#888888", ha="right")
+
+
+def _indicadores(figura, seccion, y, alto):
+    valores = seccion["valores"]
+    ancho = 0.88 / max(len(valores), 1)
+    for i, (etiqueta, valor) in enumerate(valores):
+        eje = figura.add_axes([0.06 + i * ancho + 0.005, y, ancho - 0.01, alto])
+        eje.set_xticks([])
+        eje.set_yticks([])
+        eje.set_facecolor("#F5F9FF")
+        for borde in eje.spines.values():
+            borde.set_color("#BBDEFB")
+        eje.text(0.5, 0.68, etiqueta, ha="center", va="center", fontsize=9, color="#555555", transform=eje.transAxes)
+        eje.text(0.5, 0.32, valor, ha="center", va="center", fontsize=13, fontweight="bold", color=AZUL, transform=eje.transAxes)
+
+
+def _tabla(figura, seccion, y, alto, filas):
+    inicio, fin = filas
+    datos = seccion["datos"]
+    titulo = seccion.get("titulo", "")
+    if titulo:
+        figura.text(0.06, y + alto - 0.02, titulo + (" (cont.)" if inicio else ""), fontsize=11, fontweight="bold")
+    alto_celdas = alto - _ALTO_TITULO
+    eje = figura.add_axes([0.06, y, 0.88, alto_celdas])
+    eje.axis("off")
+    if datos.empty:
+        eje.text(0.0, 0.5, "Sin datos", fontsize=9, color="#888888")
+        return
+    textos = datos.iloc[inicio:fin].astype(str).values.tolist()
+    columnas = [str(c) for c in datos.columns]
+    # Anchos proporcionales al texto más largo de cada columna
+    largos = [max([len(c)] + [len(f[i]) for f in textos]) for i, c in enumerate(columnas)]
+    anchos = [l / sum(largos) for l in largos]
+    derecha = {columnas.index(c) for c in seccion.get("derecha", []) if c in columnas}
+    destacar = [f for f in range(1, len(textos) + 1) if inicio + f - 1 in set(seccion.get("destacar", []))]
+    # Dibujo directo (fondos, líneas y un texto por celda): matplotlib.table crea
+    # un rectángulo y un texto por celda y es varias veces más lento
+    eje.barh([0.5], 1, height=1, color=AZUL)
+    if destacar:
+        eje.barh([f + 0.5 for f in destacar], 1, height=1, color=AZUL_CLARO)
+    bordes = [0.0]
+    for ancho in anchos:
+        bordes.append(bordes[-1] + ancho)
+    eje.hlines(range(1, len(textos) + 2), 0, 1, color="#DDDDDD", linewidth=0.5)
+    eje.vlines(bordes, 0, len(textos) + 1, color="#DDDDDD", linewidth=0.5)
+    for col, columna in enumerate(columnas):
+        x, alineacion = (bordes[col + 1] - 0.008, "right") if col in derecha else (bordes[col] + 0.008, "left")
+        eje.text(x, 0.5, columna, ha=alineacion, va="center", fontsize=7.5, fontweight="bold", color="white")
+        for fila, registro in enumerate(textos, start=1):
+            eje.text(x, fila + 0.5, registro[col], ha=alineacion, va="center", fontsize=7.5,
+                     fontweight="bold" if fila in destacar else "normal")
+    eje.set_xlim(0, 1)
+    eje.set_ylim(len(textos) + 1, 0)
+
+
+def _grafico(figura, seccion, y, alto):
+    eje = figura.add_axes([0.12, y + 0.03, 0.78, alto - 0.06])
+    eje.set_title(seccion.get("titulo", ""), fontsize=11, fontweight="bold")
+    etiquetas = list(seccion["etiquetas"])
+    series = seccion["series"]
+    colores = seccion.get("colores", COLORES)
+    clase = seccion["clase"]
+    if clase == "tarta" and etiquetas:
+        # Una tarta sólo admite porciones positivas (p. ej. un patrimonio neto
+        # negativo o un balance sin movimientos se quedan fuera)
+        porciones = [(i, e, float(v)) for i, (e, v) in enumerate(zip(etiquetas, next(iter(series.values())))) if v > 0]
+        etiquetas = [e for _, e, _ in porciones]
+    if not etiquetas:
+        eje.axis("off")
+        eje.text(0.5, 0.5, "Sin datos", ha="center", fontsize=9, color="#888888")
+        return
+    if clase == "tarta":
+        eje.pie([v for _, _, v in porciones], labels=etiquetas, colors=[colores[i % len(colores)] for i, _, _ in porciones],
+                autopct="%1.0f%%", pctdistance=0.8, wedgeprops={"width": 0.4}, textprops={"fontsize": 7})
+        eje.set_aspect("equal")
+        return
+    posiciones = range(len(etiquetas))
+    if clase == "barras":
+        ancho = 0.8 / len(series)
+        for i, (nombre, valores) in enumerate(series.items()):
+            eje.bar([p + (i - (len(series) - 1) / 2) * ancho for p in posiciones], valores, ancho, label=nombre, color=colores[i % len(colores)])
+    else:
+        for i, (nombre, valores) in enumerate(series.items()):
+            eje.plot(list(posiciones), valores, marker="o", markersize=3, label=nombre, color=colores[i % len(colores)])
+    paso = max(1, len(etiquetas) // 12)
+    eje.set_xticks(list(posiciones)[::paso])
+    eje.set_xticklabels(etiquetas[::paso], fontsize=7, rotation=30 if len(etiquetas) > 6 else 0, ha="right" if len(etiquetas) > 6 else "center")
+    eje.tick_params(axis="y", labelsize=7)
+    eje.grid(axis="y", color="#E6E6E6")
+    eje.spines[["top", "right"]].set_visible(False)
+    if len(series) > 1:
+        eje.legend(fontsize=7, frameon=False)
+
+
+# Dibuja el informe en `ruta`. `progreso(fraccion, mensaje)` se llama por página.
+def generar_pdf(ruta, informe, progreso=None):
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    paginas = _paginar(informe["secciones"])
+    with PdfPages(ruta, metadata={"Title": informe["titulo"], "Subject": informe.get("subtitulo", "")}) as documento:
+        for numero, bloques in enumerate(paginas, start=1):
+            figura = Figure(figsize=A4)
+            _cabecera(figura, informe, numero, len(paginas))
+            y = _ARRIBA
+            for seccion, alto, filas in bloques:
+                y -= alto
+                if seccion["tipo"] == "indicadores":
+                    _indicadores(figura, seccion, y, alto)
+                elif seccion["tipo"] == "tabla":
+                    _tabla(figura, seccion, y, alto, filas)
+                else:
+                    _grafico(figura, seccion, y, alto)
+                y -= _SEPARACION
+            documento.savefig(figura)
+            if progreso is not None:
+                progreso(numero / len(paginas), f"Página {numero} de {len(paginas)}")
+    return ruta
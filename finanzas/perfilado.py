@@ -0,0 +1,225 @@
+# Perfilador de muestreo bajo demanda
+#
+# Desde Configuración se programa la captura de los próximos N reruns de una
+# página, de cualquier sesión. Mientras dura, un hilo toma cada pocos
+# milisegundos la pila de los hilos que están ejecutando esa página
+# (sys._current_frames) y le antepone las secciones medidas en curso (página ›
+# pestaña › sección, ver finanzas.medicion). Así cada muestra queda atribuida a
+# la parte de la página que la gasta. Al terminar se guardan en DIRECTORIO_PERFILES:
+#   - <perfil>.txt: pilas colapsadas ("a;b;c 12"), que abren speedscope y flamegraph.pl
+#   - <perfil>.csv: muestras propias y totales de cada función y sección
+# Sin captura programada, perfilar() devuelve un gestor nulo.
+import argparse
+import contextlib
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+from finanzas import medicion
+
+DIRECTORIO_PERFILES = os.environ.get("FINANZAS_PERFILES", os.path.join(tempfile.gettempdir(), "finanzas-perfiles"))
+INTERVALO_MS = 5
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_BIBLIOTECA = os.path.dirname(os.__file__)
+
+_CAPTURA = None
+_NULA = contextlib.nullcontext()
+_BLOQUEO = threading.Lock()
+_ETIQUETAS = {}  # objeto de código -> "función (fichero:línea)"
+
+
+class Captura:
+    def __init__(self, pagina, reruns, intervalo_ms):
+        self.pagina = pagina
+        self.reruns = reruns
+        self.restantes = reruns
+        self.intervalo = intervalo_ms / 1000
+        self.hilos = Counter()  # id de hilo -> reruns de la página en curso en ese hilo
+        self.pilas = Counter()
+        self.muestras = 0
+        self.terminada = threading.Event()
+        self.ruta = None
+
+
+def _etiqueta(codigo):
+    etiqueta = _ETIQUETAS.get(codigo)
+    if etiqueta is None:
+        fichero = codigo.co_filename
+        if fichero.startswith(RAIZ):
+            fichero = os.path.relpath(fichero, RAIZ)
+        elif "site-packages" in fichero:
+            fichero = fichero.split("site-packages" + os.sep, 1)[1]
+        elif fichero.startswith(_BIBLIOTECA):
+            fichero = os.path.relpath(fichero, _BIBLIOTECA)
+        etiqueta = _ETIQUETAS[codigo] = f"{codigo.co_name} ({fichero}:{codigo.co_firstlineno})".replace(";", ",")
+    return etiqueta
+
+
+# Pila de la raíz a la hoja: las secciones en curso y después los marcos desde el
+# primero de la aplicación (lo anterior es el ejecutor de scripts de Streamlit)
+def _pila(marco, ruta):
+    codigos = []
+    while marco is not None:
+        codigos.append(marco.f_code)
+        marco = marco.f_back
+    codigos.reverse()
+    inicio = next((i for i, codigo in enumerate(codigos) if codigo.co_filename.startswith(RAIZ)), 0)
+    secciones = [f"[{parte}]".replace(";", ",") for parte in ruta.split(medicion.SEPARADOR)] if ruta else []
+    return ";".join(secciones + [_etiqueta(codigo) for codigo in codigos[inicio:]])
+
+
+def _muestrear(captura):
+    while not captura.terminada.wait(captura.intervalo):
+        marcos = sys._current_frames()
+        for hilo in list(captura.hilos):
+            marco = marcos.get(hilo)
+            if marco is not None:
+                captura.pilas[_pila(marco, medicion.seccion_en_curso(hilo))] += 1
+                captura.muestras += 1
+        marcos = marco = None
+    if captura.muestras:
+        captura.ruta = _guardar(captura)
+
+
+# Muestras propias (la función está en la hoja) y totales (está en la pila) por marco
+def funciones_principales(pilas):
+    propias, totales = Counter(), Counter()
+    for pila, muestras in pilas.items():
+        marcos = pila.split(";")
+        propias[marcos[-1]] += muestras
+        for marco in set(marcos):
+            totales[marco] += muestras
+    total = sum(pilas.values()) or 1
+    df = pd.DataFrame({"funcion": list(totales), "totales": list(totales.values())})
+    df["propias"] = df["funcion"].map(propias).fillna(0).astype(int)
+    df["pct_propias"] = df["propias"] / total * 100
+    df["pct_totales"] = df["totales"] / total * 100
+    return df[["funcion", "propias", "pct_propias", "totales", "pct_totales"]].sort_values(
+        ["propias", "totales"], ascending=False, ignore_index=True
+    )
+
+
+def _guardar(captura):
+    os.makedirs(DIRECTORIO_PERFILES, exist_ok=True)
+    pagina = re.sub(r"\W+", "-", captura.pagina.lower()).strip("-")
+    ruta = os.path.join(DIRECTORIO_PERFILES, f"perfil-{pagina}-{datetime.now():%Y%m%d-%H%M%S}")
+    with open(f"{ruta}.txt", "w", encoding="utf-8") as fichero:
+        for pila, muestras in captura.pilas.most_common():
+            fichero.write(f"{pila} {muestras}\n")
+    funciones_principales(captura.pilas).to_csv(f"{ruta}.csv", index=False)
+    return ruta
+
+
+def _terminar(captura):
+    global _CAPTURA
+    if _CAPTURA is captura:
+        _CAPTURA = None
+        medicion.forzar(False)
+    captura.terminada.set()
+
+
+# Programa la captura de los próximos `reruns` reruns de `pagina` (una a la vez:
+# si ya hay una en curso se devuelve esa)
+def programar(pagina, reruns, intervalo_ms=INTERVALO_MS):
+    global _CAPTURA
+    with _BLOQUEO:
+        if _CAPTURA is not None:
+            return _CAPTURA
+        captura = _CAPTURA = Captura(pagina, reruns, intervalo_ms)
+        medicion.forzar(True)
+    threading.Thread(target=_muestrear, args=(captura,), name="perfilador", daemon=True).start()
+    return captura
+
+
+# Termina la captura en curso y guarda lo que se haya muestreado
+def detener():
+    with _BLOQUEO:
+        if _CAPTURA is not None:
+            _terminar(_CAPTURA)
+
+
+def captura_en_curso():
+    return _CAPTURA
+
+
+@contextlib.contextmanager
+def _perfilar_rerun(captura):
+    hilo = threading.get_ident()
+    with _BLOQUEO:
+        if captura.restantes <= 0 or captura.terminada.is_set():
+            captura = None
+        else:
+            captura.restantes -= 1
+            captura.hilos[hilo] += 1
+    try:
+        yield
+    finally:
+        if captura is not None:
+            with _BLOQUEO:
+                captura.hilos[hilo] -= 1
+                if not captura.hilos[hilo]:
+                    del captura.hilos[hilo]
+                if captura.restantes <= 0 and not captura.hilos:
+                    _terminar(captura)
+
+
+# Gestor de contexto alrededor de un rerun de `pagina`: lo muestrea si hay una captura de esa página
+def perfilar(pagina):
+    captura = _CAPTURA
+    if captura is None or captura.pagina != pagina:
+        return _NULA
+    return _perfilar_rerun(captura)
+
+
+# Perfiles guardados, del más reciente al más antiguo (ruta sin extensión)
+def perfiles_guardados():
+    if not os.path.isdir(DIRECTORIO_PERFILES):
+        return []
+    nombres = [nombre[:-4] for nombre in os.listdir(DIRECTORIO_PERFILES) if nombre.startswith("perfil-") and nombre.endswith(".txt")]
+    return [os.path.join(DIRECTORIO_PERFILES, nombre) for nombre in sorted(nombres, key=lambda n: n[-15:], reverse=True)]
+
+
+# Uso: python -m finanzas.perfilado --reruns 20 --intervalo 5
+if __name__ == "__main__":
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Mide cuánto ralentiza el muestreo un rerun sintético")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_MS)
+    args = parser.parse_args()
+
+    def calculo_python():
+        return sum(i * i for i in range(200_000))
+
+    def calculo_numpy():
+        return np.sort(np.random.default_rng(0).random(2_000_000)).sum()
+
+    def rerun():
+        with medicion.seccion("Sintética"), perfilar("Sintética"):
+            with medicion.seccion("Python"):
+                calculo_python()
+            with medicion.seccion("NumPy"):
+                calculo_numpy()
+
+    def duracion():
+        inicio = time.perf_counter()
+        for _ in range(args.reruns):
+            rerun()
+        return time.perf_counter() - inicio
+
+    base = duracion()
+    captura = programar("Sintética", args.reruns, args.intervalo)
+    muestreado = duracion()
+    captura.terminada.wait()
+    time.sleep(0.1)
+    print(f"{args.reruns} reruns: {base * 1000:.0f} ms sin perfilar, {muestreado * 1000:.0f} ms perfilando "
+          f"(+{(muestreado / base - 1) * 100:.1f} %), {captura.muestras} muestras cada {args.intervalo:g} ms")
+    print(f"perfil: {captura.ruta}.txt")
+    print(funciones_principales(captura.pilas).head(8).round(1).to_string(index=False))
@@ -0,0 +1,116 @@
+# Previsión de tesorería por simulación de Monte Carlo
+#
+# Se simulan miles de trayectorias a la vez como una matriz caminos × días: los
+# cobros y pagos recurrentes caen en su día del mes (con importe fijo o
+# uniforme entre un mínimo y un máximo) y los movimientos eventuales son sorteos
+# diarios. El saldo es la suma acumulada por filas y de ahí salen las bandas por
+# percentiles y la probabilidad de quedar por debajo del saldo mínimo. La
+# semilla depende de la fecha de inicio, así que el resultado es estable entre
+# reruns del mismo día.
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.cache import memoizar
+
+PREFERENCIAS_PREVISION = {"horizonte_prediccion": 90, "intervalo_confianza": 95}
+CAMINOS = 10_000
+SALDO_INICIAL = 15243.00
+SALDO_MINIMO = 5000.00
+
+# (concepto, día del mes, importe mínimo, importe máximo); gastos en negativo
+RECURRENTES = (
+    ("Cobros quincena 1", 5, 3500.0, 4500.0),
+    ("Cobros quincena 2", 20, 3800.0, 4800.0),
+    ("Alquiler", 1, -2000.0, -2000.0),
+    ("Suministros", 15, -1500.0, -1500.0),
+    ("Nóminas", 28, -7000.0, -7000.0),
+)
+# Movimientos eventuales (facturas variables...): probabilidad diaria, proporción
+# de gastos y rangos de importe de gastos e ingresos
+EVENTUALES = {"probabilidad": 0.15, "gastos": 0.7, "gasto": (100.0, 1000.0), "ingreso": (200.0, 2000.0)}
+
+
+def _semilla(inicio):
+    return pd.Timestamp(inicio).toordinal()
+
+
+# Flujos diarios simulados: matriz caminos × días (float32 para acotar memoria)
+def simular_flujos(fechas, caminos=CAMINOS, recurrentes=RECURRENTES, eventuales=EVENTUALES, semilla=None):
+    fechas = pd.DatetimeIndex(fechas)
+    rng = np.random.default_rng(semilla)
+    dias = len(fechas)
+    flujos = np.zeros((caminos, dias), dtype=np.float32)
+
+    dia_mes = fechas.day.to_numpy()
+    for _, dia, minimo, maximo in recurrentes:
+        columnas = np.flatnonzero(dia_mes == dia)
+        if not len(columnas):
+            continue
+        if minimo == maximo:
+            flujos[:, columnas] += np.float32(minimo)
+        else:
+            flujos[:, columnas] += rng.uniform(minimo, maximo, (caminos, len(columnas))).astype(np.float32)
+
+    # Un único sorteo uniforme decide si hay movimiento y si es gasto o ingreso:
+    # u < p·g -> gasto, p·g <= u < p -> ingreso
+    sorteo = rng.random((caminos, dias), dtype=np.float32)
+    probabilidad = eventuales["probabilidad"]
+    limite_gasto = probabilidad * eventuales["gastos"]
+    importes = rng.random((caminos, dias), dtype=np.float32)
+    gasto_min, gasto_max = eventuales["gasto"]
+    ingreso_min, ingreso_max = eventuales["ingreso"]
+    flujos -= np.where(sorteo < limite_gasto, gasto_min + importes * (gasto_max - gasto_min), 0)
+    flujos += np.where((sorteo >= limite_gasto) & (sorteo < probabilidad), ingreso_min + importes * (ingreso_max - ingreso_min), 0)
+    return flujos
+
+
+# Bandas de saldo (percentiles del intervalo de confianza y mediana) para cada
+# día del horizonte, probabilidad diaria de estar bajo el mínimo e indicadores
+@memoizar(ttl=3600, max_mb=64)
+def prevision_tesoreria(saldo_inicial=SALDO_INICIAL, horizonte=90, confianza=95, saldo_minimo=SALDO_MINIMO, caminos=CAMINOS, inicio=None):
+    inicio = pd.Timestamp(inicio if inicio is not None else pd.Timestamp.now()).normalize()
+    fechas = pd.date_range(inicio, periods=horizonte, freq="D")
+    saldos = np.cumsum(simular_flujos(fechas, caminos, semilla=_semilla(inicio)), axis=1)
+    saldos += np.float32(saldo_inicial)
+
+    cola = (100 - confianza) / 2
+    inferior, mediana, superior = np.percentile(saldos, [cola, 50, 100 - cola], axis=0)
+    bajo_minimo = saldos < saldo_minimo
+    minimos = saldos.min(axis=1)
+    bandas = pd.DataFrame({
+        "fecha": fechas,
+        "inferior": inferior,
+        "mediana": mediana,
+        "superior": superior,
+        "prob_bajo_minimo": bajo_minimo.mean(axis=0),
+    })
+    dia_peor = int(np.argmin(mediana))
+    return {
+        "bandas": bandas,
+        "prob_bajo_minimo": float((minimos < saldo_minimo).mean()),
+        "dias_bajo_minimo": float(bajo_minimo.sum(axis=1).mean()),
+        "saldo_minimo_mediano": float(mediana[dia_peor]),
+        "fecha_saldo_minimo": fechas[dia_peor],
+        "saldo_minimo_inferior": float(np.percentile(minimos, cola)),
+        "saldo_final": float(mediana[-1]),
+        "saldo_final_inferior": float(inferior[-1]),
+        "saldo_final_superior": float(superior[-1]),
+        "caminos": caminos,
+    }
+
+
+# Uso: python -m finanzas.prevision --caminos 10000 --dias 365
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide la simulación de tesorería")
+    parser.add_argument("--caminos", type=int, default=CAMINOS)
+    parser.add_argument("--dias", type=int, default=365)
+    args = parser.parse_args()
+
+    for intento in range(3):
+        inicio = time.perf_counter()
+        resultado = prevision_tesoreria.__wrapped__(horizonte=args.dias, caminos=args.caminos, inicio="2024-01-01")
+        print(f"{args.caminos} caminos × {args.dias} días: {time.perf_counter() - inicio:.3f} s")
+    print(f"P(saldo < mínimo) = {resultado['prob_bajo_minimo']:.1%} · días bajo el mínimo (media) = {resultado['dias_bajo_minimo']:.1f}")
@@ -0,0 +1,166 @@
+# Cuenta de pérdidas y ganancias (modelo de PYMES del PGC) a partir del libro
+#
+# Cada categoría del libro se asigna a una cuenta del PGC (configurable en
+# preferencias) y cada cuenta a una línea de la cuenta de resultados por el
+# prefijo más largo que coincide (70 -> línea 1, 64 -> línea 6, 630 -> línea
+# 17...). Las líneas y los subtotales A) a D) forman una jerarquía que se
+# resuelve una sola vez en una matriz de incidencia (filas del informe ×
+# líneas de detalle), así que el informe completo de un periodo sale de una
+# multiplicación matricial sobre los totales por categoría, que a su vez son
+# dos lecturas de las sumas prefijo diarias (ver finanzas.agregados).
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finanzas.agregados import totales_rango
+from finanzas.almacen import version_libro
+from finanzas.cache import memoizar
+
+# (código, concepto, prefijos de cuenta, subtotal padre, siempre visible)
+LINEAS_PYG = (
+    ("1", "1. Importe neto de la cifra de negocios", ("70",), "A", True),
+    ("2", "2. Variación de existencias de productos terminados y en curso", ("71",), "A", False),
+    ("3", "3. Trabajos realizados por la empresa para su activo", ("73",), "A", False),
+    ("4", "4. Aprovisionamientos", ("60", "61"), "A", True),
+    ("5", "5. Otros ingresos de explotación", ("74", "75"), "A", True),
+    ("6", "6. Gastos de personal", ("64",), "A", True),
+    ("7", "7. Otros gastos de explotación", ("62", "63", "65"), "A", True),
+    ("8", "8. Amortización del inmovilizado", ("68",), "A", True),
+    ("9", "9. Imputación de subvenciones de inmovilizado no financiero y otras", ("746",), "A", False),
+    ("10", "10. Excesos de provisiones", ("795",), "A", False),
+    ("11", "11. Deterioro y resultado por enajenaciones del inmovilizado", ("67", "69", "77", "79"), "A", False),
+    ("A", "A) RESULTADO DE EXPLOTACIÓN", (), "C", True),
+    ("12", "12. Ingresos financieros", ("76",), "B", True),
+    ("13", "13. Gastos financieros", ("66",), "B", True),
+    ("14", "14. Variación de valor razonable en instrumentos financieros", ("663", "763"), "B", False),
+    ("15", "15. Diferencias de cambio", ("668", "768"), "B", False),
+    ("16", "16. Deterioro y resultado por enajenaciones de instrumentos financieros",
+     ("666", "667", "673", "675", "696", "697", "698", "699", "766", "773", "775", "796", "797", "798", "799"), "B", False),
+    ("B", "B) RESULTADO FINANCIERO", (), "C", True),
+    ("C", "C) RESULTADO ANTES DE IMPUESTOS", (), "D", True),
+    ("17", "17. Impuestos sobre beneficios", ("630", "633", "638"), "D", True),
+    ("D", "D) RESULTADO DEL EJERCICIO", (), None, True),
+)
+LINEA_VENTAS = "1"
+
+# Cuenta del PGC de cada categoría del libro; las categorías sin cuenta usan la de su tipo
+CUENTAS_POR_DEFECTO = {
+    "Ventas": "700",
+    "Prestación de servicios": "705",
+    "Subvenciones": "740",
+    "Intereses": "769",
+    "Otros ingresos": "759",
+    "Suministros": "628",
+    "Alquiler": "621",
+    "Salarios": "640",
+    "Marketing": "627",
+    "Software": "629",
+    "Equipamiento": "602",
+    "Seguros": "625",
+    "Impuestos": "631",
+    "Otros": "629",
+}
+CUENTA_POR_TIPO = {"Ingreso": "759", "Gasto": "629"}
+
+_CODIGOS = [codigo for codigo, *_ in LINEAS_PYG]
+_SUBTOTALES = {codigo for codigo, _, prefijos, *_ in LINEAS_PYG if not prefijos}
+_DETALLE = [codigo for codigo in _CODIGOS if codigo not in _SUBTOTALES]
+_PREFIJOS = {prefijo: codigo for codigo, _, prefijos, *_ in LINEAS_PYG for prefijo in prefijos}
+_LONGITUDES = sorted({len(p) for p in _PREFIJOS}, reverse=True)
+
+
+# Matriz (filas del informe × líneas de detalle): 1 si la línea de detalle suma
+# en la fila, siguiendo la cadena de subtotales padre
+def _incidencia():
+    padres = {codigo: padre for codigo, _, _, padre, _ in LINEAS_PYG}
+    matriz = np.zeros((len(_CODIGOS), len(_DETALLE)))
+    for columna, codigo in enumerate(_DETALLE):
+        while codigo is not None:
+            matriz[_CODIGOS.index(codigo), columna] = 1.0
+            codigo = padres[codigo]
+    return matriz
+
+
+_INCIDENCIA = _incidencia()
+
+
+# Asignación categoría -> cuenta: la guardada en preferencias sobre la de por defecto
+def cuentas_categorias(preferencias=None):
+    return {**CUENTAS_POR_DEFECTO, **((preferencias or {}).get("cuentas_pgc") or {})}
+
+
+# Cuenta válida para la cuenta de resultados: 3 o 4 dígitos de los grupos 6 o 7
+# con una línea asignada
+def cuenta_valida(cuenta):
+    cuenta = str(cuenta).strip()
+    return cuenta.isdigit() and 3 <= len(cuenta) <= 4 and pd.notna(linea_cuenta([cuenta]).iloc[0])
+
+
+# Línea de detalle de cada cuenta por el prefijo más largo (NaN si no tiene)
+def linea_cuenta(cuentas):
+    cuentas = pd.Series(cuentas, dtype=object).astype(str)
+    lineas = pd.Series(None, index=cuentas.index, dtype=object)
+    for longitud in _LONGITUDES:
+        lineas = lineas.where(lineas.notna(), cuentas.str[:longitud].map(_PREFIJOS))
+    return lineas
+
+
+# Cuenta de resultados de [inicio, fin]: una fila por línea con su valor
+# (ingresos en positivo y gastos en negativo) y el porcentaje sobre la cifra de
+# negocios. Sin `completa`, las líneas opcionales a cero se omiten.
+@memoizar(ttl=300, version=version_libro)
+def cuenta_resultados(almacen, inicio, fin, cuentas=None, completa=False):
+    cuentas = {**CUENTAS_POR_DEFECTO, **(cuentas or {})}
+    totales = totales_rango(almacen, inicio, fin)
+    signo = np.where(totales["tipo"] == "Ingreso", 1.0, -1.0)
+    cuenta = totales["categoria"].map(cuentas).fillna(totales["tipo"].map(CUENTA_POR_TIPO)).fillna(CUENTA_POR_TIPO["Gasto"])
+    columna = pd.Index(_DETALLE).get_indexer(linea_cuenta(cuenta).fillna(_PREFIJOS["62"]))
+
+    detalle = np.bincount(columna, weights=signo * totales["total"].to_numpy(), minlength=len(_DETALLE))
+    valores = _INCIDENCIA @ detalle
+    ventas = valores[_CODIGOS.index(LINEA_VENTAS)]
+    informe = pd.DataFrame({
+        "codigo": _CODIGOS,
+        "concepto": [concepto for _, concepto, *_ in LINEAS_PYG],
+        "subtotal": [codigo in _SUBTOTALES for codigo in _CODIGOS],
+        "valor": valores,
+        "porcentaje": valores / ventas * 100 if ventas else np.zeros(len(valores)),
+    })
+    if not completa:
+        fijas = np.array([fija for *_, fija in LINEAS_PYG])
+        informe = informe[fijas | (np.round(valores, 2) != 0)].reset_index(drop=True)
+    return informe
+
+
+# Uso: python -m finanzas.resultados --transacciones 500000
+if __name__ == "__main__":
+    from finanzas.agregados import rango_anterior, sumas_prefijo
+    from finanzas.almacen import AlmacenLibro
+    from finanzas.generadores import generar_transacciones
+
+    parser = argparse.ArgumentParser(description="Mide la cuenta de resultados sobre el libro")
+    parser.add_argument("--transacciones", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        almacen = AlmacenLibro(os.path.join(directorio, "resultados.db"))
+        almacen.insertar_transacciones(generar_transacciones(args.transacciones, dias=5 * 365, semilla=18))
+        hoy = pd.Timestamp.now().normalize()
+        inicio, fin = hoy.to_period("Y").start_time, hoy
+
+        comienzo = time.perf_counter()
+        sumas_prefijo(almacen)
+        print(f"{args.transacciones} transacciones · sumas prefijo: {(time.perf_counter() - comienzo) * 1000:.1f} ms")
+        comienzo = time.perf_counter()
+        for dias in range(100):
+            cuenta_resultados.__wrapped__(almacen, inicio - pd.Timedelta(days=dias), fin)
+        print(f"cuenta de resultados de un periodo: {(time.perf_counter() - comienzo) * 10:.2f} ms")
+
+        informe = cuenta_resultados.__wrapped__(almacen, inicio, fin).set_index("codigo")
+        anterior = cuenta_resultados.__wrapped__(almacen, *rango_anterior(inicio, fin)).set_index("codigo")
+        print(informe[["concepto", "valor", "porcentaje"]].round(1).to_string())
+        print(f"resultado: {informe.loc['D', 'valor']:,.2f} · periodo anterior {anterior.loc['D', 'valor']:,.2f}")
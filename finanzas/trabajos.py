@@ -0,0 +1,157 @@
+# Cola de trabajos en segundo plano sobre un pool de procesos
+#
+# Para tareas pesadas (informes PDF) que congelarían la sesión si se ejecutasen
+# en el hilo del script de Streamlit. Cada trabajo produce un fichero: la ruta
+# hace de clave, así que un trabajo ya terminado (el fichero existe) o en curso
+# se reutiliza en lugar de repetirse. Los procesos informan del progreso por una
+# cola que un hilo del proceso principal vuelca en el estado de cada trabajo.
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROCESOS = max(1, min(2, (os.cpu_count() or 1) - 1))
+
+EN_COLA = "En cola"
+EN_CURSO = "En curso"
+TERMINADO = "Terminado"
+FALLIDO = "Error"
+
+_COLA = None
+_BLOQUEO_COLA = threading.Lock()
+_progreso_proceso = None
+
+
+class Trabajo:
+    def __init__(self, id_trabajo, ruta, descripcion):
+        self.id = id_trabajo
+        self.ruta = ruta
+        self.descripcion = descripcion
+        self.estado = EN_COLA
+        self.progreso = 0.0
+        self.mensaje = ""
+        self.error = None
+        self.creado = time.time()
+        self.terminado = None
+
+    @property
+    def activo(self):
+        return self.estado in (EN_COLA, EN_CURSO)
+
+    @property
+    def duracion(self):
+        return (self.terminado or time.time()) - self.creado
+
+
+def _iniciar_proceso(cola):
+    global _progreso_proceso
+    _progreso_proceso = cola
+
+
+# Se ejecuta en el proceso del pool: escribe en un temporal y lo renombra, de
+# modo que la existencia del fichero final implica que está completo
+def _ejecutar(id_trabajo, funcion, ruta, args):
+    def progreso(fraccion, mensaje=""):
+        _progreso_proceso.put((id_trabajo, float(fraccion), mensaje))
+
+    progreso(0.0, "Iniciando")
+    parcial = f"{ruta}.{os.getpid()}.parcial"
+    try:
+        funcion(parcial, *args, progreso=progreso)
+        os.replace(parcial, ruta)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+    return ruta
+
+
+class ColaTrabajos:
+    def __init__(self, procesos=PROCESOS):
+        # forkserver: no se hereda el estado (hilos, conexiones) del servidor
+        contexto = multiprocessing.get_context("forkserver")
+        self._avisos = contexto.SimpleQueue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=procesos, mp_context=contexto, initializer=_iniciar_proceso, initargs=(self._avisos,)
+        )
+        self._trabajos = {}                                   # ruta -> Trabajo
+        self._por_id = {}
+        self._ids = itertools.count(1)
+        self._bloqueo = threading.Lock()
+        threading.Thread(target=self._escuchar, name="cola-trabajos", daemon=True).start()
+
+    def _escuchar(self):
+        while True:
+            id_trabajo, fraccion, mensaje = self._avisos.get()
+            trabajo = self._por_id.get(id_trabajo)
+            if trabajo is not None and trabajo.activo:
+                trabajo.estado = EN_CURSO
+                trabajo.progreso = fraccion
+                trabajo.mensaje = mensaje
+
+    def _terminar(self, trabajo, futuro):
+        trabajo.terminado = time.time()
+        error = futuro.exception()
+        if error is None:
+            trabajo.estado, trabajo.progreso, trabajo.mensaje = TERMINADO, 1.0, "Listo"
+        else:
+            trabajo.estado, trabajo.error, trabajo.mensaje = FALLIDO, error, f"{type(error).__name__}: {error}"
+
+    def _buscar(self, ruta):
+        trabajo = self._trabajos.get(ruta)
+        if trabajo is not None and (trabajo.activo or trabajo.estado == FALLIDO or os.path.exists(ruta)):
+            return trabajo
+        if os.path.exists(ruta):
+            trabajo = self._registrar(ruta, "")
+            trabajo.estado, trabajo.progreso, trabajo.terminado = TERMINADO, 1.0, trabajo.creado
+            return trabajo
+        return None
+
+    def _registrar(self, ruta, descripcion):
+        trabajo = Trabajo(next(self._ids), ruta, descripcion)
+        self._trabajos[ruta] = self._por_id[trabajo.id] = trabajo
+        return trabajo
+
+    # Trabajo asociado a `ruta`: el que está en curso o ha fallado, uno terminado
+    # si el fichero existe (aunque se generase en una ejecución anterior) o None
+    def trabajo(self, ruta):
+        with self._bloqueo:
+            return self._buscar(ruta)
+
+    # Encola `funcion(ruta_temporal, *args, progreso=...)`, que debe ser una
+    # función de módulo (se envía por referencia al proceso). Si ya hay un trabajo
+    # para la misma ruta, en curso o terminado, se devuelve ese.
+    def enviar(self, ruta, funcion, *args, descripcion=""):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with self._bloqueo:
+            existente = self._buscar(ruta)
+            if existente is not None and existente.estado != FALLIDO:
+                return existente
+            trabajo = self._registrar(ruta, descripcion)
+        futuro = self._pool.submit(_ejecutar, trabajo.id, funcion, ruta, args)
+        futuro.add_done_callback(lambda f: self._terminar(trabajo, f))
+        return trabajo
+
+    def trabajos(self):
+        with self._bloqueo:
+            return sorted(self._trabajos.values(), key=lambda t: t.creado, reverse=True)
+
+    def pendientes(self):
+        with self._bloqueo:
+            return sum(trabajo.activo for trabajo in self._trabajos.values())
+
+
+# Una cola por proceso del servidor, compartida por todas las sesiones
+def cola_trabajos():
+    global _COLA
+    with _BLOQUEO_COLA:
+        if _COLA is None:
+            _COLA = ColaTrabajos()
+        return _COLA
+
+
+# Trabajos en cola o en curso, sin crear la cola si aún no se ha usado
+def trabajos_pendientes():
+    cola = _COLA
+    return cola.pendientes() if cola is not None else 0
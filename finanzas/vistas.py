@@ -0,0 +1,244 @@
+# Vistas columnares en memoria ordenadas por fecha
+#
+# Cada vista guarda las columnas de una tabla como arrays numpy ordenados por
+# (fecha, id): un rango de fechas es un corte por búsqueda binaria y los filtros
+# por tipo, categoría o estado se evalúan sólo sobre ese corte, con tablas de
+# booleanos indexadas por el código de cada valor. Sólo se materializa el
+# DataFrame de las filas que sobreviven. La sincronización es incremental
+# (filas con id mayor que el último visto), como en los índices de texto, y las
+# filas modificadas se vuelven a leer a partir del registro de cambios.
+# Las altas y las modificaciones sustituyen los arrays en lugar de modificarlos,
+# de modo que una selección conserva una instantánea coherente.
+import threading
+
+import numpy as np
+import pandas as pd
+
+from finanzas.almacen import TABLAS
+
+# La clave de orden combina el día (desde 1970) y el id en un único int64
+_BITS_ID = 40
+
+# Columna de orden y columnas de texto codificadas de cada tabla
+ESPECIFICACIONES = {
+    "transacciones": ("fecha", ("descripcion", "tipo", "categoria", "cuenta")),
+    "facturas": ("fecha_emision", ("numero", "cliente", "estado")),
+}
+
+_VISTAS = {}
+_BLOQUEO_VISTAS = threading.Lock()
+
+
+def _dia(valor):
+    return int(np.datetime64(pd.Timestamp(valor).date(), "D").astype(np.int64))
+
+
+def _dias(serie):
+    return serie.to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+class VistaOrdenada:
+    def __init__(self, columnas, columna_orden, fechas, textos):
+        self.columnas = list(columnas)
+        self.columna_orden = columna_orden
+        self._fechas = set(fechas)
+        self._textos = set(textos)
+        self._clave = np.empty(0, dtype=np.int64)
+        self._datos = {c: np.empty(0, dtype=self._tipo(c)) for c in self.columnas}
+        self._vocabularios = {c: {} for c in self._textos}         # valor -> código
+        self._valores = {c: np.empty(0, dtype=object) for c in self._textos}
+        self.ultimo_id = 0
+        self.ultimo_cambio = 0
+        self.bloqueo = threading.Lock()
+
+    def __len__(self):
+        return len(self._clave)
+
+    def _tipo(self, columna):
+        if columna == "id" or columna in self._fechas:
+            return np.int64
+        if columna in self._textos:
+            return np.int32
+        return np.float64
+
+    def _codificar(self, columna, serie):
+        codigos, unicos = pd.factorize(serie)
+        vocabulario = self._vocabularios[columna]
+        traduccion = np.array([vocabulario.setdefault(v, len(vocabulario)) for v in unicos], dtype=np.int32)
+        if len(vocabulario) > len(self._valores[columna]):
+            valores = np.empty(len(vocabulario), dtype=object)
+            valores[:] = list(vocabulario)
+            self._valores[columna] = valores
+        return traduccion[codigos]
+
+    def agregar(self, filas):
+        if filas.empty:
+            return
+        nuevos = {}
+        for columna in self.columnas:
+            if columna in self._fechas:
+                nuevos[columna] = _dias(filas[columna])
+            elif columna in self._textos:
+                nuevos[columna] = self._codificar(columna, filas[columna])
+            else:
+                nuevos[columna] = filas[columna].to_numpy(dtype=self._tipo(columna))
+
+        # Inserción ordenada: las altas suelen ser recientes y caen al final
+        clave = (nuevos[self.columna_orden] << _BITS_ID) | nuevos["id"]
+        orden = np.argsort(clave)
+        clave = clave[orden]
+        posiciones = np.searchsorted(self._clave, clave)
+        self._clave = np.insert(self._clave, posiciones, clave)
+        self._datos = {c: np.insert(self._datos[c], posiciones, nuevos[c][orden]) for c in self.columnas}
+        self.ultimo_id = max(self.ultimo_id, int(nuevos["id"].max()))
+
+    # Filas ya presentes que han cambiado: se localizan por su clave y se
+    # escriben sobre copias de las columnas. Si cambia la fecha (y con ella la
+    # posición) la fila se quita y se vuelve a insertar.
+    def actualizar(self, filas):
+        if filas.empty:
+            return
+        ids = filas["id"].to_numpy(dtype=np.int64)
+        presentes = np.isin(self._datos["id"], ids)
+        nueva_clave = (_dias(filas[self.columna_orden]) << _BITS_ID) | ids
+        if np.isin(nueva_clave, self._clave[presentes]).all():
+            posiciones = np.searchsorted(self._clave, nueva_clave)
+            for columna in self.columnas:
+                if columna in self._fechas:
+                    valores = _dias(filas[columna])
+                elif columna in self._textos:
+                    valores = self._codificar(columna, filas[columna])
+                else:
+                    valores = filas[columna].to_numpy(dtype=self._tipo(columna))
+                copia = self._datos[columna].copy()
+                copia[posiciones] = valores
+                self._datos = {**self._datos, columna: copia}
+            return
+        self._clave = self._clave[~presentes]
+        self._datos = {c: v[~presentes] for c, v in self._datos.items()}
+        self.agregar(filas)
+
+    def _corte(self, fecha_inicio, fecha_fin):
+        inicio = 0 if fecha_inicio is None else np.searchsorted(self._clave, _dia(fecha_inicio) << _BITS_ID)
+        fin = len(self._clave) if fecha_fin is None else np.searchsorted(self._clave, (_dia(fecha_fin) + 1) << _BITS_ID)
+        return int(inicio), int(max(fin, inicio))
+
+    # Filas en el rango [fecha_inicio, fecha_fin] que cumplen los filtros (columna
+    # de texto -> valores admitidos; vacío = sin filtro) y, si se indica, cuyo id
+    # está en `ids`. Devuelve una Seleccion en orden descendente por (fecha, id).
+    def seleccionar(self, fecha_inicio=None, fecha_fin=None, ids=None, **filtros):
+        with self.bloqueo:
+            inicio, fin = self._corte(fecha_inicio, fecha_fin)
+            mascara = np.ones(fin - inicio, dtype=bool)
+            for columna, valores in filtros.items():
+                if not valores:
+                    continue
+                admitidos = np.zeros(len(self._valores[columna]), dtype=bool)
+                codigos = [self._vocabularios[columna][v] for v in valores if v in self._vocabularios[columna]]
+                admitidos[codigos] = True
+                mascara &= admitidos[self._datos[columna][inicio:fin]]
+            if ids is not None:
+                mascara &= np.isin(self._datos["id"][inicio:fin], ids)
+            posiciones = (inicio + np.flatnonzero(mascara))[::-1]
+            return Seleccion(self, posiciones, self._clave, dict(self._datos), dict(self._valores))
+
+
+# Resultado de una consulta sobre una vista: posiciones sobre una instantánea de
+# sus arrays. Sólo se convierten a DataFrame las filas que se piden.
+class Seleccion:
+    def __init__(self, vista, posiciones, clave, datos, valores):
+        self.columnas = vista.columnas
+        self._fechas = vista._fechas
+        self._textos = vista._textos
+        self._posiciones = posiciones
+        self._datos = datos
+        self._valores = valores
+        self.claves = clave[posiciones]  # descendentes
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    @property
+    def empty(self):
+        return len(self._posiciones) == 0
+
+    # Memoria propia para la caché (los arrays de la instantánea son de la vista)
+    @property
+    def nbytes(self):
+        return self._posiciones.nbytes + self.claves.nbytes
+
+    def _materializar(self, posiciones):
+        datos = {}
+        for columna in self.columnas:
+            valores = self._datos[columna][posiciones]
+            if columna in self._fechas:
+                datos[columna] = valores.astype("datetime64[D]").astype("datetime64[ns]")
+            elif columna in self._textos:
+                datos[columna] = self._valores[columna][valores]
+            else:
+                datos[columna] = valores
+        return pd.DataFrame(datos, columns=self.columnas)
+
+    def dataframe(self):
+        return self._materializar(self._posiciones)
+
+    # Posición (en el orden de la selección) de la primera fila posterior al cursor
+    def desplazamiento(self, despues=None):
+        if despues is None:
+            return 0
+        return int(np.searchsorted(-self.claves, -despues, side="right"))
+
+    # Paginación por clave: `despues` es la clave de la última fila de la página
+    # anterior. Devuelve la página y el cursor de la siguiente (None si es la última).
+    def pagina(self, tamano, despues=None):
+        inicio = self.desplazamiento(despues)
+        fin = min(inicio + tamano, len(self))
+        siguiente = int(self.claves[fin - 1]) if fin < len(self) else None
+        return self._materializar(self._posiciones[inicio:fin]), siguiente
+
+    # Recorre la selección en DataFrames de `tamano` filas (exportaciones)
+    def bloques(self, tamano):
+        for inicio in range(0, len(self), tamano):
+            yield self._materializar(self._posiciones[inicio:inicio + tamano])
+
+    # Número de filas por valor de una columna de texto, de mayor a menor
+    def recuento(self, columna):
+        cuentas = np.bincount(self._datos[columna][self._posiciones], minlength=len(self._valores[columna]))
+        serie = pd.Series(cuentas, index=self._valores[columna], name="count")
+        return serie[serie > 0].sort_values(ascending=False, kind="stable")
+
+    # Suma de una columna numérica por valor de una columna de texto
+    def suma(self, columna, por):
+        sumas = np.bincount(
+            self._datos[por][self._posiciones],
+            weights=self._datos[columna][self._posiciones],
+            minlength=len(self._valores[por]),
+        )
+        return pd.Series(sumas, index=self._valores[por], name=columna)
+
+
+def _vista(almacen, tabla):
+    clave = (almacen.ruta, tabla)
+    with _BLOQUEO_VISTAS:
+        vista = _VISTAS.get(clave)
+        if vista is None:
+            columnas, fechas = TABLAS[tabla]
+            columna_orden, textos = ESPECIFICACIONES[tabla]
+            vista = _VISTAS[clave] = VistaOrdenada(columnas, columna_orden, fechas, textos)
+    with vista.bloqueo:
+        if not vista.ultimo_id:
+            # Carga inicial: ya refleja todos los cambios registrados hasta ahora
+            vista.ultimo_cambio = almacen.ultimo_cambio()
+        vista.agregar(almacen.filas_desde(tabla, vista.ultimo_id))
+        vista.ultimo_cambio, ids, _ = almacen.cambios_desde(tabla, vista.ultimo_cambio)
+        if len(ids):
+            vista.actualizar(almacen.filas_por_id(tabla, ids[ids <= vista.ultimo_id]))
+    return vista
+
+
+def vista_transacciones(almacen):
+    return _vista(almacen, "transacciones")
+
+
+def vista_facturas(almacen):
+    return _vista(almacen, "facturas")
@@ -0,0 +1,62 @@
+# Páginas de la aplicación: cada opción del menú lateral es un módulo de este
+# paquete con una función mostrar(contexto). El módulo se importa la primera vez
+# que se visita su página, así que lo que sólo usa una página (plotly,
+# matplotlib, xlsxwriter, los cálculos de finanzas...) no se carga al arrancar
+# ni en los reruns de las demás.
+import importlib
+from datetime import datetime
+
+from finanzas.formato import Formato
+from finanzas.medicion import seccion
+from finanzas.perfilado import perfilar
+from finanzas.prevision import PREFERENCIAS_PREVISION
+
+PAGINAS = {
+    "Dashboard": "paginas.dashboard",
+    "Transacciones": "paginas.transacciones",
+    "Facturas": "paginas.facturas",
+    "Informes": "paginas.informes",
+    "Configuración": "paginas.configuracion",
+    "Ayuda & Soporte": "paginas.ayuda",
+}
+
+
+# Estado compartido por las páginas en un rerun: el almacén y las preferencias
+# guardadas en Configuración (formato, exportación, previsión, categorización e impuestos)
+class Contexto:
+    def __init__(self, almacen):
+        from finanzas.exportacion import OPCIONES_EXCEL_POR_DEFECTO
+
+        self.almacen = almacen
+        self.preferencias = almacen.preferencias()
+        self.formato = Formato.desde_preferencias(self.preferencias)
+        self.opciones_excel = {clave: self.preferencias.get(clave, valor) for clave, valor in OPCIONES_EXCEL_POR_DEFECTO.items()}
+        self.opciones_prevision = {clave: self.preferencias.get(clave, valor) for clave, valor in PREFERENCIAS_PREVISION.items()}
+        self.categorizacion_automatica = self.preferencias.get("categorizacion_automatica", True)
+        # Tipos de IVA y retención por categoría de gasto cambiados en preferencias (sobre los de por defecto)
+        self.tipos_impuestos = (self.preferencias.get("iva_gastos"), self.preferencias.get("retenciones_irpf"))
+
+    # Clave de un fichero exportado: consulta, versión del libro y preferencias que afectan al contenido
+    def clave_exportacion(self, *consulta):
+        formato = self.formato
+        return (self.almacen.ruta, self.almacen.version(), consulta, formato.moneda, formato.decimales, formato.formato_fecha, tuple(self.opciones_excel.items()))
+
+    # Los informes PDF se dibujan en la cola de procesos a partir de datos ya formateados
+    def informe_pdf(self, titulo, subtitulo, secciones):
+        ahora = datetime.now()
+        return {
+            'titulo': titulo,
+            'subtitulo': subtitulo,
+            'pie': f"Generado el {self.formato.fecha(ahora)} a las {ahora:%H:%M}",
+            'secciones': secciones
+        }
+
+
+# Cada página se mide como una sección; la importación aparte, porque sólo la
+# paga la primera visita. Si hay una captura del perfilador para la página, el
+# rerun se muestrea.
+def mostrar_pagina(nombre, contexto):
+    with seccion(nombre), perfilar(nombre):
+        with seccion("Importación"):
+            modulo = importlib.import_module(PAGINAS[nombre])
+        modulo.mostrar(contexto)
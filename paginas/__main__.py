@@ -0,0 +1,49 @@
+# Mide el coste de importar la aplicación y cada página, cada medida en un
+# proceso nuevo (en frío): lo que paga el arranque y la primera visita a cada página
+# Uso: python -m paginas --repeticiones 5
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+from paginas import PAGINAS
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Lo que importa app.py antes de elegir página: sus importaciones de primer
+# nivel, leídas del propio app.py para que no se queden atrás
+def importaciones_arranque(ruta=os.path.join(RAIZ, "app.py")):
+    with open(ruta, encoding="utf-8") as fichero:
+        arbol = ast.parse(fichero.read())
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            modulos += [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+            modulos.append(nodo.module)
+    return "import " + ", ".join(dict.fromkeys(modulos))
+
+
+ARRANQUE = importaciones_arranque()
+
+
+def medir(importacion, previa, repeticiones):
+    codigo = f"{previa}\nimport time\ninicio = time.perf_counter()\n{importacion}\nprint(time.perf_counter() - inicio)"
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, cwd=RAIZ, check=True)
+        tiempos.append(float(salida.stdout.split()[-1]))
+    return statistics.median(tiempos) * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación del arranque y de cada página")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"arranque: {medir(ARRANQUE, '', args.repeticiones):.0f} ms")
+    for nombre, modulo in PAGINAS.items():
+        print(f"  {nombre}: +{medir(f'import {modulo}', ARRANQUE, args.repeticiones):.0f} ms")
@@ -0,0 +1,263 @@
+# Página Ayuda y soporte: guía de uso, preguntas frecuentes y contacto
+import streamlit as st
+
+from componentes import pestanas
+
+
+def mostrar(contexto):
+    st.markdown("<h1 class='main-header'>Ayuda y Soporte</h1>", unsafe_allow_html=True)
+    
+    # Pestañas para diferentes secciones
+    pestana = pestanas(["📚 Guía de Uso", "❓ Preguntas Frecuentes", "🛠️ Soporte Técnico"], key="ayuda_pestana")
+    
+    if pestana == "📚 Guía de Uso":
+        st.markdown("<h2 class='sub-header'>Guía de Uso</h2>", unsafe_allow_html=True)
+        
+        # Lista de temas
+        temas = [
+            "Primeros pasos con el sistema",
+            "Gestión de transacciones",
+            "Creación y gestión de facturas",
+            "Interpretación de informes financieros",
+            "Uso de las funciones de IA",
+            "Configuración del sistema",
+            "Exportación de datos",
+            "Gestión de impuestos"
+        ]
+        
+        tema_seleccionado = st.selectbox("Seleccione un tema", temas)
+        
+        # Mostrar contenido según el tema seleccionado
+        if tema_seleccionado == "Primeros pasos con el sistema":
+            st.markdown("""
+            <div class='card'>
+                <h3>Primeros pasos con el sistema</h3>
+                
+                <h4>1. Configuración inicial</h4>
+                <p>Antes de comenzar a utilizar el sistema, es importante configurar los datos básicos de su empresa:</p>
+                <ul>
+                    <li>Vaya a la sección de "Configuración" → "Empresa"</li>
+                    <li>Complete la información fiscal y bancaria</li>
+                    <li>Suba el logo de su empresa</li>
+                </ul>
+                
+                <h4>2. Configuración de usuarios</h4>
+                <p>Si va a compartir el acceso con otros miembros de su equipo:</p>
+                <ul>
+                    <li>Vaya a "Configuración" → "Usuarios"</li>
+                    <li>Añada usuarios con diferentes roles según sus necesidades</li>
+                </ul>
+                
+                <h4>3. Importar datos iniciales</h4>
+                <p>Para empezar con sus datos históricos:</p>
+                <ul>
+                    <li>Vaya a cada sección (Transacciones, Facturas) y utilice la opción de importar</li>
+                    <li>Puede importar desde Excel, CSV o su software contable anterior</li>
+                </ul>
+                
+                <h4>4. Explorar el dashboard</h4>
+                <p>El dashboard principal le ofrece una visión general de sus finanzas:</p>
+                <ul>
+                    <li>Métricas clave: balance, ingresos, gastos</li>
+                    <li>Flujo de caja y previsiones</li>
+                    <li>Facturas pendientes y próximos vencimientos</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+            
+        elif tema_seleccionado == "Uso de las funciones de IA":
+            st.markdown("""
+            <div class='card'>
+                <h3>Uso de las funciones de IA</h3>
+                
+                <h4>1. Categorización automática de gastos</h4>
+                <p>El sistema utiliza inteligencia artificial para categorizar automáticamente sus gastos:</p>
+                <ul>
+                    <li>Al registrar una nueva transacción, el sistema sugerirá una categoría basada en la descripción</li>
+                    <li>Los extractos importados se categorizan al importarlos: primero con reglas por palabras clave (nóminas, recibos de suministros, impuestos...) y después con un modelo entrenado con su propio historial</li>
+                    <li>Puede revisar y corregir las categorías asignadas en Transacciones → 📥 Importar</li>
+                    <li>Con el tiempo, el sistema aprende de sus correcciones y mejora la precisión</li>
+                </ul>
+                
+                <h4>2. Predicción de flujo de caja</h4>
+                <p>La IA analiza sus patrones históricos para predecir el flujo de caja futuro:</p>
+                <ul>
+                    <li>En el dashboard, la sección "Análisis Predictivo" muestra la proyección de ingresos y gastos</li>
+                    <li>El sistema identifica patrones estacionales y tendencias</li>
+                    <li>Las alertas le notificarán si se prevén problemas de liquidez</li>
+                </ul>
+                
+                <h4>3. Recomendaciones financieras</h4>
+                <p>Basándose en el análisis de sus datos, el sistema proporciona recomendaciones:</p>
+                <ul>
+                    <li>Optimización de flujo de caja</li>
+                    <li>Identificación de gastos excesivos o irregulares</li>
+                    <li>Sugerencias para mejorar la rentabilidad</li>
+                </ul>
+                
+                <h4>4. Mejora continua</h4>
+                <p>Las funciones de IA mejoran con el uso:</p>
+                <ul>
+                    <li>Cuantos más datos registre, mejores serán las predicciones</li>
+                    <li>Puede ajustar la sensibilidad de las predicciones en "Configuración" → "Integración con IA"</li>
+                </ul>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    elif pestana == "❓ Preguntas Frecuentes":
+        st.markdown("<h2 class='sub-header'>Preguntas Frecuentes</h2>", unsafe_allow_html=True)
+        
+        # Preguntas frecuentes con expander
+        with st.expander("¿Cómo puedo importar mis datos desde otro sistema?"):
+            st.markdown("""
+            Para importar datos desde otro sistema:
+            
+            1. Exporte sus movimientos del sistema anterior en formato CSV, o descargue el extracto de su banco en Norma 43 u OFX
+            2. Vaya a Transacciones → 📥 Importar
+            3. Seleccione el archivo y la cuenta de destino de los movimientos
+            4. Pulse "Importar": se indican las filas nuevas, las duplicadas y las rechazadas (con su línea y motivo)
+            
+            Las columnas del CSV se reconocen por su nombre (fecha, concepto o descripción, importe, cargo/abono, tipo, categoría, cuenta). Los movimientos que ya están en el libro no se duplican, por lo que puede volver a importar el mismo fichero sin riesgo.
+            """)
+            
+        with st.expander("¿Es seguro almacenar mis datos financieros en este sistema?"):
+            st.markdown("""
+            Sí, la seguridad es una prioridad:
+            
+            - Todos los datos se almacenan cifrados
+            - Utilizamos protocolos de seguridad estándar de la industria
+            - Las copias de seguridad automáticas protegen contra pérdidas de datos
+            - Cumplimos con normativas de protección de datos como RGPD
+            
+            Además, puede configurar opciones adicionales de seguridad como autenticación de dos factores y restricciones de acceso por IP.
+            """)
+            
+        with st.expander("¿Cómo funciona la categorización automática de gastos?"):
+            st.markdown("""
+            La categorización automática utiliza inteligencia artificial:
+            
+            1. Analiza la descripción, importe y otros detalles de la transacción
+            2. Compara con patrones aprendidos de transacciones anteriores
+            3. Sugiere la categoría más probable
+            
+            El sistema aprende continuamente de sus correcciones, mejorando la precisión con el tiempo. Si desea entrenar el sistema más rápido, puede ir a "Configuración" → "IA" → "Entrenar categorización" y revisar un conjunto de transacciones para mejorar el modelo.
+            """)
+            
+        with st.expander("¿Qué informes fiscales puedo generar?"):
+            st.markdown("""
+            El sistema puede generar diversos informes fiscales:
+            
+            - Declaraciones trimestrales de IVA (modelo 303)
+            - Resumen anual de IVA (modelo 390)
+            - Retenciones e ingresos a cuenta (modelos 111, 115, 123)
+            - Operaciones con terceros (modelo 347)
+            - Libro registro de facturas
+            
+            Los informes se generan en formato oficial o en borrador para facilitar la presentación. En "Informes" → "Impuestos" encontrará todos los informes disponibles.
+            """)
+            
+        with st.expander("¿Puedo acceder al sistema desde dispositivos móviles?"):
+            st.markdown("""
+            Sí, el sistema es completamente responsive:
+            
+            - Funciona en cualquier navegador moderno
+            - Se adapta a diferentes tamaños de pantalla
+            - Disponible como aplicación web progresiva (PWA)
+            
+            También contamos con aplicaciones nativas para iOS y Android que permiten:
+            
+            - Escanear facturas y tickets con la cámara
+            - Recibir notificaciones de vencimientos
+            - Consultar el dashboard y métricas clave
+            - Registrar gastos e ingresos en movimiento
+            """)
+            
+        with st.expander("¿Cómo puedo obtener soporte técnico?"):
+            st.markdown("""
+            Dispone de varias opciones de soporte:
+            
+            1. **Base de conocimientos**: Consulte nuestra documentación en línea y tutoriales
+            2. **Chat en vivo**: Disponible en horario laborable (L-V, 9:00-18:00)
+            3. **Email**: Escriba a soporte@finanzas-pymes.com
+            4. **Teléfono**: +34 912 345 678 (L-V, 9:00-14:00)
+            
+            Para problemas urgentes, puede solicitar una llamada prioritaria desde la sección "Soporte Técnico".
+            """)
+    
+    elif pestana == "🛠️ Soporte Técnico":
+        st.markdown("<h2 class='sub-header'>Soporte Técnico</h2>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h3>Contacte con Soporte</h3>", unsafe_allow_html=True)
+            
+            nombre_soporte = st.text_input("Su nombre")
+            email_soporte = st.text_input("Email de contacto")
+            tipo_problema = st.selectbox("Tipo de problema", ["Técnico", "Funcional", "Facturación", "Otros"])
+            descripcion = st.text_area("Descripción del problema", height=150)
+            archivo = st.file_uploader("Adjuntar capturas o archivos", type=["png", "jpg", "pdf"])
+            
+            if st.button("Enviar Solicitud", use_container_width=True):
+                st.success("Solicitud enviada correctamente. Le responderemos en un plazo de 24 horas laborables.")
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h3>Información de Contacto</h3>", unsafe_allow_html=True)
+            
+            st.markdown("""
+            <p><b>Email:</b> soporte@finanzas-pymes.com</p>
+            <p><b>Teléfono:</b> +34 912 345 678</p>
+            <p><b>Horario:</b> Lunes a Viernes, 9:00 - 18:00</p>
+            
+            <h4>Chat en Vivo</h4>
+            <p>Nuestro chat está disponible durante el horario de atención.</p>
+            """, unsafe_allow_html=True)
+            
+            if st.button("Iniciar Chat", use_container_width=True):
+                st.info("El servicio de chat se abriría en una ventana externa.")
+            
+            st.markdown("<h4>Solicitar Llamada</h4>", unsafe_allow_html=True)
+            
+            telefono_llamada = st.text_input("Su teléfono")
+            horario_preferido = st.selectbox("Horario preferido", ["Mañana (9:00-13:00)", "Tarde (13:00-18:00)"])
+            
+            if st.button("Solicitar Llamada", use_container_width=True):
+                st.success("Solicitud de llamada registrada. Le llamaremos lo antes posible.")
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Acceso a recursos
+        st.markdown("<h3>Recursos Adicionales</h3>", unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown("""
+            <div class='card' style='text-align: center;'>
+                <h4>Base de Conocimientos</h4>
+                <p>Acceda a tutoriales y documentación detallada</p>
+                <a href='#'>Ver documentación</a>
+            </div>
+            """, unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("""
+            <div class='card' style='text-align: center;'>
+                <h4>Tutoriales en Video</h4>
+                <p>Aprenda con nuestros videos explicativos</p>
+                <a href='#'>Ver videos</a>
+            </div>
+            """, unsafe_allow_html=True)
+            
+        with col3:
+            st.markdown("""
+            <div class='card' style='text-align: center;'>
+                <h4>Comunidad de Usuarios</h4>
+                <p>Comparta experiencias con otros usuarios</p>
+                <a href='#'>Acceder al foro</a>
+            </div>
+            """, unsafe_allow_html=True)
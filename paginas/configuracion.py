@@ -0,0 +1,364 @@
+# Página Configuración: preferencias generales, usuarios, empresa y exportación
+import os
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from componentes import pestanas
+from finanzas import medicion, perfilado
+from finanzas.cache import estadisticas_caches, limpiar_caches
+from finanzas.formato import FORMATOS_FECHA, MONEDAS, Formato
+from paginas import PAGINAS
+
+
+def mostrar(contexto):
+    almacen = contexto.almacen
+    formato = contexto.formato
+    opciones_excel = contexto.opciones_excel
+    opciones_prevision = contexto.opciones_prevision
+    categorizacion_automatica = contexto.categorizacion_automatica
+
+    st.markdown("<h1 class='main-header'>Configuración del Sistema</h1>", unsafe_allow_html=True)
+    
+    # Pestañas para diferentes configuraciones
+    pestana = pestanas(["⚙️ General", "👥 Usuarios", "🏢 Empresa", "📊 Exportación"], key="configuracion_pestana")
+    
+    if pestana == "⚙️ General":
+        st.markdown("<h2 class='sub-header'>Configuración General</h2>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h3>Preferencias</h3>", unsafe_allow_html=True)
+            
+            # Valores actuales: los de las preferencias guardadas
+            monedas = list(MONEDAS)
+            formatos_fecha = list(FORMATOS_FECHA)
+            moneda = st.selectbox("Moneda", monedas, index=monedas.index(formato.moneda))
+            decimales = st.selectbox("Decimales en importes", [0, 1, 2], index=formato.decimales)
+            fecha_formato = st.selectbox("Formato de fecha", formatos_fecha, index=formatos_fecha.index(formato.formato_fecha))
+            tema = st.selectbox("Tema", ["Claro", "Oscuro", "Sistema"], index=0)
+            
+            st.markdown("<h3>Notificaciones</h3>", unsafe_allow_html=True)
+            st.checkbox("Notificaciones por email", value=True)
+            st.checkbox("Recordatorios de facturas pendientes", value=True)
+            st.checkbox("Alertas de flujo de caja", value=True)
+            st.checkbox("Notificaciones de vencimientos fiscales", value=True)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h3>Integración con IA</h3>", unsafe_allow_html=True)
+            
+            categorizacion_automatica = st.checkbox(
+                "Categorización automática de gastos", value=categorizacion_automatica,
+                help="Sugiere la categoría de las transacciones nuevas y categoriza los extractos importados"
+            )
+            st.checkbox("Predicción de flujo de caja", value=True)
+            st.checkbox("Recomendaciones financieras", value=True)
+            
+            st.markdown("<h3>Ajustes de Predicciones</h3>", unsafe_allow_html=True)
+            
+            horizonte_prediccion = st.slider("Horizonte de predicción (días)", min_value=30, max_value=365, value=opciones_prevision['horizonte_prediccion'], step=30)
+            intervalo_confianza = st.slider("Intervalo de confianza (%)", min_value=70, max_value=99, value=opciones_prevision['intervalo_confianza'])
+            
+            st.markdown("<h3>Conexiones Externas</h3>", unsafe_allow_html=True)
+            
+            st.checkbox("Conectar con banco", value=False)
+            st.checkbox("Sincronizar con software contable", value=False)
+            st.checkbox("Integración con CRM", value=False)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        # Botón para guardar configuración
+        if st.button("Guardar Configuración", use_container_width=True):
+            almacen.guardar_preferencias({
+                "moneda": moneda,
+                "decimales": decimales,
+                "formato_fecha": fecha_formato,
+                "horizonte_prediccion": horizonte_prediccion,
+                "intervalo_confianza": intervalo_confianza,
+                "categorizacion_automatica": categorizacion_automatica
+            })
+            formato = Formato(moneda, decimales, fecha_formato)
+            st.success(f"Configuración guardada correctamente. Ejemplo: {formato.importe(1234.5)} · {formato.fecha(datetime.now())}")
+        
+        # Estado de la caché compartida entre sesiones
+        with st.expander("Rendimiento: caché de datos"):
+            df_caches = estadisticas_caches()
+            if not df_caches.empty:
+                st.dataframe(
+                    df_caches.rename(
+                        columns={
+                            'cache': 'Caché',
+                            'entradas': 'Entradas',
+                            'mb': 'MB',
+                            'aciertos': 'Aciertos',
+                            'fallos': 'Fallos',
+                            'expulsiones': 'Expulsiones',
+                            'ratio_aciertos': 'Ratio de aciertos'
+                        }
+                    ),
+                    use_container_width=True
+                )
+            if st.button("Vaciar caché", use_container_width=True):
+                limpiar_caches()
+                st.success("Caché vaciada correctamente.")
+
+        # Tiempos de render por página, pestaña y sección (sólo con la medición activada)
+        with st.expander("Rendimiento: tiempos de render"):
+            ajustes = contexto.preferencias.get("medicion", {})
+            col1, col2 = st.columns(2)
+            with col1:
+                medir = st.toggle("Medir tiempos de render", value=ajustes.get("activa", False), key="medicion_activa")
+            with col2:
+                memoria = st.toggle("Medir también la memoria (más lento)", value=ajustes.get("memoria", False), key="medicion_memoria", disabled=not medir)
+            nuevos = {"activa": medir, "memoria": medir and memoria}
+            if nuevos != {"activa": ajustes.get("activa", False), "memoria": ajustes.get("memoria", False)}:
+                almacen.guardar_preferencias({"medicion": nuevos})
+                st.rerun()
+
+            if medir:
+                desglose = st.session_state.get("medicion_ultimo_rerun")
+                if desglose is not None and not desglose.empty:
+                    # Las páginas con su ruta completa (incluye la pestaña); lo anidado, sólo
+                    # con el último tramo y sangrado según su nivel
+                    secciones = [
+                        "\u2003" * nivel + ruta.split(medicion.SEPARADOR)[-1] if nivel else ruta
+                        for ruta, nivel in zip(desglose['seccion'], desglose['nivel'])
+                    ]
+                    st.markdown("**Último rerun**")
+                    st.dataframe(
+                        pd.DataFrame({
+                            'Sección': secciones,
+                            'ms': desglose['ms'].round(1),
+                            'Memoria (KB)': desglose['kb'].round(1),
+                            'Llamadas': desglose['llamadas']
+                        }),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                df_percentiles = medicion.percentiles()
+                if not df_percentiles.empty:
+                    st.markdown(f"**Percentiles (últimos {medicion.VENTANA} reruns por sección, ms)**")
+                    st.dataframe(
+                        df_percentiles.round(1).rename(columns={'seccion': 'Sección', 'reruns': 'Reruns', 'maximo': 'Máximo', 'kb_medio': 'Memoria media (KB)'}),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                if st.button("Reiniciar medidas", use_container_width=True):
+                    medicion.limpiar()
+                    st.session_state.pop("medicion_ultimo_rerun", None)
+                    st.rerun()
+            else:
+                st.caption("Desactivada no añade coste a los reruns. Activada, cada rerun guarda cuánto tarda cada página, pestaña, sección, cálculo de datos y tabla.")
+
+        # Perfil de muestreo de los próximos reruns de una página, guardado en disco
+        with st.expander("Rendimiento: perfil de muestreo"):
+            captura = perfilado.captura_en_curso()
+            if captura is not None:
+                st.info(
+                    f"Capturando {captura.pagina}: {captura.reruns - captura.restantes} de {captura.reruns} reruns "
+                    f"· {captura.muestras} muestras. Visita la página (desde cualquier sesión) para completarla."
+                )
+                if st.button("Detener y guardar", use_container_width=True, key="perfil_detener"):
+                    perfilado.detener()
+                    st.rerun()
+            else:
+                col1, col2, col3 = st.columns([2, 1, 1])
+                with col1:
+                    pagina_perfil = st.selectbox("Página", list(PAGINAS), key="perfil_pagina")
+                with col2:
+                    reruns_perfil = st.number_input("Reruns", min_value=1, max_value=100, value=5, key="perfil_reruns")
+                with col3:
+                    intervalo_perfil = st.number_input("Intervalo (ms)", min_value=1, max_value=100, value=perfilado.INTERVALO_MS, key="perfil_intervalo")
+                if st.button("Capturar perfil", use_container_width=True, key="perfil_capturar"):
+                    perfilado.programar(pagina_perfil, int(reruns_perfil), intervalo_perfil)
+                    st.rerun()
+
+            perfiles = perfilado.perfiles_guardados()
+            if perfiles:
+                ruta_perfil = st.selectbox("Perfiles guardados", perfiles, format_func=os.path.basename, key="perfil_guardado")
+                st.caption("Funciones y secciones (entre corchetes) con más muestras: propias, en la propia función; totales, en la función o en lo que llama.")
+                st.dataframe(pd.read_csv(f"{ruta_perfil}.csv").head(30).round(1), use_container_width=True, hide_index=True)
+                col1, col2 = st.columns(2)
+                with col1:
+                    with open(f"{ruta_perfil}.txt", "rb") as fichero:
+                        st.download_button("Descargar pilas (speedscope, flamegraph)", fichero.read(), file_name=os.path.basename(f"{ruta_perfil}.txt"), mime="text/plain", use_container_width=True)
+                with col2:
+                    with open(f"{ruta_perfil}.csv", "rb") as fichero:
+                        st.download_button("Descargar funciones (CSV)", fichero.read(), file_name=os.path.basename(f"{ruta_perfil}.csv"), mime="text/csv", use_container_width=True)
+    
+    elif pestana == "👥 Usuarios":
+        st.markdown("<h2 class='sub-header'>Gestión de Usuarios</h2>", unsafe_allow_html=True)
+        
+        # Lista de usuarios simulada
+        usuarios = [
+            {"id": 1, "nombre": "Administrador Principal", "email": "admin@empresa.com", "rol": "Administrador", "estado": "Activo"},
+            {"id": 2, "nombre": "Usuario Contabilidad", "email": "contabilidad@empresa.com", "rol": "Editor", "estado": "Activo"},
+            {"id": 3, "nombre": "Usuario Ventas", "email": "ventas@empresa.com", "rol": "Visualizador", "estado": "Activo"},
+            {"id": 4, "nombre": "Usuario Antiguo", "email": "antiguo@empresa.com", "rol": "Visualizador", "estado": "Inactivo"}
+        ]
+        
+        # Convertir a DataFrame
+        df_usuarios = pd.DataFrame(usuarios)
+        
+        # Mostrar tabla
+        st.dataframe(
+            df_usuarios[['nombre', 'email', 'rol', 'estado']].rename(
+                columns={
+                    'nombre': 'Nombre',
+                    'email': 'Email',
+                    'rol': 'Rol',
+                    'estado': 'Estado'
+                }
+            ),
+            use_container_width=True,
+            height=200
+        )
+        
+        # Formulario para nuevo usuario
+        st.markdown("<h3>Añadir Nuevo Usuario</h3>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            nuevo_nombre = st.text_input("Nombre completo")
+            nuevo_email = st.text_input("Email")
+            
+        with col2:
+            nuevo_rol = st.selectbox("Rol", ["Administrador", "Editor", "Visualizador"])
+            nuevo_password = st.text_input("Contraseña", type="password")
+        
+        if st.button("Añadir Usuario", use_container_width=True):
+            st.success(f"Usuario {nuevo_nombre} añadido correctamente.")
+    
+    elif pestana == "🏢 Empresa":
+        st.markdown("<h2 class='sub-header'>Datos de la Empresa</h2>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h3>Información Básica</h3>", unsafe_allow_html=True)
+            
+            nombre_empresa = st.text_input("Nombre de la empresa", value="Empresa ACME, S.L.")
+            cif = st.text_input("CIF/NIF", value="B12345678")
+            direccion = st.text_area("Dirección fiscal", value="Calle Principal, 123\n28001 Madrid")
+            telefono = st.text_input("Teléfono", value="+34 912 345 678")
+            email = st.text_input("Email", value="info@empresa-acme.com")
+            web = st.text_input("Página web", value="www.empresa-acme.com")
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h3>Información Fiscal y Bancaria</h3>", unsafe_allow_html=True)
+            
+            regimen_fiscal = st.selectbox("Régimen fiscal", ["General", "Módulos", "Agrario", "Simplificado"])
+            actividad_economica = st.text_input("Actividad económica", value="Consultoría informática")
+            codigo_cnae = st.text_input("Código CNAE", value="6201")
+            
+            st.markdown("<h4>Datos Bancarios</h4>", unsafe_allow_html=True)
+            banco = st.text_input("Banco", value="Banco Ejemplo")
+            iban = st.text_input("IBAN", value="ES12 3456 7890 1234 5678 9012")
+            swift = st.text_input("SWIFT/BIC", value="EXAMPLEXXX")
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Logo de la empresa
+        st.markdown("<h3>Logo de la Empresa</h3>", unsafe_allow_html=True)
+        
+        # Simular carga de imagen
+        logo_file = st.file_uploader("Subir logo (formato PNG o JPG)", type=["png", "jpg", "jpeg"])
+        
+        # Mostrar imagen de ejemplo si no hay una cargada
+        if not logo_file:
+            st.image("https://img.icons8.com/color/96/000000/company.png", width=100)
+        
+        # Botón para guardar
+        if st.button("Guardar Información de la Empresa", use_container_width=True):
+            st.success("Información de la empresa actualizada correctamente.")
+    
+    elif pestana == "📊 Exportación":
+        st.markdown("<h2 class='sub-header'>Configuración de Exportación</h2>", unsafe_allow_html=True)
+        
+        # Opciones de exportación
+        st.markdown("<h3>Formatos de Exportación</h3>", unsafe_allow_html=True)
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>Excel</h4>", unsafe_allow_html=True)
+            
+            excel_graficos = st.checkbox("Incluir gráficos en Excel", value=opciones_excel['excel_graficos'])
+            excel_formato_condicional = st.checkbox("Aplicar formato condicional", value=opciones_excel['excel_formato_condicional'])
+            excel_formulas = st.checkbox("Incluir fórmulas", value=opciones_excel['excel_formulas'])
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>PDF</h4>", unsafe_allow_html=True)
+            
+            st.checkbox("Incluir logo en PDF", value=True)
+            st.checkbox("PDF firmado digitalmente", value=False)
+            st.checkbox("PDF protegido", value=False)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col3:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>Otros Formatos</h4>", unsafe_allow_html=True)
+            
+            st.checkbox("CSV", value=True)
+            st.checkbox("JSON", value=True)
+            st.checkbox("XML", value=False)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Plantillas
+        st.markdown("<h3>Plantillas de Documentos</h3>", unsafe_allow_html=True)
+        
+        plantilla_factura = st.file_uploader("Plantilla de factura (DOCX)", type=["docx"])
+        plantilla_informe = st.file_uploader("Plantilla de informe financiero (DOCX)", type=["docx"])
+        
+        # Configuración de envío automático
+        st.markdown("<h3>Envío Automático de Informes</h3>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>Informes Periódicos</h4>", unsafe_allow_html=True)
+            
+            informe_periodico = st.selectbox("Informe", ["Resumen Financiero", "Cuenta de Resultados", "Balance", "Flujo de Caja"])
+            periodicidad = st.selectbox("Periodicidad", ["Diario", "Semanal", "Mensual", "Trimestral"])
+            destinatarios = st.text_area("Destinatarios (emails separados por comas)")
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>Programación</h4>", unsafe_allow_html=True)
+            
+            dia_semana = st.selectbox("Día de la semana", ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"])
+            hora = st.time_input("Hora de envío", value=datetime.strptime("08:00", "%H:%M").time())
+            
+            st.checkbox("Incluir archivos adjuntos", value=True)
+            st.checkbox("Enviar incluso si no hay cambios", value=False)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Botón para guardar
+        if st.button("Guardar Configuración de Exportación", use_container_width=True):
+            almacen.guardar_preferencias({
+                'excel_graficos': excel_graficos,
+                'excel_formato_condicional': excel_formato_condicional,
+                'excel_formulas': excel_formulas
+            })
+            st.success("Configuración de exportación guardada correctamente.")
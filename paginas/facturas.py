@@ -0,0 +1,396 @@
+# Página Facturas: listado con cobros, alta con conceptos y análisis de cobros
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from componentes import boton_exportar, grafico, pestanas, tabla_paginada
+from finanzas.busqueda import filtrar_facturas
+from finanzas.cobros import OBJETIVO_DIAS, TRAMOS_ANTIGUEDAD, periodo_medio_cobro
+from finanzas.exportacion import MIME_EXCEL, exportar_seleccion, ruta_exportacion
+
+
+def mostrar(contexto):
+    almacen = contexto.almacen
+    formato = contexto.formato
+    opciones_excel = contexto.opciones_excel
+    clave_exportacion = contexto.clave_exportacion
+
+    st.markdown("<h1 class='main-header'>Gestión de Facturas</h1>", unsafe_allow_html=True)
+    
+    # Pestañas para diferentes secciones
+    pestana = pestanas(["📋 Listado de Facturas", "➕ Nueva Factura", "📊 Análisis de Cobros"], key="facturas_pestana")
+    
+    if pestana == "📋 Listado de Facturas":
+        # Listado de facturas con filtros
+        st.markdown("<h2 class='sub-header'>Listado de Facturas</h2>", unsafe_allow_html=True)
+        
+        # Filtros
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            filtro_estado = st.multiselect("Estado", ["Pendiente", "Pagada", "Vencida"], default=["Pendiente", "Vencida"])
+        
+        with col2:
+            rango_defecto = (datetime.now().date() - timedelta(days=90), datetime.now().date())
+            rango = st.date_input("Rango de emisión", list(rango_defecto))
+            # Con sólo la primera fecha marcada se busca en los últimos 90 días
+            fecha_inicio, fecha_fin = rango if len(rango) == 2 else rango_defecto
+        
+        with col3:
+            filtro_cliente = st.text_input("Cliente")
+        
+        # Consulta indexada de facturas (rango de emisión, estado y cliente)
+        facturas_filtradas = filtrar_facturas(
+            almacen,
+            estados=filtro_estado,
+            cliente=filtro_cliente,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin
+        )
+        
+        # Colorear según estado
+        def colorear_estado(val):
+            if val == 'Pendiente':
+                return 'background-color: #FFF9C4'
+            elif val == 'Pagada':
+                return 'background-color: #C8E6C9'
+            else:  # Vencida
+                return 'background-color: #FFCDD2'
+        
+        # Formatear fechas y montos sólo de la página visible
+        def formatear_facturas(pagina):
+            return pagina.assign(
+                fecha_emision_str=formato.fechas(pagina['fecha_emision']),
+                vencimiento_str=formato.fechas(pagina['vencimiento']),
+                monto_str=formato.importes(pagina['monto']),
+                fecha_cobro_str=formato.fechas(pagina['fecha_cobro'])
+            )[['numero', 'cliente', 'fecha_emision_str', 'vencimiento_str', 'monto_str', 'estado', 'fecha_cobro_str']].rename(
+                columns={
+                    'numero': 'Número', 
+                    'cliente': 'Cliente', 
+                    'fecha_emision_str': 'Emisión', 
+                    'vencimiento_str': 'Vencimiento',
+                    'monto_str': 'Importe',
+                    'estado': 'Estado',
+                    'fecha_cobro_str': 'Cobro'
+                }
+            ).style.applymap(colorear_estado, subset=['Estado'])
+        
+        # Mostrar tabla de facturas (paginada por emisión e id)
+        st.caption(
+            f"{len(facturas_filtradas)} facturas · "
+            f"Importe total: {formato.importe(facturas_filtradas.suma('monto', por='estado').sum())}"
+        )
+        pagina_facturas = tabla_paginada(
+            facturas_filtradas,
+            formatear_facturas,
+            key="facturas_listado_pagina",
+            firma=(tuple(filtro_estado), str(fecha_inicio), str(fecha_fin), filtro_cliente)
+        )
+        
+        # Cobro de facturas de la página visible
+        pendientes_pagina = pagina_facturas[pagina_facturas['fecha_cobro'].isna()]
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            numeros_cobro = st.multiselect("Facturas cobradas", pendientes_pagina['numero'].tolist(), key="facturas_cobro_numeros")
+        with col2:
+            fecha_cobro = st.date_input("Fecha de cobro", datetime.now(), key="facturas_cobro_fecha")
+        
+        # Acciones de facturas
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            if st.button("Marcar como Pagada", use_container_width=True, disabled=not numeros_cobro):
+                ids_cobro = pendientes_pagina.loc[pendientes_pagina['numero'].isin(numeros_cobro), 'id']
+                cobradas = almacen.marcar_pagadas(ids_cobro, fecha_cobro)
+                st.success(f"{cobradas} facturas marcadas como pagadas el {formato.fecha(fecha_cobro)}.")
+                
+        with col2:
+            if st.button("Enviar Recordatorio", use_container_width=True):
+                st.success("Recordatorio enviado correctamente.")
+                
+        with col3:
+            boton_exportar(
+                "Exportar Facturas",
+                ruta_exportacion("facturas", clave_exportacion(tuple(filtro_estado), str(fecha_inicio), str(fecha_fin), filtro_cliente)),
+                lambda ruta, progreso: exportar_seleccion(facturas_filtradas, "facturas", ruta, formato, opciones_excel, progreso),
+                f"facturas_{fecha_inicio}_{fecha_fin}.xlsx",
+                MIME_EXCEL,
+                key="facturas_exportar_excel"
+            )
+    
+    elif pestana == "➕ Nueva Factura":
+        # Formulario para nueva factura
+        st.markdown("<h2 class='sub-header'>Crear Nueva Factura</h2>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            cliente = st.text_input("Cliente", key="factura_nuevo_cliente")
+            fecha_emision = st.date_input("Fecha de Emisión", datetime.now(), key="factura_fecha_emision")
+            dias_vencimiento = st.number_input("Días para Vencimiento", min_value=0, value=30, key="factura_dias_vencimiento")
+            fecha_vencimiento = fecha_emision + timedelta(days=dias_vencimiento)
+            st.info(f"Fecha de vencimiento: {formato.fecha(fecha_vencimiento)}")
+            
+        with col2:
+            nif_cliente = st.text_input("NIF/CIF Cliente", key="factura_nif_cliente")
+            direccion = st.text_area("Dirección de Facturación", height=100, key="factura_direccion")
+            forma_pago = st.selectbox("Forma de Pago", ["Transferencia Bancaria", "Domiciliación", "Efectivo", "Tarjeta", "PayPal"], key="factura_forma_pago")
+        
+        # Tabla para añadir conceptos
+        st.markdown("<h3>Conceptos</h3>", unsafe_allow_html=True)
+        
+        # Inicializar estado de la sesión para los conceptos si no existe
+        if 'conceptos' not in st.session_state:
+            st.session_state.conceptos = []
+            st.session_state.contador_conceptos = 0
+        
+        # Formulario para añadir concepto
+        with st.expander("Añadir Concepto", expanded=True):
+            col1, col2, col3, col4 = st.columns([3, 1, 1, 1])
+            
+            with col1:
+                concepto_desc = st.text_input("Descripción")
+            
+            with col2:
+                concepto_cant = st.number_input("Cantidad", min_value=1, value=1)
+            
+            with col3:
+                concepto_precio = st.number_input("Precio Unitario (€)", min_value=0.01, value=100.00)
+            
+            with col4:
+                concepto_iva = st.selectbox("IVA (%)", [0, 4, 10, 21], index=3)
+            
+            if st.button("Añadir Concepto"):
+                subtotal = concepto_cant * concepto_precio
+                iva = subtotal * (concepto_iva / 100)
+                total = subtotal + iva
+                
+                st.session_state.conceptos.append({
+                    'id': st.session_state.contador_conceptos,
+                    'descripcion': concepto_desc,
+                    'cantidad': concepto_cant,
+                    'precio': concepto_precio,
+                    'iva_porcentaje': concepto_iva,
+                    'subtotal': subtotal,
+                    'iva': iva,
+                    'total': total
+                })
+                
+                st.session_state.contador_conceptos += 1
+        
+        # Mostrar conceptos añadidos
+        if st.session_state.conceptos:
+            conceptos_df = pd.DataFrame(st.session_state.conceptos)
+            
+            # Formatear para mostrar
+            conceptos_df['precio_str'] = formato.importes(conceptos_df['precio'])
+            conceptos_df['subtotal_str'] = formato.importes(conceptos_df['subtotal'])
+            conceptos_df['iva_str'] = formato.importes(conceptos_df['iva'])
+            conceptos_df['total_str'] = formato.importes(conceptos_df['total'])
+            
+            st.dataframe(
+                conceptos_df[['descripcion', 'cantidad', 'precio_str', 'iva_porcentaje', 'subtotal_str', 'iva_str', 'total_str']].rename(
+                    columns={
+                        'descripcion': 'Descripción',
+                        'cantidad': 'Cantidad',
+                        'precio_str': 'Precio Unit.',
+                        'iva_porcentaje': 'IVA %',
+                        'subtotal_str': 'Subtotal',
+                        'iva_str': 'IVA',
+                        'total_str': 'Total'
+                    }
+                ),
+                use_container_width=True,
+                height=200
+            )
+            
+            # Mostrar totales
+            total_sin_iva = conceptos_df['subtotal'].sum()
+            total_iva = conceptos_df['iva'].sum()
+            total_factura = conceptos_df['total'].sum()
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.markdown(f"<div class='card' style='text-align: center;'>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-label'>Base Imponible</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{formato.importe(total_sin_iva)}</p>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+                
+            with col2:
+                st.markdown(f"<div class='card' style='text-align: center;'>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-label'>IVA</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{formato.importe(total_iva)}</p>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+                
+            with col3:
+                st.markdown(f"<div class='card' style='text-align: center;'>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-label'>Total Factura</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{formato.importe(total_factura)}</p>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            # Botones para acciones de factura
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                if st.button("Limpiar Conceptos", use_container_width=True):
+                    st.session_state.conceptos = []
+                    st.experimental_rerun()
+            
+            with col2:
+                if st.button("Guardar Factura", use_container_width=True):
+                    if not cliente.strip():
+                        st.error("Indica el cliente de la factura.")
+                    else:
+                        # La factura y sus conceptos entran juntos: el IVA repercutido se acumula en la misma transacción
+                        numero_factura = almacen.siguiente_numero_factura(fecha_emision.year)
+                        almacen.insertar_facturas(
+                            pd.DataFrame([{
+                                'numero': numero_factura, 'cliente': cliente.strip(), 'fecha_emision': fecha_emision,
+                                'vencimiento': fecha_vencimiento, 'monto': total_factura, 'estado': 'Pendiente'
+                            }]),
+                            conceptos_df[['descripcion', 'cantidad', 'precio', 'iva_porcentaje']].assign(numero=numero_factura)
+                        )
+                        st.session_state.conceptos = []
+                        st.success(f"Factura {numero_factura} para {cliente} por {formato.importe(total_factura)} creada correctamente.")
+        
+        # Si no hay conceptos, mostrar mensaje
+        else:
+            st.info("Añade conceptos a la factura usando el formulario de arriba.")
+    
+    elif pestana == "📊 Análisis de Cobros":
+        # Análisis de cobros y pagos
+        st.markdown("<h2 class='sub-header'>Análisis de Cobros</h2>", unsafe_allow_html=True)
+        
+        # Estadísticas agregadas por estado directamente en el almacén
+        resumen_estados = almacen.resumen_facturas_por_estado().reindex(["Pendiente", "Pagada", "Vencida"], fill_value=0)
+        
+        total_pendiente = resumen_estados.loc['Pendiente', 'total']
+        total_pagado = resumen_estados.loc['Pagada', 'total']
+        total_vencido = resumen_estados.loc['Vencida', 'total']
+        
+        # Mostrar métricas
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>Pendiente de Cobro</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='metric-value'>{formato.importe(total_pendiente)}</p>", unsafe_allow_html=True)
+            st.markdown(f"<p>({resumen_estados.loc['Pendiente', 'numero']} facturas)</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>Cobrado</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='metric-value'>{formato.importe(total_pagado)}</p>", unsafe_allow_html=True)
+            st.markdown(f"<p>({resumen_estados.loc['Pagada', 'numero']} facturas)</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col3:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>Vencido</p>", unsafe_allow_html=True)
+            st.markdown(f"<p class='metric-value'>{formato.importe(total_vencido)}</p>", unsafe_allow_html=True)
+            st.markdown(f"<p>({resumen_estados.loc['Vencida', 'numero']} facturas)</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Gráfico de estado de facturas
+        estados_count = resumen_estados['numero']
+        
+        fig = px.pie(
+            names=estados_count.index,
+            values=estados_count.values,
+            title='Distribución de Facturas por Estado',
+            color_discrete_map={
+                'Pendiente': '#FFC107',
+                'Pagada': '#4CAF50',
+                'Vencida': '#F44336'
+            },
+            hole=0.4
+        )
+        
+        fig.update_traces(textposition='inside', textinfo='percent+label')
+        fig.update_layout(height=400)
+        
+        grafico(fig)
+        
+        # Periodo medio de cobro (ponderado por importe) y antigüedad de lo pendiente
+        st.markdown("<h3>Periodo Medio de Cobro</h3>", unsafe_allow_html=True)
+        
+        cobros = periodo_medio_cobro(almacen)
+        mensual = cobros['mensual']
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric(
+            "Periodo medio de cobro (12 meses)",
+            "—" if np.isnan(cobros['dias']) else f"{cobros['dias']:.0f} días",
+            help="Días entre emisión y cobro de las facturas cobradas, ponderados por su importe"
+        )
+        col2.metric(
+            "DSO",
+            "—" if np.isnan(cobros['dso']) else f"{cobros['dso']:.0f} días",
+            help="Saldo pendiente de cobro frente a lo facturado en los últimos 3 meses"
+        )
+        col3.metric("Pendiente con más de 90 días", formato.importe(cobros['antiguedad']['pendiente'].iloc[-1]))
+        
+        fig = px.bar(
+            x=mensual['etiqueta'],
+            y=mensual['dias'],
+            title="Periodo Medio de Cobro por Mes (días)",
+            labels={'x': 'Mes de cobro', 'y': 'Días'},
+            color_discrete_sequence=['#1E88E5']
+        )
+        
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            xaxis=dict(showgrid=False),
+            yaxis=dict(showgrid=True, gridcolor='rgba(230,230,230,0.6)'),
+            height=400,
+            yaxis_range=[0, max(np.nanmax(mensual['dias'].to_numpy(), initial=0), OBJETIVO_DIAS) * 1.2]
+        )
+        
+        fig.add_hline(y=OBJETIVO_DIAS, line_dash="dash", line_color="red", annotation_text=f"Objetivo ({OBJETIVO_DIAS} días)")
+        
+        grafico(fig)
+        
+        st.markdown("<h3>Antigüedad de Saldos</h3>", unsafe_allow_html=True)
+        
+        tramos = [tramo for tramo, _ in TRAMOS_ANTIGUEDAD]
+        fig = px.bar(
+            cobros['antiguedad'],
+            x='tramo',
+            y='pendiente',
+            color='tramo',
+            title="Pendiente de cobro por días desde la emisión",
+            labels={'tramo': 'Antigüedad', 'pendiente': 'Pendiente'},
+            color_discrete_sequence=['#4CAF50', '#FFC107', '#FF9800', '#F44336'],
+            custom_data=['facturas']
+        )
+        fig.update_traces(hovertemplate="%{x}<br>%{y:,.2f}<br>%{customdata[0]} facturas<extra></extra>")
+        fig.update_layout(showlegend=False, height=350, plot_bgcolor='rgba(0,0,0,0)')
+        grafico(fig)
+        
+        # Por cliente: periodo medio de cobro, pendiente y su reparto por antigüedad
+        clientes_cobro = cobros['clientes']
+        st.dataframe(
+            clientes_cobro.assign(
+                dias=clientes_cobro['dias'].round(0),
+                antiguedad_pendiente=clientes_cobro['antiguedad_pendiente'].round(0),
+                cobrado=formato.importes(clientes_cobro['cobrado']),
+                pendiente=formato.importes(clientes_cobro['pendiente']),
+                **{tramo: formato.importes(clientes_cobro[tramo]) for tramo in tramos}
+            ).rename(
+                columns={
+                    'cliente': 'Cliente',
+                    'dias': 'Días de cobro',
+                    'cobrado': 'Cobrado (12 meses)',
+                    'pendiente': 'Pendiente',
+                    'antiguedad_pendiente': 'Antigüedad media'
+                }
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
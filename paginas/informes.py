@@ -0,0 +1,744 @@
+# Página Informes: resumen, cuenta de resultados, balance de situación e impuestos
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from componentes import boton_exportar, boton_trabajo, delta_html, grafico, pestanas
+from finanzas.agregados import rango_anterior, rango_periodo, resumen_rango, totales_rango
+from finanzas.almacen import IVA_GENERAL
+from finanzas.balance import LINEAS_SUBTOTAL, balance_situacion
+from finanzas.categorizacion import CATEGORIAS
+from finanzas.exportacion import MIME_EXCEL, exportar_tablas, ruta_exportacion
+from finanzas.impuestos import TIPOS_IVA, calendario_fiscal, detalle_iva, tipos_categorias
+from finanzas.pdf import MIME_PDF, generar_pdf
+from finanzas.resultados import LINEAS_PYG, cuenta_resultados, cuenta_valida, cuentas_categorias, linea_cuenta
+
+
+def mostrar(contexto):
+    almacen = contexto.almacen
+    preferencias = contexto.preferencias
+    formato = contexto.formato
+    opciones_excel = contexto.opciones_excel
+    tipos_impuestos = contexto.tipos_impuestos
+    clave_exportacion = contexto.clave_exportacion
+    informe_pdf = contexto.informe_pdf
+
+    st.markdown("<h1 class='main-header'>Informes Financieros</h1>", unsafe_allow_html=True)
+    
+    # Pestañas para diferentes tipos de informes
+    pestana = pestanas(["📊 Resumen", "💰 Cuenta de Resultados", "📈 Balance", "💼 Impuestos"], key="informes_pestana")
+    
+    if pestana == "📊 Resumen":
+        # Informe de resumen
+        st.markdown("<h2 class='sub-header'>Resumen Financiero</h2>", unsafe_allow_html=True)
+        
+        # Selector de periodo
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            periodo = st.selectbox("Periodo", ["Mensual", "Trimestral", "Anual", "Personalizado"], key="resumen_periodo")
+        
+        with col2:
+            if periodo == "Personalizado":
+                rango = st.date_input("Rango de fechas", [datetime.now() - timedelta(days=90), datetime.now()], key="resumen_fechas")
+        
+        # Mientras sólo se ha marcado la primera fecha del rango, date_input devuelve una sola fecha
+        if periodo == "Personalizado" and len(rango) != 2:
+            st.info("Elija la fecha final del rango para ver el resumen.")
+        else:
+            # Rango del periodo y del periodo anterior de igual duración
+            if periodo == "Personalizado":
+                inicio_resumen, fin_resumen = rango_periodo(periodo, *rango)
+            else:
+                inicio_resumen, fin_resumen = rango_periodo(periodo)
+        
+            actual = resumen_rango(almacen, inicio_resumen, fin_resumen)
+            anterior = resumen_rango(almacen, *rango_anterior(inicio_resumen, fin_resumen))
+        
+            def variacion(clave):
+                return (actual[clave] - anterior[clave]) / abs(anterior[clave]) * 100 if anterior[clave] else 0.0
+        
+            # KPIs
+            col1, col2, col3, col4 = st.columns(4)
+        
+            with col1:
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("<p class='metric-label'>Ingresos</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{formato.importe(actual['ingresos'])}</p>", unsafe_allow_html=True)
+                st.markdown(delta_html(variacion('ingresos'), "vs. periodo anterior"), unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("<p class='metric-label'>Gastos</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{formato.importe(actual['gastos'])}</p>", unsafe_allow_html=True)
+                st.markdown(delta_html(variacion('gastos'), "vs. periodo anterior", invertir=True), unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            with col3:
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("<p class='metric-label'>Beneficio</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{formato.importe(actual['beneficio'])}</p>", unsafe_allow_html=True)
+                st.markdown(delta_html(variacion('beneficio'), "vs. periodo anterior"), unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            with col4:
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown("<p class='metric-label'>Margen</p>", unsafe_allow_html=True)
+                st.markdown(f"<p class='metric-value'>{actual['margen']:.1f}%</p>", unsafe_allow_html=True)
+                st.markdown(delta_html(actual['margen'] - anterior['margen'], "vs. periodo anterior", unidad=" puntos"), unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+        
+            # Gráfica de evolución
+            st.markdown("<h3>Evolución Financiera</h3>", unsafe_allow_html=True)
+        
+            # Datos simulados
+            meses = ["Ene", "Feb", "Mar", "Abr", "May", "Jun", "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"]
+            ingresos = [15000, 16200, 15800, 17000, 16500, 18000, 19500, 18000, 20000, 21500, 19800, 22000]
+            gastos = [12000, 12500, 13000, 13200, 13500, 14000, 15000, 14500, 15500, 16000, 15800, 17000]
+            beneficios = [ingresos[i] - gastos[i] for i in range(len(ingresos))]
+        
+            # Crear dataframe para gráfico
+            df_evolucion = pd.DataFrame({
+                'Mes': meses * 3,
+                'Tipo': ['Ingresos'] * 12 + ['Gastos'] * 12 + ['Beneficio'] * 12,
+                'Valor': ingresos + gastos + beneficios
+            })
+        
+            fig = px.line(
+                df_evolucion, 
+                x='Mes', 
+                y='Valor', 
+                color='Tipo',
+                color_discrete_map={
+                    'Ingresos': '#4CAF50', 
+                    'Gastos': '#FF5252', 
+                    'Beneficio': '#2196F3'
+                },
+                markers=True,
+                title='Evolución Financiera Anual'
+            )
+        
+            fig.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                xaxis=dict(showgrid=False),
+                yaxis=dict(showgrid=True, gridcolor='rgba(230,230,230,0.6)'),
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                height=400
+            )
+        
+            grafico(fig)
+        
+            # Distribución de gastos e ingresos
+            col1, col2 = st.columns(2)
+        
+            with col1:
+                st.markdown("<h3>Distribución de Ingresos</h3>", unsafe_allow_html=True)
+            
+                # Totales por categoría del periodo (sumas prefijo)
+                totales_periodo = totales_rango(almacen, inicio_resumen, fin_resumen)
+                ingresos_periodo = totales_periodo[(totales_periodo['tipo'] == 'Ingreso') & (totales_periodo['total'] > 0)]
+                categorias_ingresos = ingresos_periodo['categoria'].tolist()
+                valores_ingresos = ingresos_periodo['total'].tolist()
+            
+                fig = px.pie(
+                    names=categorias_ingresos,
+                    values=valores_ingresos,
+                    title='Ingresos por Categoría',
+                    color_discrete_sequence=px.colors.qualitative.G10,
+                    hole=0.4
+                )
+            
+                fig.update_traces(textposition='inside', textinfo='percent+label')
+                fig.update_layout(height=400)
+            
+                grafico(fig)
+            
+            with col2:
+                st.markdown("<h3>Distribución de Gastos</h3>", unsafe_allow_html=True)
+            
+                gastos_periodo = totales_periodo[(totales_periodo['tipo'] == 'Gasto') & (totales_periodo['total'] > 0)]
+                categorias_gastos = gastos_periodo['categoria'].tolist()
+                valores_gastos = gastos_periodo['total'].tolist()
+            
+                fig = px.pie(
+                    names=categorias_gastos,
+                    values=valores_gastos,
+                    title='Gastos por Categoría',
+                    color_discrete_sequence=px.colors.qualitative.Pastel,
+                    hole=0.4
+                )
+            
+                fig.update_traces(textposition='inside', textinfo='percent+label')
+                fig.update_layout(height=400)
+            
+                grafico(fig)
+        
+            # Botones para exportar
+            col1, col2, col3 = st.columns([1, 1, 2])
+        
+            with col1:
+                # Indicadores con su variación y distribuciones por categoría del periodo
+                def generar_resumen(ruta, progreso):
+                    indicadores = pd.DataFrame({
+                        'Indicador': ['Ingresos', 'Gastos', 'Beneficio'],
+                        'Periodo actual': [actual['ingresos'], actual['gastos'], actual['beneficio']],
+                        'Periodo anterior': [anterior['ingresos'], anterior['gastos'], anterior['beneficio']],
+                    })
+                    hojas = [{
+                        'nombre': 'Resumen',
+                        'datos': indicadores,
+                        'tipos': {'Periodo actual': 'importe', 'Periodo anterior': 'importe'},
+                        'variacion': ('Periodo actual', 'Periodo anterior'),
+                    }]
+                    for nombre, filas in (('Ingresos', ingresos_periodo), ('Gastos', gastos_periodo)):
+                        hojas.append({
+                            'nombre': nombre,
+                            'datos': filas[['categoria', 'total']].rename(columns={'categoria': 'Categoría', 'total': 'Total'}),
+                            'tipos': {'Total': 'importe'},
+                            'grafico': 'pie',
+                        })
+                    exportar_tablas(hojas, ruta, formato, opciones_excel)
+            
+                boton_exportar(
+                    "Exportar a Excel",
+                    ruta_exportacion("resumen", clave_exportacion(str(inicio_resumen), str(fin_resumen))),
+                    generar_resumen,
+                    f"resumen_{inicio_resumen:%Y%m%d}_{fin_resumen:%Y%m%d}.xlsx",
+                    MIME_EXCEL,
+                    key="resumen_exportar_excel"
+                )
+                
+            with col2:
+                def informe_resumen():
+                    comparativa = pd.DataFrame({
+                        'Indicador': ['Ingresos', 'Gastos', 'Beneficio'],
+                        'Periodo actual': formato.importes([actual['ingresos'], actual['gastos'], actual['beneficio']]),
+                        'Periodo anterior': formato.importes([anterior['ingresos'], anterior['gastos'], anterior['beneficio']]),
+                        'Variación': formato.porcentajes([variacion('ingresos'), variacion('gastos'), variacion('beneficio')])
+                    })
+                    return (informe_pdf(
+                        "Resumen Financiero",
+                        f"{formato.fecha(inicio_resumen)} - {formato.fecha(fin_resumen)}",
+                        [
+                            {'tipo': 'indicadores', 'valores': [
+                                ("Ingresos", formato.importe(actual['ingresos'])),
+                                ("Gastos", formato.importe(actual['gastos'])),
+                                ("Beneficio", formato.importe(actual['beneficio'])),
+                                ("Margen", formato.porcentaje(actual['margen']))
+                            ]},
+                            {'tipo': 'tabla', 'titulo': "Comparativa con el periodo anterior", 'datos': comparativa,
+                             'derecha': ['Periodo actual', 'Periodo anterior', 'Variación']},
+                            {'tipo': 'grafico', 'clase': 'lineas', 'titulo': "Evolución Financiera Anual", 'etiquetas': meses,
+                             'series': {'Ingresos': ingresos, 'Gastos': gastos, 'Beneficio': beneficios},
+                             'colores': ['#4CAF50', '#FF5252', '#2196F3']},
+                            {'tipo': 'grafico', 'clase': 'tarta', 'titulo': "Ingresos por Categoría",
+                             'etiquetas': categorias_ingresos, 'series': {'Total': valores_ingresos}},
+                            {'tipo': 'grafico', 'clase': 'tarta', 'titulo': "Gastos por Categoría",
+                             'etiquetas': categorias_gastos, 'series': {'Total': valores_gastos}}
+                        ]
+                    ),)
+            
+                boton_trabajo(
+                    "Generar PDF",
+                    ruta_exportacion("resumen", clave_exportacion(str(inicio_resumen), str(fin_resumen)), "pdf"),
+                    generar_pdf,
+                    informe_resumen,
+                    f"resumen_{inicio_resumen:%Y%m%d}_{fin_resumen:%Y%m%d}.pdf",
+                    MIME_PDF,
+                    key="resumen_pdf"
+                )
+    
+    elif pestana == "💰 Cuenta de Resultados":
+        st.markdown("<h2 class='sub-header'>Cuenta de Resultados</h2>", unsafe_allow_html=True)
+        
+        # Selector de periodo
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            periodo_cr = st.selectbox("Periodo", ["Mensual", "Trimestral", "Anual", "Personalizado"], key="cr_periodo")
+        
+        with col2:
+            if periodo_cr == "Personalizado":
+                rango_cr = st.date_input("Rango de fechas", [datetime.now() - timedelta(days=90), datetime.now()], key="cr_fechas")
+        
+        if periodo_cr == "Personalizado" and len(rango_cr) != 2:
+            st.info("Elija la fecha final del rango para ver la cuenta de resultados.")
+        else:
+            if periodo_cr == "Personalizado":
+                inicio_cr, fin_cr = rango_periodo(periodo_cr, *rango_cr)
+            else:
+                inicio_cr, fin_cr = rango_periodo(periodo_cr)
+            st.caption(f"Periodo: {formato.fecha(inicio_cr)} - {formato.fecha(fin_cr)}")
+        
+            # Tabla de cuenta de resultados
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+        
+            # Cuenta de resultados del periodo y del anterior de igual duración,
+            # con la asignación de categorías a cuentas del PGC guardada
+            cuentas_pgc = preferencias.get("cuentas_pgc")
+            df_cr = cuenta_resultados(almacen, inicio_cr, fin_cr, cuentas_pgc)
+            df_cr_anterior = cuenta_resultados(almacen, *rango_anterior(inicio_cr, fin_cr), cuentas_pgc, completa=True)
+        
+            # Formatear para mostrar
+            df_cr = df_cr.assign(
+                valor_str=formato.importes(df_cr['valor']),
+                porcentaje_str=formato.porcentajes(df_cr['porcentaje'])
+            )
+        
+            # Subtotales A) a D) destacados
+            def estilo_fila(row):
+                if row['Concepto'].startswith(('A)', 'B)', 'C)', 'D)')):
+                    return ['background-color: #E3F2FD; font-weight: bold;'] * len(row)
+                return [''] * len(row)
+        
+            # Mostrar tabla
+            st.markdown("<h3>Cuenta de Resultados</h3>", unsafe_allow_html=True)
+        
+            styled_df = df_cr[['concepto', 'valor_str', 'porcentaje_str']].rename(
+                columns={
+                    'concepto': 'Concepto',
+                    'valor_str': 'Valor',
+                    'porcentaje_str': '% sobre ventas'
+                }
+            ).style.apply(estilo_fila, axis=1)
+
+            st.dataframe(styled_df, use_container_width=True, height=500, hide_index=True)
+        
+            # Gráfico de comparación con periodo anterior (gastos en positivo)
+            st.markdown("<h3>Comparativa con Periodo Anterior</h3>", unsafe_allow_html=True)
+        
+            lineas_comp = {"1": "Ventas", "6": "Gastos Personal", "7": "Otros Gastos", "D": "Resultado"}
+            conceptos_comp = list(lineas_comp.values())
+            signos_comp = np.array([1, -1, -1, 1])
+            valores_actual = (df_cr.set_index('codigo')['valor'].reindex(list(lineas_comp), fill_value=0.0).to_numpy() * signos_comp).tolist()
+            valores_anterior = (df_cr_anterior.set_index('codigo')['valor'].reindex(list(lineas_comp), fill_value=0.0).to_numpy() * signos_comp).tolist()
+        
+            # Crear dataframe para gráfico
+            df_comp = pd.DataFrame({
+                'Concepto': conceptos_comp * 2,
+                'Periodo': ['Actual'] * 4 + ['Anterior'] * 4,
+                'Valor': valores_actual + valores_anterior
+            })
+        
+            fig = px.bar(
+                df_comp,
+                x='Concepto',
+                y='Valor',
+                color='Periodo',
+                barmode='group',
+                color_discrete_map={
+                    'Actual': '#1E88E5',
+                    'Anterior': '#90CAF9'
+                },
+                title='Comparativa con Periodo Anterior'
+            )
+        
+            fig.update_layout(
+                plot_bgcolor='rgba(0,0,0,0)',
+                xaxis=dict(showgrid=False),
+                yaxis=dict(showgrid=True, gridcolor='rgba(230,230,230,0.6)'),
+                height=400
+            )
+        
+            grafico(fig)
+        
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+            def informe_cuenta_resultados():
+                return (informe_pdf(
+                    "Cuenta de Resultados",
+                    f"{formato.fecha(inicio_cr)} - {formato.fecha(fin_cr)}",
+                    [
+                        {'tipo': 'tabla', 'titulo': "Cuenta de Resultados",
+                         'datos': df_cr[['concepto', 'valor_str', 'porcentaje_str']].rename(
+                             columns={'concepto': 'Concepto', 'valor_str': 'Valor', 'porcentaje_str': '% sobre ventas'}),
+                         'derecha': ['Valor', '% sobre ventas'],
+                         'destacar': df_cr.index[df_cr['concepto'].str.startswith(('A)', 'B)', 'C)', 'D)'))].tolist()},
+                        {'tipo': 'grafico', 'clase': 'barras', 'titulo': "Comparativa con Periodo Anterior", 'etiquetas': conceptos_comp,
+                         'series': {'Actual': valores_actual, 'Anterior': valores_anterior}, 'colores': ['#1E88E5', '#90CAF9']}
+                    ]
+                ),)
+        
+            col1, col2, col3 = st.columns([1, 1, 2])
+            with col1:
+                boton_trabajo(
+                    "Generar PDF",
+                    ruta_exportacion("cuenta_resultados", clave_exportacion(str(inicio_cr), str(fin_cr)), "pdf"),
+                    generar_pdf,
+                    informe_cuenta_resultados,
+                    f"cuenta_resultados_{inicio_cr:%Y%m%d}_{fin_cr:%Y%m%d}.pdf",
+                    MIME_PDF,
+                    key="cuenta_resultados_pdf"
+                )
+        
+        # Asignación de cada categoría del libro a una cuenta del PGC (y con ella a una línea)
+        with st.expander("Asignación de categorías a cuentas del PGC"):
+            conceptos_linea = {codigo: concepto for codigo, concepto, *_ in LINEAS_PYG}
+            asignacion = pd.DataFrame(list(cuentas_categorias(preferencias).items()), columns=['categoria', 'cuenta'])
+            asignacion_editada = st.data_editor(
+                asignacion.assign(linea=linea_cuenta(asignacion['cuenta']).map(conceptos_linea)),
+                column_config={
+                    'categoria': st.column_config.TextColumn("Categoría"),
+                    'cuenta': st.column_config.TextColumn("Cuenta PGC", help="Cuenta de 3 o 4 dígitos de los grupos 6 y 7", required=True),
+                    'linea': st.column_config.TextColumn("Línea de la cuenta de resultados"),
+                },
+                disabled=['categoria', 'linea'],
+                hide_index=True, use_container_width=True, key="cr_cuentas"
+            )
+            if st.button("Guardar asignación", key="cr_cuentas_guardar"):
+                cuentas_editadas = asignacion_editada['cuenta'].astype(str).str.strip()
+                invalidas = asignacion_editada.loc[~cuentas_editadas.map(cuenta_valida), 'categoria'].tolist()
+                if invalidas:
+                    st.error(f"Cuentas no válidas para: {', '.join(invalidas)}")
+                else:
+                    almacen.guardar_preferencias({"cuentas_pgc": dict(zip(asignacion_editada['categoria'], cuentas_editadas))})
+                    st.rerun()
+        
+    elif pestana == "📈 Balance":
+        st.markdown("<h2 class='sub-header'>Balance de Situación</h2>", unsafe_allow_html=True)
+        
+        # Fecha de balance
+        fecha_balance = st.date_input("Fecha del Balance", datetime.now())
+        balance = balance_situacion(almacen, fecha_balance)
+        
+        # Dividir en activo y pasivo
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("<h3>Activo</h3>", unsafe_allow_html=True)
+            
+            # Saldos a la fecha desde los puntos de control mensuales
+            df_activo = balance['activo'].copy()
+            
+            # Formatear para mostrar
+            df_activo['valor_str'] = formato.importes(df_activo['valor'])
+            
+            # Estilos personalizados para filas específicas
+            def estilo_fila_balance(row):
+                if row['Concepto'].startswith(LINEAS_SUBTOTAL):
+                    return ['background-color: #E3F2FD; font-weight: bold;'] * len(row)
+                return [''] * len(row)
+            
+            # Mostrar tabla
+            st.dataframe(
+                df_activo[['concepto', 'valor_str']].rename(
+                    columns={
+                        'concepto': 'Concepto',
+                        'valor_str': 'Valor'
+                    }
+                ).style.apply(estilo_fila_balance, axis=1),
+                use_container_width=True,
+                height=300
+            )
+        
+        with col2:
+            st.markdown("<h3>Patrimonio Neto y Pasivo</h3>", unsafe_allow_html=True)
+            
+            # Patrimonio neto por diferencia entre activo y pasivo
+            df_pasivo = balance['pasivo'].copy()
+            
+            # Formatear para mostrar
+            df_pasivo['valor_str'] = formato.importes(df_pasivo['valor'])
+            
+            # Mostrar tabla
+            st.dataframe(
+                df_pasivo[['concepto', 'valor_str']].rename(
+                    columns={
+                        'concepto': 'Concepto',
+                        'valor_str': 'Valor'
+                    }
+                ).style.apply(estilo_fila_balance, axis=1),
+                use_container_width=True,
+                height=350
+            )
+        
+        # Saldo de cada cuenta de tesorería a la fecha
+        with st.expander("Saldos por cuenta"):
+            cuentas_balance = balance['cuentas'].assign(saldo=lambda df: formato.importes(df['saldo']))
+            st.dataframe(
+                cuentas_balance.rename(columns={'cuenta': 'Cuenta', 'saldo': 'Saldo'}),
+                hide_index=True, use_container_width=True
+            )
+        
+        # Gráficos de composición del balance
+        st.markdown("<h3>Composición del Balance</h3>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Composición del activo
+            labels_activo = list(balance['composicion_activo'])
+            valores_activo = list(balance['composicion_activo'].values())
+            
+            fig = px.pie(
+                names=labels_activo,
+                values=valores_activo,
+                title='Composición del Activo',
+                color_discrete_sequence=['#1E88E5', '#42A5F5'],
+                hole=0.4
+            )
+            
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            fig.update_layout(height=350)
+            
+            grafico(fig)
+            
+        with col2:
+            # Composición del pasivo
+            labels_pasivo = list(balance['composicion_pasivo'])
+            valores_pasivo = list(balance['composicion_pasivo'].values())
+            
+            fig = px.pie(
+                names=labels_pasivo,
+                values=valores_pasivo,
+                title='Composición del Patrimonio Neto y Pasivo',
+                color_discrete_sequence=['#4CAF50', '#FFC107', '#FF5252'],
+                hole=0.4
+            )
+            
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            fig.update_layout(height=350)
+            
+            grafico(fig)
+        
+        # Ratios financieros
+        st.markdown("<h3>Ratios Financieros</h3>", unsafe_allow_html=True)
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>Ratio de Liquidez</p>", unsafe_allow_html=True)
+            liquidez = balance['liquidez']
+            st.markdown(f"<p class='metric-value'>{'—' if np.isnan(liquidez) else f'{liquidez:.2f}'}</p>", unsafe_allow_html=True)
+            st.markdown("<p>Óptimo > 1.5</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>Ratio de Endeudamiento</p>", unsafe_allow_html=True)
+            endeudamiento = balance['endeudamiento']
+            st.markdown(f"<p class='metric-value'>{'—' if np.isnan(endeudamiento) else f'{endeudamiento:.1f}%'}</p>", unsafe_allow_html=True)
+            st.markdown("<p>Óptimo entre 40% y 60%</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col3:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>ROE</p>", unsafe_allow_html=True)
+            roe = balance['roe']
+            st.markdown(f"<p class='metric-value'>{'—' if np.isnan(roe) else f'{roe:.1f}%'}</p>", unsafe_allow_html=True)
+            st.markdown("<p>Rentabilidad Financiera</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col4:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<p class='metric-label'>ROA</p>", unsafe_allow_html=True)
+            roa = balance['roa']
+            st.markdown(f"<p class='metric-value'>{'—' if np.isnan(roa) else f'{roa:.1f}%'}</p>", unsafe_allow_html=True)
+            st.markdown("<p>Rentabilidad Económica</p>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        def informe_balance():
+            def tabla_balance(titulo, df):
+                return {
+                    'tipo': 'tabla', 'titulo': titulo,
+                    'datos': df[['concepto', 'valor_str']].rename(columns={'concepto': 'Concepto', 'valor_str': 'Valor'}),
+                    'derecha': ['Valor'],
+                    'destacar': df.index[df['concepto'].str.startswith(LINEAS_SUBTOTAL)].tolist()
+                }
+            return (informe_pdf(
+                "Balance de Situación",
+                f"A {formato.fecha(fecha_balance)}",
+                [
+                    {'tipo': 'indicadores', 'valores': [
+                        ("Ratio de Liquidez", "—" if np.isnan(liquidez) else f"{liquidez:.2f}"),
+                        ("Endeudamiento", "—" if np.isnan(endeudamiento) else formato.porcentaje(endeudamiento)),
+                        ("ROE", "—" if np.isnan(roe) else formato.porcentaje(roe)),
+                        ("ROA", "—" if np.isnan(roa) else formato.porcentaje(roa))
+                    ]},
+                    tabla_balance("Activo", df_activo),
+                    tabla_balance("Patrimonio Neto y Pasivo", df_pasivo),
+                    {'tipo': 'grafico', 'clase': 'tarta', 'titulo': "Composición del Activo",
+                     'etiquetas': labels_activo, 'series': {'Valor': valores_activo}, 'colores': ['#1E88E5', '#42A5F5']},
+                    {'tipo': 'grafico', 'clase': 'tarta', 'titulo': "Composición del Patrimonio Neto y Pasivo",
+                     'etiquetas': labels_pasivo, 'series': {'Valor': valores_pasivo}, 'colores': ['#4CAF50', '#FFC107', '#FF5252']}
+                ]
+            ),)
+        
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            boton_trabajo(
+                "Generar PDF",
+                ruta_exportacion("balance", clave_exportacion(str(fecha_balance)), "pdf"),
+                generar_pdf,
+                informe_balance,
+                f"balance_{fecha_balance:%Y%m%d}.pdf",
+                MIME_PDF,
+                key="balance_pdf"
+            )
+    
+    elif pestana == "💼 Impuestos":
+        st.markdown("<h2 class='sub-header'>Gestión de Impuestos</h2>", unsafe_allow_html=True)
+        
+        # Calendario fiscal
+        st.markdown("<h3>Calendario Fiscal</h3>", unsafe_allow_html=True)
+        
+        # Obtener el año actual
+        año_actual = datetime.now().year
+        
+        # Liquidaciones desde los acumulados de IVA repercutido y de gasto por categoría
+        df_calendario = calendario_fiscal(almacen, año_actual, None, *tipos_impuestos)
+        df_calendario['fecha_limite'] = formato.fechas(df_calendario['fecha_limite'])
+        
+        # Formatear para mostrar
+        df_calendario['importe_str'] = formato.importes(df_calendario['importe'])
+        
+        # Colorear según estado
+        def colorear_estado_impuesto(val):
+            if val == 'Presentado':
+                return 'background-color: #C8E6C9'
+            elif val == 'Pendiente':
+                return 'background-color: #FFF9C4'
+            else:  # En curso
+                return 'background-color: #E3F2FD'
+        
+        # Mostrar tabla
+        st.dataframe(
+            df_calendario[['impuesto', 'periodo', 'fecha_limite', 'estado', 'importe_str']].rename(
+                columns={
+                    'impuesto': 'Impuesto',
+                    'periodo': 'Periodo',
+                    'fecha_limite': 'Fecha Límite',
+                    'estado': 'Estado',
+                    'importe_str': 'Importe'
+                }
+            ).style.applymap(colorear_estado_impuesto, subset=['Estado']),
+            use_container_width=True,
+            height=300
+        )
+        
+        # Resumen de impuestos
+        st.markdown("<h3>Resumen de Impuestos Anuales</h3>", unsafe_allow_html=True)
+        
+        # Totales por tipo de impuesto
+        totales_impuestos = df_calendario.groupby('impuesto')['importe'].sum().reset_index()
+        totales_impuestos['importe_str'] = formato.importes(totales_impuestos['importe'])
+        
+        # Gráfico de barras
+        fig = px.bar(
+            totales_impuestos,
+            x='impuesto',
+            y='importe',
+            title='Total de Impuestos por Tipo',
+            color='impuesto',
+            color_discrete_sequence=px.colors.qualitative.Safe,
+            labels={'impuesto': 'Impuesto', 'importe': 'Importe Total'}
+        )
+        
+        fig.update_layout(
+            plot_bgcolor='rgba(0,0,0,0)',
+            xaxis=dict(showgrid=False),
+            yaxis=dict(showgrid=True, gridcolor='rgba(230,230,230,0.6)'),
+            height=400,
+            showlegend=False
+        )
+        
+        grafico(fig)
+        
+        # Desglose del modelo 303 por tipo de IVA
+        st.markdown("<h3>Liquidación de IVA (Modelo 303)</h3>", unsafe_allow_html=True)
+        
+        trimestre_iva = st.selectbox(
+            "Trimestre", [1, 2, 3, 4], index=(datetime.now().month - 1) // 3,
+            format_func=lambda t: f"{t}T {año_actual}", key="impuestos_trimestre"
+        )
+        df_iva = detalle_iva(almacen, año_actual, trimestre_iva, *tipos_impuestos)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("IVA repercutido", formato.importe(df_iva['repercutido'].sum()))
+        with col2:
+            st.metric("IVA soportado deducible", formato.importe(df_iva['soportado'].sum()))
+        with col3:
+            resultado_iva = df_iva['repercutido'].sum() - df_iva['soportado'].sum()
+            st.metric("A ingresar" if resultado_iva >= 0 else "A compensar", formato.importe(abs(resultado_iva)))
+        
+        st.dataframe(
+            pd.DataFrame({
+                'Tipo': df_iva['iva_porcentaje'].map(lambda p: f"{p:g} %"),
+                'Base repercutido': formato.importes(df_iva['base_repercutido']),
+                'Cuota repercutida': formato.importes(df_iva['repercutido']),
+                'Base soportado': formato.importes(df_iva['base_soportado']),
+                'Cuota soportada': formato.importes(df_iva['soportado'])
+            }),
+            hide_index=True, use_container_width=True
+        )
+        
+        # Tipos de IVA deducible y de retención por categoría de gasto
+        with st.expander("Tipos por categoría de gasto"):
+            iva_categorias, retencion_categorias = tipos_categorias(preferencias)
+            tipos_editados = st.data_editor(
+                pd.DataFrame({
+                    'categoria': CATEGORIAS['Gasto'],
+                    'iva': [iva_categorias.get(c, IVA_GENERAL) for c in CATEGORIAS['Gasto']],
+                    'retencion': [retencion_categorias.get(c, 0) for c in CATEGORIAS['Gasto']]
+                }),
+                column_config={
+                    'categoria': st.column_config.TextColumn("Categoría"),
+                    'iva': st.column_config.SelectboxColumn("IVA deducible (%)", options=list(TIPOS_IVA), required=True),
+                    'retencion': st.column_config.NumberColumn("Retención IRPF (%)", min_value=0, max_value=50, step=1, required=True)
+                },
+                disabled=['categoria'],
+                hide_index=True, use_container_width=True, key="impuestos_tipos"
+            )
+            if st.button("Guardar tipos", key="impuestos_tipos_guardar"):
+                almacen.guardar_preferencias({
+                    "iva_gastos": dict(zip(tipos_editados['categoria'], tipos_editados['iva'].astype(int).tolist())),
+                    "retenciones_irpf": dict(zip(tipos_editados['categoria'], tipos_editados['retencion'].astype(int).tolist()))
+                })
+                st.rerun()
+        
+        # Simulador de impuestos
+        st.markdown("<h3>Simulador de Impuestos</h3>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Simulador de IVA
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>Simulador de IVA</h4>", unsafe_allow_html=True)
+            
+            base_imponible = st.number_input("Base Imponible (€)", min_value=0.0, value=10000.0, step=1000.0)
+            tipo_iva = st.selectbox("Tipo de IVA", [4, 10, 21], index=2)
+            
+            cuota_iva = base_imponible * (tipo_iva / 100)
+            total = base_imponible + cuota_iva
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"<p><b>Cuota IVA:</b> {formato.importe(cuota_iva)}</p>", unsafe_allow_html=True)
+            with col2:
+                st.markdown(f"<p><b>Total:</b> {formato.importe(total)}</p>", unsafe_allow_html=True)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+        with col2:
+            # Simulador de IRPF
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown("<h4>Simulador de Retenciones IRPF</h4>", unsafe_allow_html=True)
+            
+            base_retencion = st.number_input("Base de Retención (€)", min_value=0.0, value=5000.0, step=500.0)
+            tipo_retencion = st.slider("Tipo de Retención (%)", min_value=0, max_value=50, value=15)
+            
+            retencion = base_retencion * (tipo_retencion / 100)
+            liquido = base_retencion - retencion
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"<p><b>Retención IRPF:</b> {formato.importe(retencion)}</p>", unsafe_allow_html=True)
+            with col2:
+                st.markdown(f"<p><b>Líquido a percibir:</b> {formato.importe(liquido)}</p>", unsafe_allow_html=True)
+            
+            st.markdown("</div>", unsafe_allow_html=True)
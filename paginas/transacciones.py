@@ -0,0 +1,334 @@
+# Página Transacciones: registro, búsqueda con exportación e importación de extractos
+from datetime import datetime, timedelta
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from componentes import boton_exportar, boton_trabajo, grafico, pestanas, tabla_paginada
+from finanzas.busqueda import filtrar_transacciones
+from finanzas.categorizacion import CATEGORIAS, categorizador
+from finanzas.exportacion import MIME_EXCEL, exportar_seleccion, ruta_exportacion
+from finanzas.importacion import EXTENSIONES_IMPORTACION, FORMATOS_IMPORTACION, importar
+from finanzas.pdf import MIME_PDF, generar_pdf
+
+# Filas de la tabla de movimientos en el informe PDF
+FILAS_PDF = 500
+
+
+def mostrar(contexto):
+    almacen = contexto.almacen
+    formato = contexto.formato
+    opciones_excel = contexto.opciones_excel
+    categorizacion_automatica = contexto.categorizacion_automatica
+    clave_exportacion = contexto.clave_exportacion
+    informe_pdf = contexto.informe_pdf
+
+    st.markdown("<h1 class='main-header'>Gestión de Transacciones</h1>", unsafe_allow_html=True)
+    
+    # Pestañas para diferentes secciones
+    pestana = pestanas(["📝 Registro de Transacciones", "🔍 Buscar y Filtrar", "📥 Importar"], key="transacciones_pestana")
+    
+    if pestana == "📝 Registro de Transacciones":
+        # Formulario para nueva transacción
+        st.markdown("<h2 class='sub-header'>Nueva Transacción</h2>", unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            tipo_trans = st.selectbox("Tipo de Transacción", ["Ingreso", "Gasto"])
+            fecha_trans = st.date_input("Fecha", datetime.now())
+            monto_trans = st.number_input("Monto (€)", min_value=0.01, step=10.0, value=100.0)
+            
+        with col2:
+            # Con la categorización automática, la categoría propuesta es la que
+            # sugiere la descripción escrita (se lee del estado antes de dibujarla).
+            # Sólo se propone cuando cambia la descripción y mientras el usuario
+            # no haya elegido la categoría a mano.
+            categorias_tipo = CATEGORIAS[tipo_trans]
+            clave_categoria = f"nueva_categoria_{tipo_trans}"
+            clave_manual = f"{clave_categoria}_manual"
+            clave_sugerencia = f"{clave_categoria}_sugerencia"
+            descripcion_escrita = st.session_state.get("nueva_descripcion", "").strip()
+            if (categorizacion_automatica and descripcion_escrita and not st.session_state.get(clave_manual)
+                    and descripcion_escrita != st.session_state.get(clave_sugerencia, (None, None))[0]):
+                sugerida = categorizador(almacen).sugerir(descripcion_escrita, tipo_trans)
+                st.session_state[clave_sugerencia] = (descripcion_escrita, sugerida)
+                if sugerida:
+                    st.session_state[clave_categoria] = sugerida
+            sugerida = st.session_state.get(clave_sugerencia, (None, None))[1]
+            categoria_trans = st.selectbox(
+                "Categoría", categorias_tipo, key=clave_categoria,
+                on_change=lambda: st.session_state.update({clave_manual: True}),
+                help="Sugerida a partir de la descripción"
+                if sugerida and not st.session_state.get(clave_manual) and st.session_state.get(clave_categoria) == sugerida else None
+            )
+            
+            descripcion_trans = st.text_area("Descripción", height=100, key="nueva_descripcion")
+            cuenta_trans = st.selectbox("Cuenta", ["Cuenta Principal", "Cuenta Secundaria", "Efectivo", "Tarjeta de Crédito"])
+        
+        st.markdown("<div style='display: flex; justify-content: center; margin-top: 20px;'>", unsafe_allow_html=True)
+        if st.button("Registrar Transacción", use_container_width=True):
+            almacen.registrar_transaccion(
+                fecha_trans,
+                descripcion_trans.strip() or f"{tipo_trans} - {categoria_trans}",
+                tipo_trans,
+                categoria_trans,
+                cuenta_trans,
+                monto_trans
+            )
+            # La siguiente transacción vuelve a recibir sugerencias
+            st.session_state.pop(clave_manual, None)
+            st.session_state.pop(clave_sugerencia, None)
+            st.success(f"Transacción de {tipo_trans} por {formato.importe(monto_trans)} registrada correctamente.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        
+        # Últimas transacciones
+        st.markdown("<h2 class='sub-header'>Últimas Transacciones</h2>", unsafe_allow_html=True)
+        
+        transacciones = almacen.ultimas_transacciones(20)
+        
+        # Formatear fechas y montos para visualización
+        # (los resultados vienen de la caché compartida: se formatea sobre una copia)
+        transacciones = transacciones.assign(
+            fecha_str=formato.fechas(transacciones['fecha']),
+            monto_str=formato.importes(transacciones['monto'])
+        )
+        
+        # Aplicar estilo según el tipo (ingreso/gasto)
+        def color_monto(val):
+            tipo = val.split(' - ')[0]
+            if tipo == 'Ingreso':
+                return 'color: green'
+            else:
+                return 'color: red'
+        
+        # Mostrar tabla de transacciones
+        st.dataframe(
+            transacciones[['fecha_str', 'descripcion', 'monto_str']].rename(
+                columns={'fecha_str': 'Fecha', 'descripcion': 'Descripción', 'monto_str': 'Monto'}
+            ).style.applymap(color_monto, subset=['Descripción']),
+            use_container_width=True,
+            height=400
+        )
+    
+    elif pestana == "🔍 Buscar y Filtrar":
+        st.markdown("<h2 class='sub-header'>Buscar y Filtrar Transacciones</h2>", unsafe_allow_html=True)
+        
+        # Filtros
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            filtro_tipo = st.multiselect("Tipo", ["Ingreso", "Gasto"], default=["Ingreso", "Gasto"])
+        
+        with col2:
+            categorias = ["Ventas", "Prestación de servicios", "Subvenciones", "Intereses", "Otros ingresos", 
+                         "Suministros", "Alquiler", "Salarios", "Marketing", "Software", "Equipamiento", "Seguros", "Impuestos", "Otros"]
+            filtro_categoria = st.multiselect("Categoría", categorias)
+        
+        with col3:
+            rango_defecto = (datetime.now().date() - timedelta(days=30), datetime.now().date())
+            rango = st.date_input("Rango de fechas", list(rango_defecto))
+            # Con sólo la primera fecha marcada se busca en los últimos 30 días
+            fecha_inicio, fecha_fin = rango if len(rango) == 2 else rango_defecto
+        
+        # Filtro por texto
+        filtro_texto = st.text_input("Buscar por descripción")
+        
+        # Rango de fechas por búsqueda binaria sobre la vista ordenada; texto por el índice de trigramas
+        transacciones_filtradas = filtrar_transacciones(
+            almacen,
+            tipos=filtro_tipo,
+            categorias=filtro_categoria,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            texto=filtro_texto
+        )
+        
+        # Mostrar resultados
+        totales_tipo = transacciones_filtradas.suma('monto', por='tipo')
+        st.markdown(f"<h3>Resultados: {len(transacciones_filtradas)} transacciones encontradas</h3>", unsafe_allow_html=True)
+        st.caption(
+            f"Ingresos: {formato.importe(totales_tipo.get('Ingreso', 0.0))} · "
+            f"Gastos: {formato.importe(totales_tipo.get('Gasto', 0.0))}"
+        )
+        
+        # Formatear sólo la página visible
+        def formatear_transacciones(pagina):
+            return pagina.assign(
+                fecha_str=formato.fechas(pagina['fecha']),
+                monto_str=formato.importes(pagina['monto'])
+            )[['fecha_str', 'descripcion', 'categoria', 'monto_str']].rename(
+                columns={'fecha_str': 'Fecha', 'descripcion': 'Descripción', 'categoria': 'Categoría', 'monto_str': 'Monto'}
+            )
+        
+        # Mostrar tabla de transacciones (paginada por fecha e id)
+        tabla_paginada(
+            transacciones_filtradas,
+            formatear_transacciones,
+            key="transacciones_busqueda_pagina",
+            firma=(tuple(filtro_tipo), tuple(filtro_categoria), str(fecha_inicio), str(fecha_fin), filtro_texto)
+        )
+        
+        # Exportar resultados
+        col1, col2 = st.columns(2)
+        with col1:
+            # Exportación por bloques desde la misma selección que se está viendo
+            boton_exportar(
+                "Exportar a Excel",
+                ruta_exportacion("transacciones", clave_exportacion(tuple(filtro_tipo), tuple(filtro_categoria), str(fecha_inicio), str(fecha_fin), filtro_texto)),
+                lambda ruta, progreso: exportar_seleccion(transacciones_filtradas, "transacciones", ruta, formato, opciones_excel, progreso),
+                f"transacciones_{fecha_inicio}_{fecha_fin}.xlsx",
+                MIME_EXCEL,
+                key="transacciones_exportar_excel"
+            )
+                
+        with col2:
+            def informe_transacciones():
+                pagina, _ = transacciones_filtradas.pagina(FILAS_PDF)
+                por_categoria = transacciones_filtradas.suma('monto', por='categoria')
+                por_categoria = por_categoria[por_categoria > 0].sort_values(ascending=False)
+                ingresos_filtro = totales_tipo.get('Ingreso', 0.0)
+                gastos_filtro = totales_tipo.get('Gasto', 0.0)
+                titulo_tabla = "Movimientos" if len(transacciones_filtradas) <= FILAS_PDF else f"Movimientos (los {FILAS_PDF} más recientes)"
+                return (informe_pdf(
+                    "Transacciones",
+                    f"{formato.fecha(fecha_inicio)} - {formato.fecha(fecha_fin)} · {len(transacciones_filtradas)} transacciones",
+                    [
+                        {'tipo': 'indicadores', 'valores': [
+                            ("Transacciones", str(len(transacciones_filtradas))),
+                            ("Ingresos", formato.importe(ingresos_filtro)),
+                            ("Gastos", formato.importe(gastos_filtro)),
+                            ("Saldo", formato.importe(ingresos_filtro - gastos_filtro))
+                        ]},
+                        {'tipo': 'grafico', 'clase': 'tarta', 'titulo': "Importe por categoría",
+                         'etiquetas': por_categoria.index.tolist(), 'series': {'Importe': por_categoria.tolist()}},
+                        {'tipo': 'tabla', 'titulo': titulo_tabla, 'derecha': ['Importe'], 'datos': pd.DataFrame({
+                            'Fecha': formato.fechas(pagina['fecha']),
+                            'Descripción': pagina['descripcion'],
+                            'Tipo': pagina['tipo'],
+                            'Categoría': pagina['categoria'],
+                            'Importe': formato.importes(pagina['monto'])
+                        })}
+                    ]
+                ),)
+            
+            # Se dibuja en la cola de procesos; la sesión sólo sigue el progreso
+            boton_trabajo(
+                "Generar Informe PDF",
+                ruta_exportacion("transacciones", clave_exportacion(tuple(filtro_tipo), tuple(filtro_categoria), str(fecha_inicio), str(fecha_fin), filtro_texto), "pdf"),
+                generar_pdf,
+                informe_transacciones,
+                f"transacciones_{fecha_inicio}_{fecha_fin}.pdf",
+                MIME_PDF,
+                key="transacciones_pdf"
+            )
+        
+        # Visualización de transacciones filtradas
+        if not transacciones_filtradas.empty:
+            st.markdown("<h3>Análisis de Transacciones Filtradas</h3>", unsafe_allow_html=True)
+            
+            # Gráfico según categorías
+            categorias_counts = transacciones_filtradas.recuento('categoria')
+            
+            fig = px.pie(
+                names=categorias_counts.index,
+                values=categorias_counts.values,
+                title='Distribución por Categorías',
+                color_discrete_sequence=px.colors.qualitative.Pastel
+            )
+            
+            fig.update_traces(textposition='inside', textinfo='percent+label')
+            fig.update_layout(height=400)
+            
+            grafico(fig)
+
+    elif pestana == "📥 Importar":
+        st.markdown("<h2 class='sub-header'>Importar Extractos y Libros</h2>", unsafe_allow_html=True)
+        st.markdown("""
+        Importe extractos bancarios en **Norma 43** (AEB) u **OFX**, o ficheros **CSV** con al menos
+        fecha e importe (o cargo y abono). Los CSV exportados de otros programas pueden traer además
+        tipo, categoría y cuenta. Los movimientos que ya están en el libro se omiten, así que puede
+        volver a importar un extracto que se solape con otro anterior.
+        """)
+
+        fichero_importacion = st.file_uploader("Fichero", type=EXTENSIONES_IMPORTACION, key="importar_fichero")
+        col1, col2 = st.columns(2)
+        with col1:
+            opciones_formato = {"Detectar automáticamente": None, **{v: k for k, v in FORMATOS_IMPORTACION.items()}}
+            formato_importacion = st.selectbox("Formato", list(opciones_formato), key="importar_formato")
+        with col2:
+            cuenta_importacion = st.selectbox(
+                "Cuenta de destino", ["Cuenta Principal", "Cuenta Secundaria", "Efectivo", "Tarjeta de Crédito"],
+                key="importar_cuenta", help="Para los movimientos que no indican su cuenta (extractos bancarios)"
+            )
+
+        if fichero_importacion is not None and st.button("Importar", key="importar_boton", use_container_width=True):
+            barra = st.progress(0.0, text="Importando...")
+            try:
+                resultado = importar(
+                    almacen,
+                    fichero_importacion,
+                    nombre=fichero_importacion.name,
+                    formato=opciones_formato[formato_importacion],
+                    cuenta=cuenta_importacion,
+                    progreso=lambda fraccion, mensaje: barra.progress(fraccion, text=f"Importando... {mensaje}"),
+                    categorizador=categorizador(almacen) if categorizacion_automatica else None,
+                )
+            except ValueError as error:
+                barra.empty()
+                st.error(f"No se pudo importar {fichero_importacion.name}: {error}")
+            else:
+                barra.empty()
+                if resultado["repetida"]:
+                    st.info(f"Este fichero ya se importó en {resultado['cuenta']} el {formato.fecha(pd.Timestamp(resultado['fecha']))}: no hay movimientos nuevos.")
+                else:
+                    st.success(f"Importación completada en {resultado['segundos']:.1f} s ({FORMATOS_IMPORTACION[resultado['formato']]}).")
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Filas leídas", formato.numero(resultado["leidas"], 0))
+                col2.metric("Nuevas", formato.numero(0 if resultado["repetida"] else resultado["insertadas"], 0))
+                col3.metric("Duplicadas", formato.numero(resultado["leidas"] if resultado["repetida"] else resultado["duplicadas"], 0))
+                col4.metric("Rechazadas", formato.numero(0 if resultado["repetida"] else resultado["rechazadas"], 0))
+                if resultado.get("categorizadas"):
+                    st.caption(f"{formato.numero(resultado['categorizadas'], 0)} movimientos nuevos se categorizaron automáticamente por su descripción.")
+                if not resultado["rechazos"].empty:
+                    st.warning("Algunas filas no se importaron:")
+                    st.dataframe(
+                        resultado["rechazos"].rename(columns={"linea": "Línea", "motivo": "Motivo"}),
+                        use_container_width=True, hide_index=True, height=250
+                    )
+
+        # Revisión de las categorías asignadas al importar: lo que se guarda aquí
+        # queda como categoría elegida por el usuario y el categorizador aprende de ello
+        st.markdown("<h2 class='sub-header'>Revisar Categorías Automáticas</h2>", unsafe_allow_html=True)
+        pendientes_revision = almacen.categorizadas_automaticamente(100)
+        if pendientes_revision.empty:
+            st.info("No hay movimientos importados pendientes de revisar.")
+        else:
+            revisadas = st.data_editor(
+                pendientes_revision.assign(
+                    fecha=formato.fechas(pendientes_revision["fecha"]), monto=formato.importes(pendientes_revision["monto"])
+                )[
+                    ["id", "fecha", "descripcion", "tipo", "categoria", "monto"]
+                ],
+                column_config={
+                    "id": None,
+                    "fecha": st.column_config.TextColumn("Fecha"),
+                    "descripcion": st.column_config.TextColumn("Descripción"),
+                    "tipo": st.column_config.TextColumn("Tipo"),
+                    "categoria": st.column_config.SelectboxColumn("Categoría", options=CATEGORIAS["Ingreso"] + CATEGORIAS["Gasto"], required=True),
+                    "monto": st.column_config.TextColumn("Monto"),
+                },
+                disabled=["fecha", "descripcion", "tipo", "monto"],
+                hide_index=True, use_container_width=True, height=350, key="revisar_categorias",
+            )
+            if st.button("Guardar revisión", key="revisar_guardar", use_container_width=True,
+                         help="Confirma las categorías mostradas (también las que no se han cambiado)"):
+                validas = [categoria in CATEGORIAS[tipo] for tipo, categoria in zip(revisadas["tipo"], revisadas["categoria"])]
+                revisadas = revisadas[validas]
+                cambiadas = almacen.actualizar_categorias(revisadas["id"], revisadas["categoria"])
+                if categorizacion_automatica:
+                    categorizador(almacen)
+                st.success(f"{len(revisadas)} movimientos revisados ({cambiadas} con categoría corregida).")
+                if len(revisadas) < len(validas):
+                    st.warning("Se omitieron las filas con una categoría que no corresponde a su tipo.")
@@ -0,0 +1,17 @@
+import pytest
+
+from finanzas.almacen import AlmacenLibro
+from finanzas.cache import limpiar_caches
+
+
+# Las cachés son de módulo: un libro nuevo no debe ver lo calculado con el anterior
+@pytest.fixture(autouse=True)
+def caches_vacias():
+    limpiar_caches()
+    yield
+    limpiar_caches()
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    return AlmacenLibro(str(tmp_path / "libro.db"))
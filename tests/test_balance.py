@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finanzas.generadores import generar_facturas, generar_transacciones
+
+HOY = pd.Timestamp("2024-06-30")
+FECHAS = ["2022-07-01", "2022-12-31", "2023-01-01", "2023-05-17", "2024-02-29", "2024-06-30", "2025-01-01"]
+
+
+def _libro(almacen):
+    transacciones = generar_transacciones(2000, dias=2 * 365, semilla=19, hasta=HOY)
+    facturas = generar_facturas(300, dias=2 * 365, semilla=19, hasta=HOY)
+    facturas["numero"] = "F-" + pd.Series(np.arange(len(facturas))).astype(str).str.zfill(4)
+    almacen.insertar_transacciones(transacciones)
+    almacen.insertar_facturas(facturas)
+    return transacciones
+
+
+# Saldos sumando todo el histórico hasta el cierre de `fecha`
+def _directo(almacen, transacciones, fecha):
+    facturas = almacen.buscar_facturas()
+    hasta = transacciones[transacciones["fecha"] <= fecha]
+    tesoreria = np.where(hasta["tipo"] == "Ingreso", hasta["monto"], -hasta["monto"]).sum()
+    cobro = pd.to_datetime(facturas["fecha_cobro"])
+    clientes = facturas.loc[(facturas["fecha_emision"] <= fecha) & ~(cobro <= fecha), "monto"].sum()
+    return tesoreria, clientes
+
+
+def _por_clase(almacen, fecha):
+    saldos = almacen.saldos_a_fecha(fecha).groupby("clase")["saldo"].sum()
+    return saldos.get("tesoreria", 0.0), saldos.get("clientes", 0.0)
+
+
+@pytest.mark.parametrize("fecha", FECHAS)
+def test_saldos_a_fecha_coinciden_con_el_historico(almacen, fecha):
+    transacciones = _libro(almacen)
+    fecha = pd.Timestamp(fecha)
+    assert _por_clase(almacen, fecha) == pytest.approx(_directo(almacen, transacciones, fecha), abs=1e-6)
+
+
+def test_saldos_a_fecha_tras_marcar_pagadas(almacen):
+    transacciones = _libro(almacen)
+    pendientes = almacen.buscar_facturas(estados=["Pendiente", "Vencida"])
+    # Las emitidas antes de marzo se cobran dentro del histórico y el resto hoy
+    antiguas = pendientes["fecha_emision"] < pd.Timestamp("2024-03-01")
+    almacen.marcar_pagadas(pendientes.loc[antiguas, "id"], pd.Timestamp("2024-03-10"))
+    almacen.marcar_pagadas(pendientes.loc[~antiguas, "id"].iloc[::2], HOY)
+    for fecha in FECHAS:
+        fecha = pd.Timestamp(fecha)
+        assert _por_clase(almacen, fecha) == pytest.approx(_directo(almacen, transacciones, fecha), abs=1e-6), fecha
@@ -0,0 +1,103 @@
+import pytest
+
+from finanzas import cache
+from finanzas.cache import CacheCompartido, memoizar, obtener_cache
+
+KB = 1024
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: ahora[0])
+    return ahora
+
+
+# Registro propio para que el presupuesto global sólo vea las cachés de la prueba
+@pytest.fixture(autouse=True)
+def registro(monkeypatch):
+    monkeypatch.setattr(cache, "_REGISTRO", {})
+
+
+def _guardar(c, clave, valor):
+    return c.obtener(clave, lambda: valor)
+
+
+def test_caduca_tras_el_ttl(reloj):
+    c = CacheCompartido("prueba", ttl=10)
+    _guardar(c, "a", 1)
+    reloj[0] += 9
+    assert _guardar(c, "a", 2) == 1
+    reloj[0] += 2
+    assert _guardar(c, "a", 3) == 3
+    assert (c.aciertos, c.fallos, c.expulsiones) == (1, 2, 1)
+
+
+def test_sin_ttl_no_caduca(reloj):
+    c = CacheCompartido("prueba", ttl=0)
+    _guardar(c, "a", 1)
+    reloj[0] += 10**6
+    assert _guardar(c, "a", 2) == 1
+
+
+def test_expulsa_la_usada_hace_mas_tiempo(reloj):
+    c = CacheCompartido("prueba", max_entradas=2)
+    _guardar(c, "a", 1)
+    _guardar(c, "b", 2)
+    # Leer "a" la hace la más reciente: al entrar "c" sale "b"
+    _guardar(c, "a", None)
+    _guardar(c, "c", 3)
+    assert list(c._entradas) == ["a", "c"]
+    assert _guardar(c, "b", 4) == 4
+    assert list(c._entradas) == ["c", "b"]
+    assert c.expulsiones == 2
+
+
+def test_limite_de_tamano_conserva_la_nueva(reloj):
+    c = CacheCompartido("prueba", max_mb=1)
+    _guardar(c, "a", b"x" * (400 * KB))
+    _guardar(c, "b", b"x" * (400 * KB))
+    _guardar(c, "c", b"x" * (400 * KB))
+    assert list(c._entradas) == ["b", "c"]
+    # Una entrada mayor que el límite se queda sola
+    _guardar(c, "d", b"x" * (2 * 1024 * KB))
+    assert list(c._entradas) == ["d"]
+    assert c._bytes == 2 * 1024 * KB
+
+
+def test_presupuesto_global_expulsa_la_mas_antigua_de_cualquier_cache(reloj, monkeypatch):
+    monkeypatch.setattr(cache, "MAX_MB_TOTAL", 1)
+    una, otra = obtener_cache("una"), obtener_cache("otra")
+    _guardar(una, "a", b"x" * (300 * KB))
+    reloj[0] += 1
+    _guardar(otra, "b", b"x" * (300 * KB))
+    reloj[0] += 1
+    _guardar(una, "c", b"x" * (300 * KB))
+    reloj[0] += 1
+    _guardar(otra, "d", b"x" * (300 * KB))
+    assert list(una._entradas) == ["c"]
+    assert list(otra._entradas) == ["b", "d"]
+
+    # La entrada nueva se queda aunque ella sola supere el presupuesto
+    reloj[0] += 1
+    _guardar(una, "e", b"x" * (2 * 1024 * KB))
+    assert list(una._entradas) == ["e"]
+    assert not otra._entradas
+
+
+def test_memoizar_invalida_al_cambiar_la_version(reloj):
+    version = [1]
+    llamadas = []
+
+    @memoizar(nombre="prueba.version", version=lambda x: version[0])
+    def doble(x):
+        llamadas.append(x)
+        return 2 * x
+
+    assert doble(3) == 6
+    assert doble(3) == 6
+    assert llamadas == [3]
+    version[0] = 2
+    assert doble(3) == 6
+    assert llamadas == [3, 3]
+    assert doble.cache.estadisticas()["entradas"] == 2
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finanzas.cobros import TRAMOS_ANTIGUEDAD, periodo_medio_cobro, tramos_antiguedad
+
+HOY = pd.Timestamp("2024-06-30")
+
+
+def _facturas():
+    facturas = pd.DataFrame({
+        "numero": ["F-1", "F-2", "F-3", "F-4", "F-5", "F-6"],
+        "cliente": ["Cliente A", "Cliente B", "Cliente A", "Cliente C", "Cliente B", "Cliente C"],
+        "fecha_emision": pd.to_datetime(["2024-05-31", "2024-05-15", "2024-03-01", "2024-04-10", "2024-05-01", "2024-06-01"]),
+        "monto": [1000.0, 500.0, 200.0, 300.0, 800.0, 400.0],
+        "estado": ["Pendiente", "Pendiente", "Vencida", "Vencida", "Pagada", "Pagada"],
+        "fecha_cobro": pd.to_datetime([None, None, None, None, "2024-05-31", "2024-06-11"]),
+    })
+    return facturas.assign(vencimiento=facturas["fecha_emision"] + pd.Timedelta(days=30))
+
+
+def test_tramos_antiguedad_incluyen_el_limite():
+    assert tramos_antiguedad([0, 30, 31, 60, 61, 90, 91]).tolist() == [0, 0, 1, 1, 2, 2, 3]
+
+
+def test_periodo_medio_y_antiguedad(almacen):
+    almacen.insertar_facturas(_facturas())
+    resultado = periodo_medio_cobro(almacen, hasta=HOY)
+
+    # Cobradas: 800 a 30 días y 400 a 10 días
+    assert resultado["dias"] == pytest.approx((800 * 30 + 400 * 10) / 1200)
+    assert resultado["cobrado"] == pytest.approx(1200)
+    mensual = resultado["mensual"].set_index("mes")
+    assert mensual.loc["2024-05", "dias"] == pytest.approx(30)
+    assert mensual.loc["2024-06", "dias"] == pytest.approx(10)
+    assert np.isnan(mensual.loc["2024-04", "dias"])
+
+    # Pendientes: 30, 46, 121 y 81 días desde la emisión
+    antiguedad = resultado["antiguedad"].set_index("tramo")
+    assert antiguedad.index.tolist() == [etiqueta for etiqueta, _ in TRAMOS_ANTIGUEDAD]
+    assert antiguedad["pendiente"].tolist() == pytest.approx([1000, 500, 300, 200])
+    assert antiguedad["facturas"].tolist() == [1, 1, 1, 1]
+    assert resultado["pendiente"] == pytest.approx(2000)
+
+    # DSO: 2000 pendientes / 3000 facturados de abril a junio × 91 días
+    assert resultado["dso"] == pytest.approx(2000 / 3000 * 91)
+
+    clientes = resultado["clientes"].set_index("cliente")
+    assert clientes.loc["Cliente A", "pendiente"] == pytest.approx(1200)
+    assert clientes.loc["Cliente A", "Más de 90 días"] == pytest.approx(200)
+    assert clientes.loc["Cliente B", "dias"] == pytest.approx(30)
+
+
+def test_cobro_pasa_de_pendiente_a_cobrado(almacen):
+    almacen.insertar_facturas(_facturas())
+    antes = periodo_medio_cobro(almacen, hasta=HOY)
+    ids = almacen.buscar_facturas(cliente="Cliente B")
+    ids = ids.loc[ids["numero"] == "F-2", "id"]
+    assert almacen.marcar_pagadas(ids, HOY) == 1
+
+    despues = periodo_medio_cobro(almacen, hasta=HOY)
+    assert despues["pendiente"] == pytest.approx(antes["pendiente"] - 500)
+    assert despues["antiguedad"].set_index("tramo").loc["31-60 días", "pendiente"] == pytest.approx(0)
+    # 500 a 46 días se suman a los cobros de junio
+    assert despues["mensual"].set_index("mes").loc["2024-06", "dias"] == pytest.approx((400 * 10 + 500 * 46) / 900)
@@ -0,0 +1,49 @@
+import re
+import zipfile
+
+import pandas as pd
+
+from finanzas.almacen import TABLAS
+from finanzas.exportacion import exportar_seleccion, exportar_tablas
+from finanzas.formato import Formato
+from finanzas.vistas import ESPECIFICACIONES, VistaOrdenada
+
+
+def _facturas():
+    columnas, fechas = TABLAS["facturas"]
+    columna_orden, textos = ESPECIFICACIONES["facturas"]
+    vista = VistaOrdenada(columnas, columna_orden, fechas, textos)
+    vista.agregar(pd.DataFrame({
+        "id": [1, 2],
+        "numero": ["F-0001", "F-0002"],
+        "cliente": ["Cliente A", "Cliente B"],
+        "fecha_emision": pd.to_datetime(["2024-01-10", "2024-02-10"]),
+        "vencimiento": pd.to_datetime(["2024-02-09", "2024-03-11"]),
+        "monto": [1200.0, 850.5],
+        "estado": ["Pagada", "Pendiente"],
+        "fecha_cobro": pd.to_datetime(["2024-02-01", None]),
+    }))
+    return vista
+
+
+def _celdas(ruta, hoja):
+    with zipfile.ZipFile(ruta) as libro:
+        xml = libro.read(f"xl/worksheets/sheet{hoja}.xml").decode("utf-8")
+    return set(re.findall(r'<c r="([A-Z]+\d+)"[^>]*>\s*<v>', xml))
+
+
+def test_exportar_factura_sin_fecha_de_cobro(tmp_path):
+    ruta = exportar_seleccion(_facturas().seleccionar(), "facturas", str(tmp_path / "facturas.xlsx"), Formato())
+    # Hoja 1: Resumen; hoja 2: Datos (orden descendente por fecha de emisión)
+    celdas = _celdas(ruta, 2)
+    assert {"C2", "E2", "C3", "E3", "G3"} <= celdas
+    assert "G2" not in celdas
+
+
+def test_exportar_tablas_con_fecha_vacia(tmp_path):
+    datos = pd.DataFrame({"Cliente": ["A", "B"], "Cobro": pd.to_datetime(["2024-02-01", None]), "Importe": [10.0, 20.0]})
+    hojas = [{"nombre": "Cobros", "datos": datos, "tipos": {"Cobro": "fecha", "Importe": "importe"}}]
+    ruta = exportar_tablas(hojas, str(tmp_path / "tablas.xlsx"), Formato())
+    celdas = _celdas(ruta, 1)
+    assert {"B2", "C2", "C3"} <= celdas
+    assert "B3" not in celdas
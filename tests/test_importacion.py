@@ -0,0 +1,56 @@
+from finanzas.importacion import escribir_ejemplo, importar
+
+
+def test_reimportar_el_mismo_fichero_no_cambia_nada(almacen, tmp_path):
+    ruta = str(tmp_path / "extracto.csv")
+    escribir_ejemplo(ruta, "csv", 300)
+    primera = importar(almacen, ruta, nombre="extracto.csv")
+    assert not primera["repetida"]
+    assert primera["leidas"] == 300
+    assert primera["insertadas"] + primera["duplicadas"] == 300
+    version = almacen.version()
+
+    repetida = importar(almacen, ruta, nombre="extracto.csv")
+    assert repetida["repetida"]
+    assert repetida["insertadas"] == primera["insertadas"]
+    assert almacen.version() == version
+    assert almacen.contar_transacciones() == primera["insertadas"]
+
+
+def test_mismo_contenido_en_otro_fichero_se_omite(almacen, tmp_path):
+    ruta = str(tmp_path / "extracto.csv")
+    escribir_ejemplo(ruta, "csv", 300)
+    primera = importar(almacen, ruta, nombre="extracto.csv")
+
+    # Otro fichero (otra huella) con los mismos movimientos
+    with open(ruta, "a", encoding="utf-8") as fichero:
+        fichero.write("\n")
+    segunda = importar(almacen, ruta, nombre="extracto.csv")
+    assert not segunda["repetida"]
+    assert segunda["insertadas"] == 0
+    assert segunda["duplicadas"] == segunda["leidas"] - segunda["rechazadas"]
+    assert almacen.contar_transacciones() == primera["insertadas"]
+
+
+def test_movimientos_repetidos_dentro_del_fichero_entran_todos(almacen, tmp_path):
+    ruta = tmp_path / "extracto.csv"
+    ruta.write_text(
+        "Fecha;Concepto;Importe\n"
+        "01/03/2024;CUOTA SOFTWARE;-30,00\n"
+        "01/03/2024;CUOTA SOFTWARE;-30,00\n"
+        "02/03/2024;TRANSFERENCIA CLIENTE;1200,00\n",
+        encoding="utf-8",
+    )
+    assert importar(almacen, str(ruta), nombre="extracto.csv")["insertadas"] == 3
+
+    # Un extracto que se solapa sólo añade lo que el libro no tiene
+    ruta.write_text(
+        "Fecha;Concepto;Importe\n"
+        "01/03/2024;CUOTA SOFTWARE;-30,00\n"
+        "01/03/2024;CUOTA SOFTWARE;-30,00\n"
+        "01/03/2024;CUOTA SOFTWARE;-30,00\n",
+        encoding="utf-8",
+    )
+    resultado = importar(almacen, str(ruta), nombre="extracto.csv")
+    assert (resultado["insertadas"], resultado["duplicadas"]) == (1, 2)
+    assert almacen.contar_transacciones() == 4
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finanzas.almacen import IVA_GENERAL
+from finanzas.generadores import generar_facturas, generar_transacciones
+from finanzas.impuestos import (
+    IVA_GASTOS_POR_DEFECTO,
+    RETENCIONES_POR_DEFECTO,
+    TIPOS_IVA,
+    calendario_fiscal,
+    liquidaciones_trimestrales,
+)
+
+HOY = pd.Timestamp("2024-12-31")
+
+
+def _trimestre(fechas):
+    return (pd.to_datetime(fechas).dt.month - 1) // 3 + 1
+
+
+# Libro de dos años; la mitad de las facturas con dos conceptos a tipos
+# variados y el resto sin desglose (al tipo general con el IVA incluido)
+def _libro(almacen):
+    transacciones = generar_transacciones(3000, dias=2 * 365, semilla=20, hasta=HOY)
+    facturas = generar_facturas(400, dias=2 * 365, semilla=20, hasta=HOY)
+    facturas["numero"] = "F-" + pd.Series(np.arange(len(facturas))).astype(str).str.zfill(4)
+    desglosadas = facturas.iloc[: len(facturas) // 2]
+    conceptos = pd.DataFrame({
+        "numero": np.repeat(desglosadas["numero"].to_numpy(), 2),
+        "descripcion": "Concepto",
+        "cantidad": 1,
+        "precio": np.repeat((desglosadas["monto"] / 2).round(2).to_numpy(), 2),
+        "iva_porcentaje": np.random.default_rng(20).choice(TIPOS_IVA, 2 * len(desglosadas)),
+    })
+    almacen.insertar_transacciones(transacciones)
+    almacen.insertar_facturas(facturas, conceptos)
+    return transacciones, facturas, conceptos
+
+
+# IVA repercutido y soportado de cada trimestre de `ano` sumando líneas y gastos
+def _directo(transacciones, facturas, conceptos, ano):
+    emision = facturas.set_index("numero")["fecha_emision"]
+    lineas = conceptos.assign(fecha=conceptos["numero"].map(emision).to_numpy())
+    lineas = lineas[lineas["fecha"].dt.year == ano]
+    cuota = lineas["cantidad"] * lineas["precio"] * lineas["iva_porcentaje"] / 100
+    repercutido = cuota.groupby(_trimestre(lineas["fecha"])).sum()
+
+    sin_desglose = facturas[~facturas["numero"].isin(conceptos["numero"]) & (facturas["fecha_emision"].dt.year == ano)]
+    cuota = sin_desglose["monto"] - (sin_desglose["monto"] / (1 + IVA_GENERAL / 100)).round(2)
+    repercutido = repercutido.add(cuota.groupby(_trimestre(sin_desglose["fecha_emision"])).sum(), fill_value=0)
+
+    gastos = transacciones[(transacciones["tipo"] == "Gasto") & (transacciones["fecha"].dt.year == ano)]
+    iva = gastos["categoria"].map(IVA_GASTOS_POR_DEFECTO).fillna(IVA_GENERAL)
+    retencion = gastos["categoria"].map(RETENCIONES_POR_DEFECTO).fillna(0)
+    base = gastos["monto"] / (1 + (iva - retencion) / 100)
+    soportado = (base * iva / 100).groupby(_trimestre(gastos["fecha"])).sum()
+    return repercutido.reindex(range(1, 5), fill_value=0.0), soportado.reindex(range(1, 5), fill_value=0.0)
+
+
+@pytest.mark.parametrize("ano", [2023, 2024])
+def test_liquidaciones_coinciden_con_la_suma_directa(almacen, ano):
+    transacciones, facturas, conceptos = _libro(almacen)
+    repercutido, soportado = _directo(transacciones, facturas, conceptos, ano)
+
+    liquidaciones = liquidaciones_trimestrales(almacen, ano)
+    assert liquidaciones["repercutido"].to_numpy() == pytest.approx(repercutido.to_numpy())
+    assert liquidaciones["soportado"].to_numpy() == pytest.approx(soportado.to_numpy())
+
+    calendario = calendario_fiscal(almacen, ano, HOY)
+    iva = calendario[calendario["impuesto"] == "IVA"]["importe"].to_numpy()
+    assert iva == pytest.approx((repercutido - soportado).to_numpy())
+
+
+def test_factura_nueva_cambia_la_liquidacion(almacen):
+    _libro(almacen)
+    antes = liquidaciones_trimestrales(almacen, 2024)
+    almacen.insertar_facturas(
+        pd.DataFrame({
+            "numero": ["F-EXTRA"], "cliente": ["Cliente A"], "fecha_emision": [pd.Timestamp("2024-05-10")],
+            "vencimiento": [pd.Timestamp("2024-06-09")], "monto": [1100.0], "estado": ["Pendiente"],
+        }),
+        pd.DataFrame({"numero": ["F-EXTRA"], "descripcion": ["Servicio"], "cantidad": [2], "precio": [500.0], "iva_porcentaje": [10]}),
+    )
+    despues = liquidaciones_trimestrales(almacen, 2024)
+    assert (despues["repercutido"] - antes["repercutido"]).to_numpy() == pytest.approx([0, 100, 0, 0])
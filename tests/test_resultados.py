@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finanzas.generadores import generar_transacciones
+from finanzas.resultados import cuenta_resultados
+
+HOY = pd.Timestamp("2024-06-30")
+
+
+def _neto(datos, inicio, fin):
+    tramo = datos[(datos["fecha"] >= inicio) & (datos["fecha"] <= fin)]
+    return float(np.where(tramo["tipo"] == "Ingreso", tramo["monto"], -tramo["monto"]).sum())
+
+
+@pytest.mark.parametrize("inicio, fin", [
+    ("2024-01-01", "2024-06-30"),
+    ("2023-03-15", "2023-03-15"),
+    ("2022-11-20", "2024-02-10"),
+    ("2022-07-01", "2024-06-30"),
+])
+def test_resultado_es_ingresos_menos_gastos(almacen, inicio, fin):
+    datos = generar_transacciones(2000, dias=2 * 365, semilla=18, hasta=HOY)
+    almacen.insertar_transacciones(datos)
+    inicio, fin = pd.Timestamp(inicio), pd.Timestamp(fin)
+    informe = cuenta_resultados(almacen, inicio, fin).set_index("codigo")
+    assert informe.loc["D", "valor"] == pytest.approx(_neto(datos, inicio, fin))
+
+
+def test_lineas_por_cuenta(almacen):
+    almacen.insertar_transacciones(pd.DataFrame({
+        "fecha": pd.to_datetime(["2024-02-01", "2024-02-10", "2024-02-15", "2024-02-20", "2024-03-05"]),
+        "descripcion": ["Venta", "Nómina", "Recibo luz", "Intereses", "Venta fuera del periodo"],
+        "tipo": ["Ingreso", "Gasto", "Gasto", "Ingreso", "Ingreso"],
+        "categoria": ["Ventas", "Salarios", "Suministros", "Intereses", "Ventas"],
+        "cuenta": "Cuenta Principal",
+        "monto": [1000.0, 400.0, 100.0, 10.0, 5000.0],
+    }))
+    informe = cuenta_resultados(almacen, pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-29")).set_index("codigo")
+    assert informe.loc["1", "valor"] == pytest.approx(1000)
+    assert informe.loc["6", "valor"] == pytest.approx(-400)
+    assert informe.loc["7", "valor"] == pytest.approx(-100)
+    assert informe.loc["A", "valor"] == pytest.approx(500)
+    assert informe.loc["12", "valor"] == pytest.approx(10)
+    assert informe.loc["D", "valor"] == pytest.approx(510)
+    assert informe.loc["6", "porcentaje"] == pytest.approx(-40)